@@ -1,34 +1,112 @@
+import asyncio
+import gzip
+import logging
 import os
+import threading
 import uuid
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from collections import OrderedDict
+from typing import Optional
+
+from celery.exceptions import TimeoutError as CeleryTimeoutError
+from fastapi import APIRouter, UploadFile, File, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 
-from app.core.schemas import JobCreateResponse, JobStatusResponse
-from app.services.job_store import write_job, read_job
+from app.core.schemas import (
+    JobCreateResponse,
+    JobProgressResponse,
+    JobStatusResponse,
+    ResegmentRequest,
+    ResegmentResponse,
+    UploadCompleteRequest,
+    UploadInitRequest,
+    UploadInitResponse,
+)
+from app.services.job_events import get_async_redis, job_events
+from app.services.job_store import (
+    claim_job_field,
+    read_job,
+    read_job_fields,
+    read_job_result_json,
+    release_job_field,
+    update_job,
+    write_job,
+)
 from app.services.object_store import (
+    PRESIGNED_URL_EXPIRES_S,
+    MultipartUpload,
+    head_object,
+    presigned_put_url,
     r2_enabled,
-    upload_bytes,
     get_public_url,
 )
-from app.workers.tasks import run_analysis_job
+from app.services.result_cache import (
+    cache_key,
+    cache_stats,
+    lookup_result,
+    published_fingerprint,
+)
+from app.services.uploads import (
+    keep_single_copy,
+    plan_direct_parts,
+    save_upload_to_object_store,
+    save_upload_to_path,
+)
+from app.workers.signatures import enqueue_analysis_job, enqueue_resegment
 
 load_dotenv()
 
 UPLOAD_DIR = os.getenv("UPLOAD_DIR", "./data/uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Results smaller than this are sent uncompressed.
+GZIP_MIN_BYTES = 1024
+
+# Compressed results by ETag, so a result downloaded again is neither read
+# nor compressed a second time. The least recently sent are dropped once
+# the cache holds more than this many bytes.
+GZIP_CACHE_MAX_BYTES = 32 * 1024 * 1024
+_gzip_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_gzip_cache_lock = threading.Lock()
+
+# How long POST /job/{id}/resegment waits for a worker.
+RESEGMENT_TIMEOUT_S = float(os.getenv("RESEGMENT_TIMEOUT_S", "10"))
+
 router = APIRouter()
 
 @router.get("/health")
 def health():
     return {"ok": True}
 
+def _find_cached_result(content_sha256: str):
+    """
+    (cache_key, source) for an upload: the key its result will be cached
+    under, and the (job_id, result_etag) of a finished job that already
+    has that result. Either is None when unknown. The key is built from
+    the settings fingerprint the workers publish; any failure here is
+    treated as a miss so the upload is simply analysed.
+    """
+    try:
+        fingerprint = published_fingerprint()
+        if fingerprint is None:
+            return None, None
+        key = cache_key(content_sha256, fingerprint)
+        source_id = lookup_result(key)
+        if source_id is None:
+            return key, None
+        source = read_job_fields(source_id, ("status", "result_etag")) or {}
+    except Exception:
+        logging.warning("Result cache lookup failed; analysing the upload", exc_info=True)
+        return None, None
+    if source.get("status") != "done" or not source.get("result_etag"):
+        return key, None
+    return key, (source_id, source["result_etag"])
+
 @router.post("/upload", response_model=JobCreateResponse)
 async def upload_video(file: UploadFile = File(...)):
     job_id = str(uuid.uuid4())
 
     ext = os.path.splitext(file.filename or "")[1] or ".mp4"
-    file_bytes = await file.read()
 
     storage_backend = "local"
     storage_key = os.path.join(UPLOAD_DIR, f"{job_id}{ext}")
@@ -37,7 +115,9 @@ async def upload_video(file: UploadFile = File(...)):
     if r2_enabled():
         storage_backend = "r2"
         storage_key = f"uploads/{job_id}{ext}"
-        upload_bytes(storage_key, file_bytes, file.content_type or "video/mp4")
+        stored = await save_upload_to_object_store(
+            file, storage_key, file.content_type or "video/mp4"
+        )
         public_url = get_public_url(storage_key)
         if not public_url:
             raise HTTPException(
@@ -46,9 +126,36 @@ async def upload_video(file: UploadFile = File(...)):
             )
         video_url = public_url
     else:
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-        with open(storage_key, "wb") as f:
-            f.write(file_bytes)
+        stored = await save_upload_to_path(file, storage_key)
+
+    # One stored copy per video content, and no re-analysis of a video
+    # that was already analysed with the current settings.
+    kept = await asyncio.to_thread(keep_single_copy, stored.sha256, {
+        "backend": storage_backend,
+        "key": storage_key,
+        "url": video_url,
+    })
+    storage_key = kept["key"]
+    video_url = kept["url"]
+    storage = {
+        "backend": storage_backend,
+        "key": storage_key,
+        "size": stored.size,
+        "sha256": stored.sha256,
+    }
+    key, source = await asyncio.to_thread(_find_cached_result, stored.sha256)
+    if source is not None:
+        source_id, etag = source
+        write_job(job_id, {
+            "job_id": job_id,
+            "status": "done",
+            "progress": 1.0,
+            "message": "Analysis complete (cached)",
+            "result_ref": source_id,
+            "result_etag": etag,
+            "storage": storage,
+        })
+        return JobCreateResponse(job_id=job_id)
 
     # Initialize job record
     write_job(job_id, {
@@ -59,23 +166,282 @@ async def upload_video(file: UploadFile = File(...)):
         "result": {
             "video": {
                 "url": video_url,
-                "filename": f"{job_id}{ext}",
+                "filename": os.path.basename(storage_key),
             }
         },
-        "storage": {
-            "backend": storage_backend,
-            "key": storage_key,
-        },
+        "storage": storage,
+        "cache_key": key,
     })
 
     # Enqueue background job
-    run_analysis_job.delay(job_id, storage_backend, storage_key)
+    enqueue_analysis_job(job_id, storage_backend, storage_key)
 
     return JobCreateResponse(job_id=job_id)
 
+@router.post("/upload/init", response_model=UploadInitResponse)
+def init_direct_upload(request: UploadInitRequest):
+    """
+    Start a direct-to-bucket upload: the browser PUTs the video to the
+    returned presigned URL(s), then calls /upload/complete. The API never
+    sees the video bytes. Only available with object storage; otherwise
+    clients use POST /upload.
+    """
+    if not r2_enabled():
+        raise HTTPException(
+            status_code=409,
+            detail="Direct uploads need object storage; use POST /upload.",
+        )
+    job_id = str(uuid.uuid4())
+    ext = os.path.splitext(request.filename)[1] or ".mp4"
+    content_type = request.content_type or "video/mp4"
+    storage_key = f"uploads/{job_id}{ext}"
+    public_url = get_public_url(storage_key)
+    if not public_url:
+        raise HTTPException(
+            status_code=500,
+            detail="R2_PUBLIC_URL not configured for public video access.",
+        )
+
+    response = UploadInitResponse(
+        job_id=job_id, key=storage_key, expires_in=PRESIGNED_URL_EXPIRES_S
+    )
+    storage = {"backend": "r2", "key": storage_key, "expected_size": request.size}
+    plan = plan_direct_parts(request.size)
+    if plan is None:
+        response.upload_url = presigned_put_url(storage_key, content_type)
+        response.headers = {"Content-Type": content_type}
+    else:
+        part_size, part_count = plan
+        upload = MultipartUpload(storage_key, content_type)
+        response.upload_id = upload.upload_id
+        response.part_size = part_size
+        response.part_urls = [
+            upload.presigned_part_url(number) for number in range(1, part_count + 1)
+        ]
+        storage["upload_id"] = upload.upload_id
+
+    write_job(job_id, {
+        "job_id": job_id,
+        "status": "uploading",
+        "progress": 0.0,
+        "message": "Waiting for upload",
+        "result": {
+            "video": {
+                "url": public_url,
+                "filename": f"{job_id}{ext}",
+            }
+        },
+        "storage": storage,
+    })
+    return response
+
+@router.post("/upload/complete", response_model=JobCreateResponse)
+def complete_direct_upload(request: UploadCompleteRequest):
+    """
+    Check the uploaded object exists (HEAD) and queue the analysis.
+    Completing a job more than once (a retry, or concurrent calls) queues
+    it once and returns the same job.
+    """
+    job_id = request.job_id
+    record = read_job_fields(job_id, ("status", "storage", "upload_completed"))
+    if not record or "status" not in record:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if record["status"] != "uploading":
+        if record.get("upload_completed"):
+            return JobCreateResponse(job_id=job_id)
+        raise HTTPException(status_code=409, detail="Not a direct upload")
+    if not claim_job_field(job_id, "upload_completed"):
+        return JobCreateResponse(job_id=job_id)
+
+    storage = record["storage"]
+    storage_key = storage["key"]
+    try:
+        if storage.get("upload_id"):
+            if not request.parts:
+                raise HTTPException(status_code=400, detail="Missing uploaded parts")
+            MultipartUpload(storage_key, upload_id=storage["upload_id"]).complete(
+                {part.part_number: part.etag for part in request.parts}
+            )
+
+        stored = head_object(storage_key)
+        if stored is None:
+            raise HTTPException(status_code=400, detail="Upload not found in storage")
+        expected_size = storage.get("expected_size")
+        if expected_size is not None and stored["size"] != expected_size:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Uploaded {stored['size']} bytes, expected {expected_size}",
+            )
+
+        update_job(job_id, {
+            "status": "queued",
+            "message": "Queued for processing",
+            "upload_completed": True,
+            "storage": {
+                "backend": "r2",
+                "key": storage_key,
+                "size": stored["size"],
+                "etag": stored["etag"],
+            },
+        })
+        try:
+            enqueue_analysis_job(job_id, "r2", storage_key)
+        except BaseException:
+            update_job(job_id, {
+                "status": "uploading",
+                "message": "Waiting for upload",
+                "upload_completed": False,
+                "storage": storage,
+            })
+            raise
+    except BaseException:
+        # Nothing was queued; the client can fix the upload and retry.
+        release_job_field(job_id, "upload_completed")
+        raise
+    return JobCreateResponse(job_id=job_id)
+
 @router.get("/job/{job_id}", response_model=JobStatusResponse)
 def get_job(job_id: str):
     record = read_job(job_id)
     if not record:
         raise HTTPException(status_code=404, detail="Job not found")
     return JobStatusResponse(**record)
+
+@router.get("/job/{job_id}/status", response_model=JobProgressResponse)
+def get_job_status(job_id: str):
+    record = read_job_fields(job_id)
+    if not record or "status" not in record:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobProgressResponse(
+        job_id=job_id,
+        status=record["status"],
+        progress=record.get("progress"),
+        message=record.get("message"),
+        result_ready=record["status"] == "done",
+    )
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether Accept-Encoding allows gzip, honouring q-values (q=0 refuses)."""
+    weights = {}
+    for entry in (accept_encoding or "").split(","):
+        coding, _, params = entry.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights["gzip" if coding == "x-gzip" else coding] = weight
+    return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+def _cached_gzip(etag: str) -> Optional[bytes]:
+    with _gzip_cache_lock:
+        packed = _gzip_cache.get(etag)
+        if packed is not None:
+            _gzip_cache.move_to_end(etag)
+        return packed
+
+def _store_gzip(etag: str, packed: bytes) -> None:
+    with _gzip_cache_lock:
+        _gzip_cache[etag] = packed
+        _gzip_cache.move_to_end(etag)
+        total = sum(len(value) for value in _gzip_cache.values())
+        while total > GZIP_CACHE_MAX_BYTES and len(_gzip_cache) > 1:
+            total -= len(_gzip_cache.popitem(last=False)[1])
+
+@router.get("/job/{job_id}/result")
+def get_job_result(
+    job_id: str,
+    if_none_match: Optional[str] = Header(default=None),
+    accept_encoding: Optional[str] = Header(default=None),
+):
+    """
+    The finished result, sent as the JSON bytes the worker stored. Clients
+    that send back the ETag get a 304 without the result being read, and
+    repeat gzip downloads are served from the compressed copy.
+    """
+    record = read_job_fields(job_id, ("status", "result_etag"))
+    if not record or "status" not in record:
+        raise HTTPException(status_code=404, detail="Job not found")
+    etag = record.get("result_etag")
+    if record["status"] != "done" or not etag:
+        raise HTTPException(status_code=409, detail="Job result not ready")
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    use_gzip = _accepts_gzip(accept_encoding)
+    if use_gzip:
+        packed = _cached_gzip(etag)
+        if packed is not None:
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=packed, media_type="application/json", headers=headers)
+
+    body = read_job_result_json(job_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Job result not found")
+    content = body.encode("utf-8")
+    if use_gzip and len(content) >= GZIP_MIN_BYTES:
+        content = gzip.compress(content, compresslevel=6)
+        # Keyed by the stored ETag, which the result's bytes determine.
+        _store_gzip(etag, content)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=content, media_type="application/json", headers=headers)
+
+@router.get("/job/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Progress as Server-Sent Events until the job is done or failed.
+    Clients that cannot use SSE keep polling /job/{job_id}/status.
+    """
+    if await asyncio.to_thread(read_job_fields, job_id, ("status",)) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        job_events(job_id, client=get_async_redis()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/job/{job_id}/resegment", response_model=ResegmentResponse)
+def resegment_job(job_id: str, request: ResegmentRequest):
+    """
+    Segment a finished job again with other parameters, from the signals
+    it stored; no video is decoded. The job's stored result is unchanged.
+    Runs on a worker, which keeps numpy and the model out of the API.
+    """
+    record = read_job_fields(job_id, ("status", "signals_artefact", "result_ref"))
+    if not record or "status" not in record:
+        raise HTTPException(status_code=404, detail="Job not found")
+    artefact = record.get("signals_artefact")
+    if artefact is None and record.get("result_ref"):
+        source = read_job_fields(record["result_ref"], ("signals_artefact",)) or {}
+        artefact = source.get("signals_artefact")
+    if artefact is None:
+        raise HTTPException(
+            status_code=409, detail="No stored signals for this job"
+        )
+
+    pending = enqueue_resegment(artefact, request.model_dump())
+    try:
+        analysis = pending.get(timeout=RESEGMENT_TIMEOUT_S)
+    except CeleryTimeoutError:
+        raise HTTPException(status_code=504, detail="Re-segmentation timed out")
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return ResegmentResponse(job_id=job_id, **analysis)
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    return cache_stats()
@@ -0,0 +1,97 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Modules that belong to the worker only; the API must not load them.
+HEAVY_MODULES = ["cv2", "numpy", "librosa", "lightgbm", "sklearn", "scipy"]
+
+
+def measure_imports(module: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Import `module` in a fresh interpreter under `-X importtime`.
+    Returns {module name: (self_us, cumulative_us)}.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(BACKEND_DIR), env.get("PYTHONPATH", "")]
+    ).rstrip(os.pathsep)
+    # app.main creates data/uploads relative to the working directory.
+    with tempfile.TemporaryDirectory() as cwd:
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=cwd,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+    timings: Dict[str, Tuple[int, int]] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def summarize(
+    timings: Dict[str, Tuple[int, int]],
+    module: str,
+    top: int,
+) -> Tuple[float, List[str], List[Tuple[str, int]]]:
+    total_ms = timings.get(module, (0, 0))[1] / 1000.0
+    heavy = [name for name in HEAVY_MODULES if name in timings]
+    roots = [
+        (name, cumulative)
+        for name, (_, cumulative) in timings.items()
+        if "." not in name and name != module.split(".")[0]
+    ]
+    roots.sort(key=lambda item: item[1], reverse=True)
+    return total_ms, heavy, roots[:top]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Measure cold import time of the API (or any module)."
+    )
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="Exit non-zero if the best import time exceeds this budget.",
+    )
+    args = parser.parse_args()
+
+    runs = [measure_imports(args.module) for _ in range(max(1, args.repeat))]
+    results = [summarize(timings, args.module, args.top) for timings in runs]
+    best_ms, heavy, roots = min(results, key=lambda result: result[0])
+
+    print(f"import {args.module}: best {best_ms:.1f} ms over {len(runs)} runs")
+    print(f"{'package':<24} {'cumulative_ms':>13}")
+    for name, cumulative in roots:
+        print(f"{name:<24} {cumulative / 1000.0:>13.1f}")
+
+    status = 0
+    if heavy:
+        print(f"heavy modules loaded: {', '.join(heavy)}")
+        if args.module == "app.main":
+            status = 1
+    if args.max_ms is not None and best_ms > args.max_ms:
+        print(f"over budget: {best_ms:.1f} ms > {args.max_ms:.1f} ms")
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
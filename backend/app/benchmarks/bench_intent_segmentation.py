@@ -0,0 +1,219 @@
+import argparse
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.services.intent_segmentation import (
+    _PHASES,
+    _compute_clip_thresholds,
+    _decode_phase_indices,
+    _emission_scores,
+    _transition_penalty_matrix,
+    segment_intent_phases,
+)
+
+
+def _emission_score(
+    phase: str,
+    m: float,
+    prev_phase: str,
+    thr: Dict[str, float],
+    interaction_t: float,
+    entropy_t: float,
+    use_multisignal: bool,
+) -> float:
+    low = thr["low"]
+    pursue = thr["pursue"]
+    spike = thr["spike"]
+
+    if phase == "Explore":
+        score = 0.0
+        if m < low:
+            score += 2.0
+        if low <= m < pursue:
+            score += 0.8
+        if m >= spike:
+            score -= 2.0
+        if use_multisignal:
+            if entropy_t >= 0.6:
+                score += 0.8
+            if interaction_t <= 0.25:
+                score += 0.5
+            if interaction_t >= 0.6 and m >= pursue:
+                score -= 0.8
+        return score
+
+    if phase == "Pursue":
+        score = 0.0
+        if pursue <= m < spike:
+            score += 2.0
+        if low <= m < pursue:
+            score += 0.8
+        if m < low:
+            score -= 1.5
+        if m >= spike:
+            score -= 1.0
+        if use_multisignal:
+            if 0.35 <= interaction_t < 0.7:
+                score += 0.8
+            if interaction_t <= 0.25:
+                score -= 0.6
+            if entropy_t >= 0.75:
+                score -= 0.6
+            if prev_phase == "Outcome":
+                score -= 1.0
+        return score
+
+    if phase == "Execute":
+        score = 3.0 if m >= spike else -2.0
+        if use_multisignal:
+            if interaction_t >= 0.6:
+                score += 1.2
+            if interaction_t <= 0.3:
+                score -= 1.5
+            if entropy_t >= 0.8:
+                score -= 1.2
+            if interaction_t <= 0.3 and entropy_t >= 0.4:
+                score -= 2.0
+            if interaction_t <= 0.25 and entropy_t >= 0.7:
+                score -= 2.0
+        return score
+
+    if phase == "Outcome":
+        score = 0.0
+        if prev_phase == "Execute" and m < low:
+            score += 2.5
+        if prev_phase == "Outcome" and m < pursue:
+            score += 1.2
+        if use_multisignal:
+            if m < low and interaction_t <= 0.25:
+                score += 1.0
+            if m < low and entropy_t <= 0.35:
+                score += 0.8
+            if interaction_t >= 0.5:
+                score -= 1.2
+            if entropy_t >= 0.6:
+                score -= 1.2
+        if score == 0.0:
+            score = -2.0
+        return score
+
+    return -2.0
+
+
+def _transition_penalty(prev: str, curr: str, scale: float = 1.0) -> float:
+    if prev == curr:
+        return 0.0
+
+    penalties = {
+        ("Explore", "Pursue"): 0.2,
+        ("Pursue", "Execute"): 0.3,
+        ("Execute", "Outcome"): 0.1,
+        ("Outcome", "Explore"): 0.2,
+        ("Explore", "Execute"): 1.2,
+        ("Pursue", "Outcome"): 0.8,
+        ("Outcome", "Pursue"): 1.0,
+        ("Explore", "Outcome"): 3.0,
+        ("Outcome", "Execute"): 2.5,
+        ("Execute", "Explore"): 2.0,
+    }
+    return penalties.get((prev, curr), 1.5) * scale
+
+
+
+def _loop_decode(
+    m: List[float],
+    interaction: List[float],
+    entropy: List[float],
+    thr: Dict[str, float],
+) -> List[str]:
+    """The original dict-of-phases DP."""
+    dp_scores = [{
+        phase: _emission_score(
+            phase, m[0], phase, thr, interaction[0], entropy[0], True
+        )
+        for phase in _PHASES
+    }]
+    back_ptrs = [{phase: phase for phase in _PHASES}]
+    for i in range(1, len(m)):
+        scores: Dict[str, float] = {}
+        back: Dict[str, str] = {}
+        for curr in _PHASES:
+            best_score = float("-inf")
+            best_prev = _PHASES[0]
+            for prev in _PHASES:
+                score = (
+                    dp_scores[i - 1][prev]
+                    + _emission_score(
+                        curr, m[i], prev, thr, interaction[i], entropy[i], True
+                    )
+                    - _transition_penalty(prev, curr)
+                )
+                if score > best_score:
+                    best_score = score
+                    best_prev = prev
+            scores[curr] = best_score
+            back[curr] = best_prev
+        dp_scores.append(scores)
+        back_ptrs.append(back)
+
+    last_phase = max(dp_scores[-1], key=dp_scores[-1].get)
+    phase_seq = [last_phase]
+    for i in range(len(m) - 1, 0, -1):
+        last_phase = back_ptrs[i][last_phase]
+        phase_seq.append(last_phase)
+    phase_seq.reverse()
+    return phase_seq
+
+
+def _synthetic_signals(frames: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    t = np.arange(frames)
+    motion = 0.25 + 0.2 * np.sin(t / 40.0) + rng.normal(0.0, 0.08, frames)
+    motion[rng.random(frames) < 0.01] += 0.5
+    interaction = np.clip(rng.normal(0.45, 0.2, frames), 0.0, 1.0)
+    entropy = np.clip(rng.normal(0.5, 0.15, frames), 0.0, 1.0)
+    return np.clip(np.stack([motion, interaction, entropy]), 0.0, 1.0)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare the dict-based segmenter DP with the emission tensor."
+    )
+    parser.add_argument("--frames", type=int, default=100_000)
+    args = parser.parse_args()
+
+    motion, interaction, entropy = _synthetic_signals(args.frames)
+    thr = _compute_clip_thresholds(motion)
+
+    start = time.perf_counter()
+    reference = _loop_decode(
+        motion.tolist(), interaction.tolist(), entropy.tolist(), thr
+    )
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    emissions = _emission_scores(motion, interaction, entropy, thr, True)
+    emission_s = time.perf_counter() - start
+    path = _decode_phase_indices(emissions, _transition_penalty_matrix())
+    tensor_s = time.perf_counter() - start
+
+    if [_PHASES[idx] for idx in path.tolist()] != reference:
+        raise AssertionError("Emission tensor DP diverged from the dict DP.")
+
+    times = np.arange(args.frames) / 30.0
+    start = time.perf_counter()
+    segment_intent_phases(times, motion, interaction=interaction, entropy=entropy)
+    end_to_end_s = time.perf_counter() - start
+
+    print(f"frames:             {args.frames}")
+    print(f"dict DP:            {loop_s:.3f}s")
+    print(f"tensor DP:          {tensor_s:.3f}s (emissions {emission_s:.3f}s)")
+    print(f"speedup:            {loop_s / tensor_s:.1f}x")
+    print(f"segment end-to-end: {end_to_end_s:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,97 @@
+import argparse
+import time
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from app.services.motion_utils import motion_features_batch
+
+
+RESOLUTIONS = [(1080, 1920), (540, 960), (360, 640), (180, 320)]
+
+
+def _per_frame_features(
+    prev_gray: np.ndarray,
+    gray: np.ndarray,
+) -> Tuple[float, float, float]:
+    """The original per-frame loop body of compute_motion_signal."""
+    diff = cv2.absdiff(gray, prev_gray)
+    motion = float(np.mean(diff))
+
+    h, w = diff.shape
+    cell_h = max(h // 4, 1)
+    cell_w = max(w // 4, 1)
+    cell_motions = []
+    for row in range(4):
+        for col in range(4):
+            y0 = row * cell_h
+            x0 = col * cell_w
+            y1 = h if row == 3 else (row + 1) * cell_h
+            x1 = w if col == 3 else (col + 1) * cell_w
+            cell = diff[y0:y1, x0:x1]
+            if cell.size == 0:
+                continue
+            cell_motions.append(float(np.mean(cell)))
+    interaction = float(np.std(cell_motions)) / (
+        float(np.mean(cell_motions)) + 1e-6
+    )
+
+    hist = cv2.calcHist([gray], [0], None, [32], [0, 256]).flatten()
+    probs = hist / float(np.sum(hist))
+    entropy = -float(np.sum(probs * np.log2(probs + 1e-12))) / np.log2(32)
+    return motion, interaction, entropy
+
+
+def _synthetic_frames(count: int, shape: Tuple[int, int]) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 256, size=shape, dtype=np.uint8)
+    frames = np.empty((count,) + shape, dtype=np.uint8)
+    for k in range(count):
+        frames[k] = np.roll(base, shift=3 * k, axis=1)
+    return frames
+
+
+def _time_per_frame(frames: np.ndarray, batch_size: int) -> Tuple[float, float]:
+    diffs = len(frames) - 1
+
+    start = time.perf_counter()
+    reference: List[Tuple[float, float, float]] = [
+        _per_frame_features(frames[k - 1], frames[k])
+        for k in range(1, len(frames))
+    ]
+    per_frame_s = (time.perf_counter() - start) / diffs
+
+    start = time.perf_counter()
+    outputs = []
+    for offset in range(0, diffs, batch_size):
+        outputs.append(motion_features_batch(frames[offset:offset + batch_size + 1]))
+    batched_s = (time.perf_counter() - start) / diffs
+
+    batched = np.stack([np.concatenate(parts) for parts in zip(*outputs)], axis=1)
+    if not np.allclose(batched, np.array(reference), rtol=1e-6, atol=1e-7):
+        raise AssertionError("Batched kernel diverged from the per-frame loop.")
+    return per_frame_s, batched_s
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare the per-frame motion loop with the batched kernel."
+    )
+    parser.add_argument("--frames", type=int, default=121)
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{'resolution':>10} {'loop ms/frame':>14} {'batch ms/frame':>15} {'speedup':>8}")
+    for shape in RESOLUTIONS:
+        frames = _synthetic_frames(args.frames, shape)
+        per_frame_s, batched_s = _time_per_frame(frames, args.batch_size)
+        print(
+            f"{shape[0]:>9}p {per_frame_s * 1000:>14.3f} "
+            f"{batched_s * 1000:>15.3f} {per_frame_s / batched_s:>7.2f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
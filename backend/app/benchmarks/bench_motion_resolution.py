@@ -0,0 +1,133 @@
+import argparse
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services.motion_utils import compute_motion_signal_from_frames
+from app.services.video_utils import iter_gray_frames
+
+
+SHORT_SIDES = [1080, 540, 360, 180]
+
+
+def _make_synthetic_video(path: Path, duration_s: float) -> None:
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-v", "error",
+        "-f", "lavfi",
+        "-i", "testsrc2=size=1920x1080:rate=30",
+        "-t", str(duration_s),
+        "-c:v", "libx264",
+        "-pix_fmt", "yuv420p",
+        str(path),
+    ]
+    subprocess.run(cmd, check=True)
+
+
+def _run(video_path: str, fps: int, short_side: int) -> Dict:
+    start = time.perf_counter()
+    times, motion, interaction, entropy = compute_motion_signal_from_frames(
+        iter_gray_frames(video_path, fps=fps, short_side=short_side),
+        fps_used=float(fps),
+    )
+    elapsed = time.perf_counter() - start
+    return {
+        "elapsed_s": elapsed,
+        "frames": len(times) + 1 if times else 0,
+        "signals": {
+            "motion": np.array(motion, dtype=float),
+            "interaction": np.array(interaction, dtype=float),
+            "entropy": np.array(entropy, dtype=float),
+        },
+    }
+
+
+def _fidelity(reference: np.ndarray, values: np.ndarray) -> Dict[str, float]:
+    length = min(reference.size, values.size)
+    if length < 2:
+        return {"corr": float("nan"), "max_abs": float("nan")}
+    ref = reference[:length]
+    val = values[:length]
+    if np.std(ref) == 0 or np.std(val) == 0:
+        corr = float("nan")
+    else:
+        corr = float(np.corrcoef(ref, val)[0, 1])
+    return {"corr": corr, "max_abs": float(np.max(np.abs(ref - val)))}
+
+
+def benchmark(
+    video_path: str,
+    fps: int,
+    short_sides: List[int],
+) -> List[Dict]:
+    # Short side 0 decodes at source resolution and serves as the reference.
+    reference = _run(video_path, fps, 0)
+    rows = [{"short_side": "native", **reference}]
+    for short_side in short_sides:
+        run = _run(video_path, fps, short_side)
+        run["fidelity"] = {
+            name: _fidelity(reference["signals"][name], values)
+            for name, values in run["signals"].items()
+        }
+        rows.append({"short_side": short_side, **run})
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark motion features at several analysis resolutions."
+    )
+    parser.add_argument(
+        "--video",
+        default=None,
+        help="Video to benchmark (default: synthetic 1080p clip).",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=30.0,
+        help="Length in seconds of the synthetic clip.",
+    )
+    parser.add_argument("--fps", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        video_path: Optional[str] = args.video
+        if video_path is None:
+            synthetic = Path(temp_dir) / "synthetic_1080p.mp4"
+            _make_synthetic_video(synthetic, args.duration)
+            video_path = str(synthetic)
+
+        rows = benchmark(video_path, args.fps, SHORT_SIDES)
+
+    print(
+        f"{'short_side':>10} {'frames':>7} {'wall_s':>8} {'ms/frame':>9} "
+        f"{'motion r':>9} {'inter r':>8} {'entropy r':>9} {'max|d|':>7}"
+    )
+    for row in rows:
+        ms_per_frame = 1000.0 * row["elapsed_s"] / max(row["frames"], 1)
+        fidelity = row.get("fidelity")
+        if fidelity is None:
+            scores = f"{'-':>9} {'-':>8} {'-':>9} {'-':>7}"
+        else:
+            max_abs = max(f["max_abs"] for f in fidelity.values())
+            scores = (
+                f"{fidelity['motion']['corr']:>9.4f} "
+                f"{fidelity['interaction']['corr']:>8.4f} "
+                f"{fidelity['entropy']['corr']:>9.4f} "
+                f"{max_abs:>7.3f}"
+            )
+        print(
+            f"{str(row['short_side']):>10} {row['frames']:>7} "
+            f"{row['elapsed_s']:>8.2f} {ms_per_frame:>9.2f} {scores}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,146 @@
+import argparse
+import os
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+import boto3
+from botocore.config import Config
+
+from app.services.s3_clients import MB, get_s3_client, transfer_config
+
+BUCKET = "videos"
+KEY = "uploads/bench.mp4"
+
+
+def _make_handler(payload: bytes, latency_s: float, bytes_per_s: float):
+    """
+    A minimal S3 stand-in serving one object (HEAD and ranged GET). Each
+    request pays `latency_s` and each connection is capped at
+    `bytes_per_s`, which is what makes parallel ranged GETs pay off
+    against a real bucket.
+    """
+    etag = '"bench"'
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _headers(self, status: int, length: int, extra=None):
+            self.send_response(status)
+            self.send_header("Content-Length", str(length))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", "Thu, 01 Jan 2026 00:00:00 GMT")
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Accept-Ranges", "bytes")
+            for name, value in (extra or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+
+        def do_HEAD(self):
+            time.sleep(latency_s)
+            self._headers(200, len(payload))
+
+        def do_GET(self):
+            time.sleep(latency_s)
+            start, end = 0, len(payload) - 1
+            match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if match:
+                start = int(match.group(1))
+                if match.group(2):
+                    end = min(int(match.group(2)), end)
+                self._headers(
+                    206,
+                    end - start + 1,
+                    {"Content-Range": f"bytes {start}-{end}/{len(payload)}"},
+                )
+            else:
+                self._headers(200, len(payload))
+            block = 256 * 1024
+            for offset in range(start, end + 1, block):
+                chunk = payload[offset:min(offset + block, end + 1)]
+                self.wfile.write(chunk)
+                time.sleep(len(chunk) / bytes_per_s)
+
+    return Handler
+
+
+def _start_server(payload: bytes, latency_s: float, bytes_per_s: float) -> Tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), _make_handler(payload, latency_s, bytes_per_s)
+    )
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _fresh_client(endpoint: str):
+    """How the stores used to get a client: a new one on every call."""
+    return boto3.client(
+        "s3",
+        endpoint_url=endpoint,
+        aws_access_key_id="bench",
+        aws_secret_access_key="bench",
+        region_name="auto",
+        config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Download throughput from a local S3 stand-in vs. transfer concurrency."
+    )
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--chunk-mb", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--per-connection-mbps", type=float, default=200.0,
+                        help="bandwidth cap per connection, megabytes per second")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--client-calls", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = os.urandom(args.size_mb * MB)
+    server, endpoint = _start_server(
+        payload, args.latency_ms / 1000.0, args.per_connection_mbps * MB
+    )
+
+    start = time.perf_counter()
+    for _ in range(args.client_calls):
+        _fresh_client(endpoint)
+    fresh_ms = (time.perf_counter() - start) * 1000.0 / args.client_calls
+    get_s3_client(endpoint, "bench", "bench", region_name="auto")
+    start = time.perf_counter()
+    for _ in range(args.client_calls):
+        get_s3_client(endpoint, "bench", "bench", region_name="auto")
+    cached_ms = (time.perf_counter() - start) * 1000.0 / args.client_calls
+    print(f"client per call: new {fresh_ms:.2f} ms, cached {cached_ms:.4f} ms")
+
+    client = _fresh_client(endpoint)
+    print(f"{args.size_mb} MiB object, {args.chunk_mb} MiB chunks, "
+          f"{args.latency_ms:.0f} ms latency, {args.per_connection_mbps:.0f} MB/s per connection")
+    print(f"{'concurrency':>11}  {'seconds':>8}  {'MB/s':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        destination = os.path.join(tmp, "bench.mp4")
+        for concurrency in args.concurrency:
+            config = transfer_config(
+                max_concurrency=concurrency,
+                chunk_bytes=args.chunk_mb * MB,
+                threshold_bytes=args.chunk_mb * MB,
+            )
+            start = time.perf_counter()
+            client.download_file(BUCKET, KEY, destination, Config=config)
+            elapsed = time.perf_counter() - start
+            assert os.path.getsize(destination) == len(payload)
+            print(f"{concurrency:>11}  {elapsed:>8.2f}  {args.size_mb / elapsed:>8.1f}")
+
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
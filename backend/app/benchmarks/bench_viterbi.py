@@ -0,0 +1,102 @@
+import argparse
+import time
+from typing import List
+
+import numpy as np
+
+from app.ml.sequence.viterbi import (
+    build_transition_penalties,
+    viterbi_decode,
+    viterbi_decode_batch,
+)
+
+
+PHASES = ["Explore", "Pursue", "Execute", "Outcome"]
+FRAME_COUNTS = [10**3, 10**4, 10**5, 10**6]
+
+
+def _loop_viterbi(log_probs: np.ndarray, phases: List[str]) -> List[str]:
+    """The original triple-loop decoder."""
+    penalties = build_transition_penalties(phases)
+    num_steps, num_states = log_probs.shape
+    dp = np.full((num_steps, num_states), -np.inf, dtype=np.float64)
+    back = np.zeros((num_steps, num_states), dtype=np.int32)
+    dp[0, :] = log_probs[0, :]
+    for t in range(1, num_steps):
+        for curr in range(num_states):
+            best_score = -np.inf
+            best_prev = 0
+            for prev in range(num_states):
+                score = dp[t - 1, prev] - penalties[(phases[prev], phases[curr])]
+                if score > best_score:
+                    best_score = score
+                    best_prev = prev
+            dp[t, curr] = log_probs[t, curr] + best_score
+            back[t, curr] = best_prev
+    state = int(np.argmax(dp[-1]))
+    seq = [state]
+    for t in range(num_steps - 1, 0, -1):
+        state = int(back[t, state])
+        seq.append(state)
+    seq.reverse()
+    return [phases[idx] for idx in seq]
+
+
+def _synthetic_log_probs(rng: np.random.Generator, steps: int) -> np.ndarray:
+    probs = rng.dirichlet(np.ones(len(PHASES)) * 0.5, size=steps)
+    return np.log(np.clip(probs, 1e-9, 1.0))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare the loop Viterbi decoder with the vectorised one."
+    )
+    parser.add_argument(
+        "--max-loop-frames",
+        type=int,
+        default=10**5,
+        help="Skip the slow loop reference above this many frames.",
+    )
+    parser.add_argument("--batch", type=int, default=16)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(
+        f"{'frames':>9} {'loop s':>9} {'vector s':>9} {'speedup':>8} "
+        f"{'batch s/seq':>12}"
+    )
+    for frames in FRAME_COUNTS:
+        log_probs = _synthetic_log_probs(rng, frames)
+
+        start = time.perf_counter()
+        decoded = viterbi_decode(log_probs, PHASES)
+        vector_s = time.perf_counter() - start
+
+        loop_cell = f"{'-':>9}"
+        speedup_cell = f"{'-':>8}"
+        if frames <= args.max_loop_frames:
+            start = time.perf_counter()
+            reference = _loop_viterbi(log_probs, PHASES)
+            loop_s = time.perf_counter() - start
+            if decoded != reference:
+                raise AssertionError("Vectorised decoder diverged from the loop.")
+            loop_cell = f"{loop_s:>9.3f}"
+            speedup_cell = f"{loop_s / vector_s:>7.1f}x"
+
+        batch_steps = max(frames // args.batch, 1)
+        batch = np.stack([
+            _synthetic_log_probs(rng, batch_steps) for _ in range(args.batch)
+        ])
+        start = time.perf_counter()
+        viterbi_decode_batch(batch, [batch_steps] * args.batch, PHASES)
+        batch_s = (time.perf_counter() - start) / args.batch
+
+        print(
+            f"{frames:>9} {loop_cell} {vector_s:>9.3f} {speedup_cell} "
+            f"{batch_s:>12.4f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,21 @@
+import os
+
+# Everything here changes what an analysis produces, so workers include it
+# in the settings fingerprint behind result cache keys (see
+# `_analysis_fingerprint` in app/workers/tasks.py). This module is imported
+# by the API and must stay free of numpy/OpenCV.
+
+# Frames are sampled at this rate for motion features and segmentation.
+ANALYSIS_FPS = 15
+
+# Motion features are computed on frames downscaled so that their short side
+# is at most this many pixels. 0 keeps the source resolution.
+ANALYSIS_SHORT_SIDE = int(os.getenv("MOTION_ANALYSIS_SHORT_SIDE", "360"))
+
+# Audio is decoded to mono PCM at this rate; RMS and flux do not need more.
+AUDIO_SAMPLE_RATE = int(os.getenv("AUDIO_SAMPLE_RATE", "16000"))
+
+
+def intent_granularity() -> str:
+    """Segmentation preset ("coarse", "normal" or "fine"), read per call."""
+    return os.getenv("INTENT_GRANULARITY", "normal").lower()
@@ -1,7 +1,7 @@
-from pydantic import BaseModel
-from typing import Any, Optional, Literal
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional, Literal
 
-JobStatus = Literal["queued", "processing", "done", "error"]
+JobStatus = Literal["uploading", "queued", "processing", "done", "error"]
 
 class JobCreateResponse(BaseModel):
     job_id: str
@@ -12,3 +12,49 @@ class JobStatusResponse(BaseModel):
     progress: Optional[float] = None  # 0.0 -> 1.0
     message: Optional[str] = None
     result: Optional[Any] = None
+
+class JobProgressResponse(BaseModel):
+    job_id: str
+    status: JobStatus
+    progress: Optional[float] = None  # 0.0 -> 1.0
+    message: Optional[str] = None
+    result_ready: bool = False
+
+class UploadInitRequest(BaseModel):
+    filename: str
+    content_type: Optional[str] = None
+    size: Optional[int] = None  # bytes; large files get multipart URLs
+
+class UploadInitResponse(BaseModel):
+    job_id: str
+    key: str
+    expires_in: int
+    # Single PUT: send the file to upload_url with these headers.
+    upload_url: Optional[str] = None
+    headers: Dict[str, str] = {}
+    # Multipart: PUT consecutive part_size slices to part_urls in order and
+    # report each response's ETag to /upload/complete.
+    upload_id: Optional[str] = None
+    part_size: Optional[int] = None
+    part_urls: List[str] = []
+
+class UploadedPart(BaseModel):
+    part_number: int
+    etag: str
+
+class UploadCompleteRequest(BaseModel):
+    job_id: str
+    parts: List[UploadedPart] = []
+
+class ResegmentRequest(BaseModel):
+    # "auto" uses the intent model when one is available.
+    mode: Literal["auto", "model", "heuristic"] = "auto"
+    granularity: Optional[Literal["coarse", "normal", "fine"]] = None
+    penalty_scale: Optional[float] = Field(default=None, gt=0)
+
+class ResegmentResponse(BaseModel):
+    job_id: str
+    summary: Dict[str, Any]
+    metrics: Dict[str, Any]
+    segments: List[Any]
+    transitions: List[Any]
@@ -5,6 +5,8 @@ from typing import Dict, List, Tuple
 
 import numpy as np
 
+from app.services.signals import Signals
+
 
 def _load_json(path: Path) -> Dict:
     with path.open("r", encoding="utf-8") as handle:
@@ -12,7 +14,7 @@ def _load_json(path: Path) -> Dict:
 
 
 def _segments_to_frame_labels(
-    times: List[float],
+    times: np.ndarray,
     segments: List[Dict],
 ) -> List[str]:
     labels: List[str] = []
@@ -30,11 +32,6 @@ def _segments_to_frame_labels(
     return labels
 
 
-def _load_signals(signals_path: Path) -> Dict[str, np.ndarray]:
-    data = np.load(signals_path)
-    return {key: data[key] for key in data.files}
-
-
 def build_dataset(
     dataset_path: Path,
     signals_dir: Path,
@@ -57,37 +54,11 @@ def build_dataset(
         segments = label_data["segments"]
 
         signals_path = signals_dir / f"{clip_id}.npz"
-        signals = _load_signals(signals_path)
-
-        times = signals["t"].astype(float).tolist()
-        labels = _segments_to_frame_labels(times, segments)
-
-        motion = signals["motion"].astype(float)
-        interaction = signals["interaction"].astype(float)
-        entropy = signals["entropy"].astype(float)
-        audio_energy = signals.get("audio_energy", np.zeros_like(motion)).astype(float)
-        audio_flux = signals.get("audio_flux", np.zeros_like(motion)).astype(float)
-
-        min_len = min(
-            len(times),
-            len(motion),
-            len(interaction),
-            len(entropy),
-            len(audio_energy),
-            len(audio_flux),
-            len(labels),
-        )
+        signals, _ = Signals.load_npz(signals_path)
 
-        features = np.stack(
-            [
-                motion[:min_len],
-                interaction[:min_len],
-                entropy[:min_len],
-                audio_energy[:min_len],
-                audio_flux[:min_len],
-            ],
-            axis=1,
-        )
+        labels = _segments_to_frame_labels(signals.t, segments)
+        min_len = min(len(signals), len(labels))
+        features = signals.feature_matrix()[:min_len]
 
         label_indices = np.array(
             [phase_to_index[label] for label in labels[:min_len]],
@@ -96,7 +67,7 @@ def build_dataset(
 
         X_rows.append(features)
         y_rows.append(label_indices)
-        t_rows.append(np.array(times[:min_len], dtype=np.float32))
+        t_rows.append(signals.t[:min_len].astype(np.float32))
         clip_rows.append(
             np.array([clip_id] * min_len, dtype="<U16")
         )
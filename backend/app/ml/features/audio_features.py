@@ -1,58 +1,164 @@
-from typing import List, Tuple
+import subprocess
+from typing import Iterator, Tuple
 
 import numpy as np
 
-try:
-    import librosa
-except ImportError as exc:  # pragma: no cover - dependency handled at runtime
-    raise ImportError(
-        "librosa is required for audio feature extraction. "
-        "Install it via requirements.txt."
-    ) from exc
+from app.core.analysis_settings import AUDIO_SAMPLE_RATE
+from app.services.video_utils import TruncatedStreamError, ffmpeg_input_args
+
+# Number of analysis frames computed per block of decoded samples.
+AUDIO_BLOCK_FRAMES = 256
+
+# Spectral flux uses a window of this many seconds: the 2048-point STFT
+# the model's features were computed with at 44.1 kHz, kept at the same
+# duration whatever rate the audio is decoded at.
+FLUX_WINDOW_S = 2048 / 44100.0
+
+
+def iter_pcm_blocks(
+    audio_path: str,
+    sample_rate: int,
+    block_samples: int,
+) -> Iterator[np.ndarray]:
+    """
+    Decode the audio track with ffmpeg to mono float32 PCM at `sample_rate`
+    and yield it in blocks of `block_samples` (the last block may be short).
+    """
+    cmd = ["ffmpeg", "-nostdin"] + ffmpeg_input_args(audio_path) + [
+        "-vn",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-f", "f32le",
+        "pipe:1",
+    ]
+    block_bytes = block_samples * 4
+
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    samples_read = 0
+    reached_end = False
+    try:
+        while True:
+            raw = proc.stdout.read(block_bytes)
+            usable = len(raw) - len(raw) % 4
+            if usable <= 0:
+                break
+            block = np.frombuffer(raw[:usable], dtype=np.float32)
+            samples_read += block.size
+            yield block
+        reached_end = True
+    finally:
+        # Only a consumer that stops early gets here with ffmpeg running.
+        if not reached_end and proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        returncode = proc.wait()
+
+    # A non-zero exit without output usually means there is no audio
+    # track; after some output it means the audio was cut short.
+    if returncode != 0:
+        error = TruncatedStreamError if samples_read else subprocess.CalledProcessError
+        raise error(returncode, cmd)
+
+
+def _frame_features(
+    frames: np.ndarray,
+    window: np.ndarray,
+    prev_magnitude: np.ndarray | None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    RMS energy over each of a batch of (n, frame_length) frames, and
+    spectral flux over the `window`-sized centre of each frame.
+    Returns (rms, flux, last_magnitude).
+    """
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    offset = (frames.shape[1] - window.size) // 2
+    centre = frames[:, offset:offset + window.size]
+    magnitude = np.abs(np.fft.rfft(centre * window, axis=1))
+    if prev_magnitude is None:
+        stacked = magnitude
+        leading = [0.0]
+    else:
+        stacked = np.vstack([prev_magnitude[None, :], magnitude])
+        leading = []
+    flux = np.sum(np.maximum(0.0, np.diff(stacked, axis=0)), axis=1)
+    flux = np.concatenate((leading, flux))
+    return rms, flux, magnitude[-1]
 
 
 def compute_audio_features(
     audio_path: str,
     fps: float,
-) -> Tuple[List[float], List[float], List[float]]:
+    sample_rate: int | None = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     Compute audio energy (RMS) and spectral flux aligned to a target fps.
 
+    The audio is streamed from ffmpeg at a low sample rate and analysed
+    block by block, so memory stays bounded regardless of clip length.
+    Frames are centred on multiples of the hop (zero-padded at both ends),
+    one per 1/fps seconds; the hop is a whole number of samples, so times
+    are hop multiples rather than exact multiples of 1/fps and callers
+    align them to their own timeline.
+
     Returns:
-        times: timestamps in seconds
-        energy: normalized RMS energy per frame
-        flux: normalized spectral flux per frame
+        times: timestamps in seconds (float64)
+        energy: normalized RMS energy per frame (float32)
+        flux: normalized spectral flux per frame (float32)
     """
+    empty = np.empty(0, dtype=np.float32)
     if fps <= 0:
-        return [], [], []
-
-    y, sr = librosa.load(audio_path, sr=None, mono=True)
-    if y.size == 0:
-        return [], [], []
+        return np.empty(0), empty, empty.copy()
 
+    sr = sample_rate or AUDIO_SAMPLE_RATE
     hop_length = max(1, int(sr / fps))
-    frame_length = max(2048, hop_length * 2)
-
-    rms = librosa.feature.rms(
-        y=y,
-        frame_length=frame_length,
-        hop_length=hop_length,
-    )[0]
-
-    stft = librosa.stft(
-        y,
-        n_fft=2048,
-        hop_length=hop_length,
-        center=True,
-    )
-    magnitude = np.abs(stft)
-    flux = np.sum(np.maximum(0.0, np.diff(magnitude, axis=1)), axis=0)
-    flux = np.concatenate(([0.0], flux))
+    flux_length = max(2, int(round(FLUX_WINDOW_S * sr)))
+    frame_length = max(flux_length, hop_length * 2)
+    half = frame_length // 2
+    window = np.hanning(flux_length + 1)[:-1].astype(np.float32)
+
+    rms_parts = []
+    flux_parts = []
+    prev_magnitude = None
+    total_samples = 0
+
+    # `buffer` always starts at the first sample of the next frame.
+    buffer = np.zeros(half, dtype=np.float32)
+
+    def drain(buffer: np.ndarray) -> np.ndarray:
+        nonlocal prev_magnitude
+        count = (buffer.size - frame_length) // hop_length + 1
+        if count <= 0:
+            return buffer
+        frames = np.lib.stride_tricks.sliding_window_view(
+            buffer, frame_length
+        )[::hop_length][:count]
+        rms, flux, prev_magnitude = _frame_features(
+            frames, window, prev_magnitude
+        )
+        rms_parts.append(rms)
+        flux_parts.append(flux)
+        return buffer[count * hop_length:]
+
+    block_samples = hop_length * AUDIO_BLOCK_FRAMES
+    for block in iter_pcm_blocks(audio_path, sr, block_samples):
+        total_samples += block.size
+        buffer = drain(np.concatenate((buffer, block)))
+
+    if total_samples == 0:
+        return np.empty(0), empty, empty.copy()
 
-    times = (np.arange(len(rms)) / float(fps)).tolist()
+    # Trailing padding: one frame per hop over the whole signal.
+    expected = 1 + total_samples // hop_length
+    buffer = np.concatenate((buffer, np.zeros(half, dtype=np.float32)))
+    drain(buffer)
 
-    energy = rms.astype(float)
-    flux = flux.astype(float)
+    energy = np.concatenate(rms_parts)[:expected]
+    flux = np.concatenate(flux_parts)[:expected]
+    times = np.arange(energy.size) * (hop_length / float(sr))
 
     if energy.size > 0:
         max_energy = float(np.max(energy))
@@ -64,4 +170,4 @@ def compute_audio_features(
         if max_flux > 0:
             flux = flux / max_flux
 
-    return times, energy.tolist(), flux.tolist()
+    return times, energy.astype(np.float32), flux.astype(np.float32)
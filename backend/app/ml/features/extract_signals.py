@@ -1,13 +1,11 @@
 import argparse
 import json
-import tempfile
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict
 
-import numpy as np
-
-from app.services.motion_utils import compute_motion_signal
-from app.services.video_utils import extract_frames, get_video_duration
+from app.services.motion_utils import MotionAccumulator
+from app.services.signals import Signals, align_to
+from app.services.video_utils import get_video_duration, iter_gray_frames
 from app.ml.features.audio_features import compute_audio_features
 
 
@@ -16,38 +14,14 @@ def _load_json(path: Path) -> Dict:
         return json.load(handle)
 
 
-def _interp_to_times(
-    target_times: List[float],
-    source_times: List[float],
-    source_values: List[float],
-) -> List[float]:
-    if not source_times or not source_values:
-        return [0.0 for _ in target_times]
-
-    return np.interp(
-        np.array(target_times, dtype=float),
-        np.array(source_times, dtype=float),
-        np.array(source_values, dtype=float),
-        left=0.0,
-        right=0.0,
-    ).astype(float).tolist()
-
-
 def extract_signals_for_clip(
     video_path: Path,
     fps: int,
-) -> Dict[str, List[float]]:
-    with tempfile.TemporaryDirectory() as temp_dir:
-        frames_dir = Path(temp_dir) / "frames"
-        extract_frames(
-            video_path=str(video_path),
-            output_dir=str(frames_dir),
-            fps=fps,
-        )
-        motion_t, motion, interaction, entropy = compute_motion_signal(
-            str(frames_dir),
-            fps_used=float(fps),
-        )
+) -> Signals:
+    accumulator = MotionAccumulator(fps_used=float(fps))
+    for gray in iter_gray_frames(str(video_path), fps=fps):
+        accumulator.add(gray)
+    signals = accumulator.to_signals()
 
     # Audio features aligned to motion times.
     try:
@@ -58,17 +32,10 @@ def extract_signals_for_clip(
     except Exception:
         audio_t, audio_energy, audio_flux = [], [], []
 
-    audio_energy = _interp_to_times(motion_t, audio_t, audio_energy)
-    audio_flux = _interp_to_times(motion_t, audio_t, audio_flux)
-
-    return {
-        "t": motion_t,
-        "motion": motion,
-        "interaction": interaction,
-        "entropy": entropy,
-        "audio_energy": audio_energy,
-        "audio_flux": audio_flux,
-    }
+    return signals.with_channels(
+        audio_energy=align_to(signals.t, audio_t, audio_energy),
+        audio_flux=align_to(signals.t, audio_t, audio_flux),
+    )
 
 
 def main() -> int:
@@ -117,14 +84,8 @@ def main() -> int:
         duration_s = get_video_duration(str(media_path)) or 0.0
 
         output_path = output_dir / f"{clip_id}.npz"
-        np.savez_compressed(
+        signals.save_npz(
             output_path,
-            t=np.array(signals["t"], dtype=np.float32),
-            motion=np.array(signals["motion"], dtype=np.float32),
-            interaction=np.array(signals["interaction"], dtype=np.float32),
-            entropy=np.array(signals["entropy"], dtype=np.float32),
-            audio_energy=np.array(signals["audio_energy"], dtype=np.float32),
-            audio_flux=np.array(signals["audio_flux"], dtype=np.float32),
             fps_used=float(args.fps),
             duration_s=float(duration_s),
         )
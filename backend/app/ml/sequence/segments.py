@@ -0,0 +1,99 @@
+from typing import Callable, Dict, List, Optional
+
+Segment = Dict[str, float | str]
+
+# Picks where a short segment goes: (seg, prev, next) -> prev, next or None.
+TargetRule = Callable[[Segment, Optional[Segment], Optional[Segment]], Optional[Segment]]
+# Called as (target, absorbed) after a merge or flicker collapse.
+MergeHook = Callable[[Segment, Segment], None]
+
+
+def previous_then_next(
+    seg: Segment,
+    prev: Optional[Segment],
+    next_seg: Optional[Segment],
+) -> Optional[Segment]:
+    """Default rule: fold into the previous segment, or the next at the start."""
+    return prev if prev is not None else next_seg
+
+
+def outcome_avoids_execute(
+    seg: Segment,
+    prev: Optional[Segment],
+    next_seg: Optional[Segment],
+) -> Optional[Segment]:
+    """
+    Like `previous_then_next`, but a short Outcome prefers the next segment,
+    then the previous one, as long as that neighbour is not Execute.
+    """
+    if seg["phase"] == "Outcome":
+        if next_seg is not None and next_seg["phase"] != "Execute":
+            return next_seg
+        if prev is not None and prev["phase"] != "Execute":
+            return prev
+    return previous_then_next(seg, prev, next_seg)
+
+
+def merge_short_segments(
+    segments: List[Segment],
+    min_durations: Dict[str, float],
+    target_rule: TargetRule = previous_then_next,
+    on_merge: Optional[MergeHook] = None,
+) -> List[Segment]:
+    """
+    Fold every segment shorter than its phase minimum into a neighbour.
+
+    Segments are scanned left to right; a short one is absorbed by the
+    neighbour `target_rule` picks, which widens to cover it. Merging only
+    ever grows segments, so everything already kept stays long enough and
+    one pass over a stack of kept segments reaches the fixed point: O(n).
+    Target segments are updated in place.
+    """
+    kept: List[Segment] = []
+    for idx, seg in enumerate(segments):
+        duration = float(seg["end"]) - float(seg["start"])
+        min_required = min_durations.get(str(seg["phase"]), 0.0)
+        if duration + 1e-6 < min_required:
+            prev = kept[-1] if kept else None
+            next_seg = segments[idx + 1] if idx + 1 < len(segments) else None
+            target = target_rule(seg, prev, next_seg)
+            if target is not None:
+                target["start"] = min(float(target["start"]), float(seg["start"]))
+                target["end"] = max(float(target["end"]), float(seg["end"]))
+                if on_merge is not None:
+                    on_merge(target, seg)
+                continue
+        kept.append(seg)
+    return kept
+
+
+def collapse_flicker(
+    segments: List[Segment],
+    max_duration: float,
+    on_collapse: Optional[MergeHook] = None,
+) -> List[Segment]:
+    """
+    Remove A -> B -> A patterns whose middle segment is shorter than
+    `max_duration`; the first A is extended over B and the second A.
+
+    A collapse can expose a new pattern only around the extended segment,
+    so checking each incoming segment against the top of the kept stack
+    reaches the same fixed point as rescanning: O(n).
+    """
+    kept: List[Segment] = []
+    for seg in segments:
+        if len(kept) >= 2:
+            prev_seg = kept[-2]
+            middle = kept[-1]
+            if (
+                prev_seg["phase"] == seg["phase"]
+                and middle["phase"] != seg["phase"]
+                and float(middle["end"]) - float(middle["start"]) < max_duration
+            ):
+                kept.pop()
+                prev_seg["end"] = seg["end"]
+                if on_collapse is not None:
+                    on_collapse(prev_seg, middle)
+                continue
+        kept.append(seg)
+    return kept
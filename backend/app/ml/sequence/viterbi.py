@@ -1,7 +1,9 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Sequence, Tuple, Union
 
 import numpy as np
 
+from app.ml.sequence.segments import merge_short_segments
+
 
 def build_transition_penalties(
     phases: List[str],
@@ -30,6 +32,61 @@ def build_transition_penalties(
     return penalty_map
 
 
+def transition_penalty_matrix(
+    phases: List[str],
+    scale: float = 1.0,
+) -> np.ndarray:
+    """(S, S) float64 penalties indexed [prev, curr] in `phases` order."""
+    penalties = build_transition_penalties(phases, scale=scale)
+    return np.array(
+        [[penalties[(prev, curr)] for curr in phases] for prev in phases],
+        dtype=np.float64,
+    )
+
+
+def _backpointer_dtype(num_states: int) -> np.dtype:
+    if num_states <= np.iinfo(np.int8).max:
+        return np.dtype(np.int8)
+    if num_states <= np.iinfo(np.int16).max:
+        return np.dtype(np.int16)
+    return np.dtype(np.int32)
+
+
+def viterbi_decode_indices(
+    log_probs: np.ndarray,
+    penalty_matrix: np.ndarray,
+) -> np.ndarray:
+    """
+    Most likely state index per step for (T, S) `log_probs`, with
+    `penalty_matrix[prev, curr]` subtracted on every transition.
+    Ties go to the lowest previous state index.
+    """
+    scores = np.asarray(log_probs, dtype=np.float64)
+    num_steps, num_states = scores.shape
+    if num_steps == 0:
+        return np.empty(0, dtype=np.intp)
+
+    back = np.zeros((num_steps, num_states), dtype=_backpointer_dtype(num_states))
+    columns = np.arange(num_states)
+    candidates = np.empty((num_states, num_states), dtype=np.float64)
+    best_prev = np.empty(num_states, dtype=np.intp)
+
+    dp = scores[0].copy()
+    for t in range(1, num_steps):
+        np.subtract(dp[:, None], penalty_matrix, out=candidates)
+        np.argmax(candidates, axis=0, out=best_prev)
+        back[t] = best_prev
+        dp = scores[t] + candidates[best_prev, columns]
+
+    path = np.empty(num_steps, dtype=np.intp)
+    state = int(np.argmax(dp))
+    path[-1] = state
+    for t in range(num_steps - 1, 0, -1):
+        state = int(back[t, state])
+        path[t - 1] = state
+    return path
+
+
 def viterbi_decode(
     log_probs: np.ndarray,
     phases: List[str],
@@ -38,43 +95,71 @@ def viterbi_decode(
     if log_probs.size == 0:
         return []
 
-    penalties = build_transition_penalties(phases, scale=penalty_scale)
-    num_steps, num_states = log_probs.shape
+    penalty_matrix = transition_penalty_matrix(phases, scale=penalty_scale)
+    path = viterbi_decode_indices(log_probs, penalty_matrix)
+    return [phases[idx] for idx in path.tolist()]
 
-    dp = np.full((num_steps, num_states), -np.inf, dtype=np.float64)
-    back = np.zeros((num_steps, num_states), dtype=np.int32)
-
-    dp[0, :] = log_probs[0, :]
 
+def viterbi_decode_batch(
+    log_probs: np.ndarray,
+    lengths: Sequence[int],
+    phases: List[str],
+    penalty_scale: float = 1.0,
+) -> List[List[str]]:
+    """
+    Decode a batch of padded sequences at once.
+
+    `log_probs` is (B, T, S); only the first `lengths[b]` steps of row b
+    are used. Each result equals `viterbi_decode` on the unpadded row.
+    """
+    scores = np.asarray(log_probs, dtype=np.float64)
+    batch, num_steps, num_states = scores.shape
+    lengths = np.asarray(lengths, dtype=np.intp)
+    if lengths.shape != (batch,):
+        raise ValueError(f"Expected {batch} lengths, got {lengths.shape}.")
+    if batch == 0 or num_steps == 0:
+        return [[] for _ in range(batch)]
+
+    penalty_matrix = transition_penalty_matrix(phases, scale=penalty_scale)
+    back = np.empty(
+        (num_steps, batch, num_states),
+        dtype=_backpointer_dtype(num_states),
+    )
+    # Past the end of a row the state is carried over unchanged.
+    back[:] = np.arange(num_states)
+    rows = np.arange(batch)[:, None]
+    columns = np.arange(num_states)[None, :]
+
+    dp = scores[:, 0].copy()
     for t in range(1, num_steps):
-        for curr in range(num_states):
-            best_score = -np.inf
-            best_prev = 0
-            curr_phase = phases[curr]
-            for prev in range(num_states):
-                prev_phase = phases[prev]
-                score = dp[t - 1, prev] - penalties[(prev_phase, curr_phase)]
-                if score > best_score:
-                    best_score = score
-                    best_prev = prev
-            dp[t, curr] = log_probs[t, curr] + best_score
-            back[t, curr] = best_prev
-
-    last_state = int(np.argmax(dp[-1]))
-    seq = [last_state]
+        active = lengths > t
+        if not active.any():
+            num_steps = t
+            break
+        candidates = dp[:, :, None] - penalty_matrix
+        best_prev = np.argmax(candidates, axis=1)
+        stepped = scores[:, t] + candidates[rows, best_prev, columns]
+        dp = np.where(active[:, None], stepped, dp)
+        back[t][active] = best_prev[active]
+
+    state = np.argmax(dp, axis=1)
+    paths = np.empty((batch, num_steps), dtype=np.intp)
+    paths[:, -1] = state
     for t in range(num_steps - 1, 0, -1):
-        last_state = int(back[t, last_state])
-        seq.append(last_state)
-    seq.reverse()
+        state = back[t, np.arange(batch), state].astype(np.intp)
+        paths[:, t - 1] = state
 
-    return [phases[idx] for idx in seq]
+    return [
+        [phases[idx] for idx in paths[b, :lengths[b]].tolist()]
+        for b in range(batch)
+    ]
 
 
 def sequence_to_segments(
-    times: List[float],
+    times: Union[Sequence[float], np.ndarray],
     phase_seq: List[str],
 ) -> List[Dict[str, float | str]]:
-    if not times or not phase_seq:
+    if len(times) == 0 or not phase_seq:
         return []
 
     segments: List[Dict[str, float | str]] = []
@@ -95,47 +180,11 @@ def sequence_to_segments(
     return segments
 
 
-def merge_short_segments(
-    segments: List[Dict[str, float | str]],
-    min_durations: Dict[str, float],
-) -> List[Dict[str, float | str]]:
-    if not segments:
-        return []
-
-    changed = True
-    segments = list(segments)
-    while changed:
-        changed = False
-        i = 0
-        while i < len(segments):
-            seg = segments[i]
-            duration = float(seg["end"]) - float(seg["start"])
-            min_required = min_durations.get(str(seg["phase"]), 0.0)
-            if duration + 1e-6 < min_required:
-                target = i - 1 if i > 0 else i + 1
-                if 0 <= target < len(segments):
-                    segments[target]["start"] = min(
-                        float(segments[target]["start"]),
-                        float(seg["start"]),
-                    )
-                    segments[target]["end"] = max(
-                        float(segments[target]["end"]),
-                        float(seg["end"]),
-                    )
-                    segments.pop(i)
-                    changed = True
-                    i = max(i - 1, 0)
-                    continue
-            i += 1
-
-    return segments
-
-
 def segments_to_frame_labels(
-    times: List[float],
+    times: Union[Sequence[float], np.ndarray],
     segments: List[Dict[str, float | str]],
 ) -> List[str]:
-    if not times or not segments:
+    if len(times) == 0 or not segments:
         return []
 
     labels: List[str] = []
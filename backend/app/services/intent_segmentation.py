@@ -1,10 +1,19 @@
-import os
-from typing import Dict, List, Tuple
+from typing import Dict, List, Sequence, Union
 
 import numpy as np
 
+from app.core.analysis_settings import intent_granularity
+from app.ml.sequence.segments import (
+    collapse_flicker,
+    merge_short_segments,
+    outcome_avoids_execute,
+)
+from app.services.rolling import rolling_mean as _rolling_mean
 
-def _compute_clip_thresholds(motion: List[float]) -> Dict[str, float]:
+ArrayLike = Union[Sequence[float], np.ndarray]
+
+
+def _compute_clip_thresholds(motion: ArrayLike) -> Dict[str, float]:
     """
     Returns per-clip thresholds for phase boundaries.
     low: Explore tends to be below this.
@@ -33,121 +42,149 @@ def _compute_clip_thresholds(motion: List[float]) -> Dict[str, float]:
     return {"low": low, "pursue": pursue, "spike": spike}
 
 
-def _emission_score(
-    phase: str,
-    m: float,
-    prev_phase: str,
+_PHASES = ["Explore", "Pursue", "Execute", "Outcome"]
+_EXPLORE, _PURSUE, _EXECUTE, _OUTCOME = range(len(_PHASES))
+
+_TRANSITION_PENALTIES = {
+    ("Explore", "Pursue"): 0.2,
+    ("Pursue", "Execute"): 0.3,
+    ("Execute", "Outcome"): 0.1,
+    ("Outcome", "Explore"): 0.2,
+    ("Explore", "Execute"): 1.2,
+    ("Pursue", "Outcome"): 0.8,
+    ("Outcome", "Pursue"): 1.0,
+    ("Explore", "Outcome"): 3.0,
+    ("Outcome", "Execute"): 2.5,
+    ("Execute", "Explore"): 2.0,
+}
+
+
+def _emission_scores(
+    m: np.ndarray,
+    interaction: np.ndarray,
+    entropy: np.ndarray,
     thr: Dict[str, float],
-    interaction_t: float,
-    entropy_t: float,
     use_multisignal: bool,
-) -> float:
+) -> np.ndarray:
+    """
+    Returns (T, S_prev, S_curr) emission scores in `_PHASES` order.
+    Only Pursue and Outcome depend on the previous phase; the other
+    columns are broadcast across S_prev. Terms are accumulated in a fixed
+    order so every score is bit-identical to the rule-by-rule sum.
+    """
     low = thr["low"]
     pursue = thr["pursue"]
     spike = thr["spike"]
-
-    if phase == "Explore":
-        score = 0.0
-        if m < low:
-            score += 2.0
-        if low <= m < pursue:
-            score += 0.8
-        if m >= spike:
-            score -= 2.0
-        if use_multisignal:
-            if entropy_t >= 0.6:
-                score += 0.8
-            if interaction_t <= 0.25:
-                score += 0.5
-            if interaction_t >= 0.6 and m >= pursue:
-                score -= 0.8
-        return score
-
-    if phase == "Pursue":
-        score = 0.0
-        if pursue <= m < spike:
-            score += 2.0
-        if low <= m < pursue:
-            score += 0.8
-        if m < low:
-            score -= 1.5
-        if m >= spike:
-            score -= 1.0
-        if use_multisignal:
-            if 0.35 <= interaction_t < 0.7:
-                score += 0.8
-            if interaction_t <= 0.25:
-                score -= 0.6
-            if entropy_t >= 0.75:
-                score -= 0.6
-            if prev_phase == "Outcome":
-                score -= 1.0
-        return score
-
-    if phase == "Execute":
-        score = 3.0 if m >= spike else -2.0
-        if use_multisignal:
-            if interaction_t >= 0.6:
-                score += 1.2
-            if interaction_t <= 0.3:
-                score -= 1.5
-            if entropy_t >= 0.8:
-                score -= 1.2
-            if interaction_t <= 0.3 and entropy_t >= 0.4:
-                score -= 2.0
-            if interaction_t <= 0.25 and entropy_t >= 0.7:
-                score -= 2.0
-        return score
-
-    if phase == "Outcome":
-        score = 0.0
-        if prev_phase == "Execute" and m < low:
-            score += 2.5
-        if prev_phase == "Outcome" and m < pursue:
-            score += 1.2
-        if use_multisignal:
-            if m < low and interaction_t <= 0.25:
-                score += 1.0
-            if m < low and entropy_t <= 0.35:
-                score += 0.8
-            if interaction_t >= 0.5:
-                score -= 1.2
-            if entropy_t >= 0.6:
-                score -= 1.2
-        if score == 0.0:
-            score = -2.0
-        return score
-
-    return -2.0
-
-
-def _transition_penalty(prev: str, curr: str, scale: float = 1.0) -> float:
-    if prev == curr:
-        return 0.0
-
-    penalties = {
-        ("Explore", "Pursue"): 0.2,
-        ("Pursue", "Execute"): 0.3,
-        ("Execute", "Outcome"): 0.1,
-        ("Outcome", "Explore"): 0.2,
-        ("Explore", "Execute"): 1.2,
-        ("Pursue", "Outcome"): 0.8,
-        ("Outcome", "Pursue"): 1.0,
-        ("Explore", "Outcome"): 3.0,
-        ("Outcome", "Execute"): 2.5,
-        ("Execute", "Explore"): 2.0,
-    }
-    return penalties.get((prev, curr), 1.5) * scale
+    length = len(m)
+
+    def term(cond: np.ndarray, value: float) -> np.ndarray:
+        return np.where(cond, value, 0.0)
+
+    explore = np.zeros(length)
+    explore += term(m < low, 2.0)
+    explore += term((low <= m) & (m < pursue), 0.8)
+    explore -= term(m >= spike, 2.0)
+    if use_multisignal:
+        explore += term(entropy >= 0.6, 0.8)
+        explore += term(interaction <= 0.25, 0.5)
+        explore -= term((interaction >= 0.6) & (m >= pursue), 0.8)
+
+    pursue_score = np.zeros(length)
+    pursue_score += term((pursue <= m) & (m < spike), 2.0)
+    pursue_score += term((low <= m) & (m < pursue), 0.8)
+    pursue_score -= term(m < low, 1.5)
+    pursue_score -= term(m >= spike, 1.0)
+    if use_multisignal:
+        pursue_score += term((0.35 <= interaction) & (interaction < 0.7), 0.8)
+        pursue_score -= term(interaction <= 0.25, 0.6)
+        pursue_score -= term(entropy >= 0.75, 0.6)
+
+    execute = np.where(m >= spike, 3.0, -2.0)
+    if use_multisignal:
+        execute += term(interaction >= 0.6, 1.2)
+        execute -= term(interaction <= 0.3, 1.5)
+        execute -= term(entropy >= 0.8, 1.2)
+        execute -= term((interaction <= 0.3) & (entropy >= 0.4), 2.0)
+        execute -= term((interaction <= 0.25) & (entropy >= 0.7), 2.0)
+
+    num_states = len(_PHASES)
+    scores = np.empty((length, num_states, num_states))
+    scores[:, :, _EXPLORE] = explore[:, None]
+    scores[:, :, _PURSUE] = pursue_score[:, None]
+    scores[:, :, _EXECUTE] = execute[:, None]
+    if use_multisignal:
+        scores[:, _OUTCOME, _PURSUE] -= 1.0
+
+    outcome = np.zeros((length, num_states))
+    outcome[:, _EXECUTE] += term(m < low, 2.5)
+    outcome[:, _OUTCOME] += term(m < pursue, 1.2)
+    if use_multisignal:
+        outcome += term((m < low) & (interaction <= 0.25), 1.0)[:, None]
+        outcome += term((m < low) & (entropy <= 0.35), 0.8)[:, None]
+        outcome -= term(interaction >= 0.5, 1.2)[:, None]
+        outcome -= term(entropy >= 0.6, 1.2)[:, None]
+    outcome[outcome == 0.0] = -2.0
+    scores[:, :, _OUTCOME] = outcome
+    return scores
+
+
+def _transition_penalty_matrix(scale: float = 1.0) -> np.ndarray:
+    """(S, S) penalties indexed [prev, curr] in `_PHASES` order."""
+    return np.array(
+        [
+            [
+                0.0 if prev == curr
+                else _TRANSITION_PENALTIES.get((prev, curr), 1.5) * scale
+                for curr in _PHASES
+            ]
+            for prev in _PHASES
+        ],
+        dtype=np.float64,
+    )
+
+
+def _decode_phase_indices(
+    emissions: np.ndarray,
+    penalties: np.ndarray,
+) -> np.ndarray:
+    """
+    Most likely phase index per frame for (T, S, S) `emissions`.
+    The first frame scores each phase as its own predecessor; ties go to
+    the lowest phase index.
+    """
+    length, num_states, _ = emissions.shape
+    back = np.zeros((length, num_states), dtype=np.int8)
+    columns = np.arange(num_states)
+    candidates = np.empty((num_states, num_states), dtype=np.float64)
+    best_prev = np.empty(num_states, dtype=np.intp)
+
+    dp = emissions[0].diagonal().copy()
+    for t in range(1, length):
+        np.add(dp[:, None], emissions[t], out=candidates)
+        candidates -= penalties
+        np.argmax(candidates, axis=0, out=best_prev)
+        back[t] = best_prev
+        dp = candidates[best_prev, columns]
+
+    path = np.empty(length, dtype=np.intp)
+    state = int(np.argmax(dp))
+    path[-1] = state
+    for t in range(length - 1, 0, -1):
+        state = int(back[t, state])
+        path[t - 1] = state
+    return path
 
 
 def segment_intent_phases(
-    times: List[float],
-    motion: List[float],
-    interaction: List[float] | None = None,
-    entropy: List[float] | None = None,
+    times: ArrayLike,
+    motion: ArrayLike,
+    interaction: ArrayLike | None = None,
+    entropy: ArrayLike | None = None,
     low_threshold: float = 0.22,
     spike_threshold: float = 0.4,
     min_segment_s: float = 1.0,
+    granularity: str | None = None,
+    penalty_scale: float | None = None,
 ) -> List[Dict]:
     """
     Segment intent phases from smoothed motion signal.
@@ -156,9 +193,13 @@ def segment_intent_phases(
     - Explore: sustained low/moderate motion
     - Execute: sharp motion spike
     - Outcome: motion collapse after execution
+
+    `granularity` defaults to INTENT_GRANULARITY; `penalty_scale`
+    overrides the preset's transition penalty scale.
     """
 
-    granularity = os.getenv("INTENT_GRANULARITY", "normal").lower()
+    if granularity is None:
+        granularity = intent_granularity()
     presets = {
         "coarse": {
             "rolling_window": 7,
@@ -196,64 +237,69 @@ def segment_intent_phases(
     MIN_EXECUTE_S = preset["min_execute_s"]
     MIN_OUTCOME_S = preset["min_outcome_s"]
     FLICKER_THRESHOLD_S = preset["flicker_s"]
-    PENALTY_SCALE = preset["penalty_scale"]
+    PENALTY_SCALE = (
+        preset["penalty_scale"] if penalty_scale is None else penalty_scale
+    )
 
-    if not times or not motion:
+    if len(times) == 0 or len(motion) == 0:
         return []
 
     length = min(len(times), len(motion))
     if length < 4:
         return []
 
-    times = times[:length]
-    motion = motion[:length]
     has_multisignal = interaction is not None or entropy is not None
-    interaction = interaction or [0.0] * length
-    entropy = entropy or [0.0] * length
-    interaction = interaction[:length]
-    entropy = entropy[:length]
-
-    rolling_mean: List[float] = []
-    rolling_interaction: List[float] = []
-    rolling_entropy: List[float] = []
-    for i in range(length):
-        start = max(0, i - ROLLING_WINDOW + 1)
-        window = motion[start:i + 1]
-        interaction_window = interaction[start:i + 1]
-        entropy_window = entropy[start:i + 1]
-        rolling_mean.append(sum(window) / len(window))
-        rolling_interaction.append(
-            sum(interaction_window) / len(interaction_window)
-        )
-        rolling_entropy.append(
-            sum(entropy_window) / len(entropy_window)
-        )
+    if interaction is None or len(interaction) == 0:
+        interaction = np.zeros(length)
+    if entropy is None or len(entropy) == 0:
+        entropy = np.zeros(length)
+    times = np.asarray(times, dtype=np.float64)[:length]
+    motion = np.asarray(motion, dtype=np.float64)[:length]
+    interaction = np.asarray(interaction, dtype=np.float64)[:length]
+    entropy = np.asarray(entropy, dtype=np.float64)[:length]
+
+    rolling_mean, rolling_interaction, rolling_entropy = _rolling_mean(
+        np.stack([motion, interaction, entropy]), ROLLING_WINDOW
+    )
 
     thresholds = _compute_clip_thresholds(rolling_mean)
-    phases = ["Explore", "Pursue", "Execute", "Outcome"]
 
     def append_note(reason: str, note: str) -> str:
         if not reason:
             return note
         return f"{reason} {note}"
 
-    def nearest_index(target_time: float) -> int:
-        if target_time <= times[0]:
-            return 0
-        if target_time >= times[-1]:
-            return length - 1
-        low = 0
-        high = length - 1
-        while low <= high:
-            mid = (low + high) // 2
-            value = times[mid]
-            if value == target_time:
-                return mid
-            if value < target_time:
-                low = mid + 1
-            else:
-                high = mid - 1
-        return max(0, min(low, length - 1))
+    # Prefix sums of the rolling channels, so any frame window's mean costs
+    # two lookups whatever its length.
+    rolling = np.stack([rolling_mean, rolling_interaction, rolling_entropy])
+    rolling_prefix = np.zeros((3, length + 1))
+    np.cumsum(rolling, axis=1, out=rolling_prefix[:, 1:])
+    peak_source = np.append(rolling_mean, -np.inf)
+    stat_cutoffs = np.array([[thresholds["low"]], [0.3], [0.4]])
+
+    def segment_stats(segments_list: List[Dict]) -> np.ndarray:
+        """
+        (4, len(segments_list)) rows of mean motion, peak motion, mean
+        interaction and mean entropy over each segment's frames.
+        """
+        bounds = np.array(
+            [[seg["start"], seg["end"]] for seg in segments_list],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+        # First frame at or after each bound, clamped to the clip.
+        idx = np.clip(np.searchsorted(times, bounds), 0, length - 1)
+        lo = idx.min(axis=1)
+        hi = idx.max(axis=1) + 1
+        means = (rolling_prefix[:, hi] - rolling_prefix[:, lo]) / (hi - lo)
+        # Prefix sums can land an ulp away from a plain sum; redo means that
+        # sit on a rule threshold so the comparisons below cannot flip.
+        for row, i in np.argwhere(np.abs(means - stat_cutoffs) <= 1e-9):
+            window = rolling[row, lo[i]:hi[i]]
+            means[row, i] = sum(window) / len(window)
+        peak = np.maximum.reduceat(
+            peak_source, np.column_stack([lo, hi]).ravel()
+        )[::2]
+        return np.vstack([means[0], peak, means[1], means[2]])
 
     def min_required_for(phase: str) -> float:
         if phase == "Explore":
@@ -265,51 +311,17 @@ def segment_intent_phases(
         return MIN_OUTCOME_S
 
     # Dynamic programming / Viterbi over the smoothed signal.
-    dp_scores: List[Dict[str, float]] = []
-    back_ptrs: List[Dict[str, str]] = []
-
-    m0 = rolling_mean[0]
-    i0 = rolling_interaction[0]
-    e0 = rolling_entropy[0]
-    dp_scores.append({
-        phase: _emission_score(
-            phase, m0, phase, thresholds, i0, e0, has_multisignal
-        )
-        for phase in phases
-    })
-    back_ptrs.append({phase: phase for phase in phases})
-
-    for i in range(1, length):
-        m = rolling_mean[i]
-        i_t = rolling_interaction[i]
-        e_t = rolling_entropy[i]
-        scores: Dict[str, float] = {}
-        back: Dict[str, str] = {}
-        for curr in phases:
-            best_score = float("-inf")
-            best_prev = phases[0]
-            for prev in phases:
-                score = (
-                    dp_scores[i - 1][prev]
-                    + _emission_score(
-                        curr, m, prev, thresholds, i_t, e_t, has_multisignal
-                    )
-                    - _transition_penalty(prev, curr, PENALTY_SCALE)
-                )
-                if score > best_score:
-                    best_score = score
-                    best_prev = prev
-            scores[curr] = best_score
-            back[curr] = best_prev
-        dp_scores.append(scores)
-        back_ptrs.append(back)
-
-    last_phase = max(dp_scores[-1], key=dp_scores[-1].get)
-    phase_seq = [last_phase]
-    for i in range(length - 1, 0, -1):
-        last_phase = back_ptrs[i][last_phase]
-        phase_seq.append(last_phase)
-    phase_seq.reverse()
+    emissions = _emission_scores(
+        rolling_mean,
+        rolling_interaction,
+        rolling_entropy,
+        thresholds,
+        has_multisignal,
+    )
+    path = _decode_phase_indices(
+        emissions, _transition_penalty_matrix(PENALTY_SCALE)
+    )
+    phase_seq = [_PHASES[idx] for idx in path.tolist()]
 
     # Convert sequence to segments.
     segments: List[Dict] = []
@@ -317,60 +329,32 @@ def segment_intent_phases(
     for i in range(1, length):
         if phase_seq[i] != phase_seq[start_idx]:
             segments.append({
-                "start": round(times[start_idx], 2),
-                "end": round(times[i - 1], 2),
+                "start": round(float(times[start_idx]), 2),
+                "end": round(float(times[i - 1]), 2),
                 "phase": phase_seq[start_idx],
                 "why": "",
             })
             start_idx = i
     segments.append({
-        "start": round(times[start_idx], 2),
-        "end": round(times[-1], 2),
+        "start": round(float(times[start_idx]), 2),
+        "end": round(float(times[-1]), 2),
         "phase": phase_seq[start_idx],
         "why": "",
     })
 
-    # Merge short segments until stable.
-    def _merge_short_segments(
-        segments_list: List[Dict],
-        mins: Dict[str, float],
-    ) -> List[Dict]:
-        changed = True
-        while changed:
-            changed = False
-            i = 0
-            while i < len(segments_list):
-                seg = segments_list[i]
-                duration = seg["end"] - seg["start"]
-                min_required = mins.get(seg["phase"], 0.0)
-                if duration + 1e-6 < min_required:
-                    note = f"Merged short {seg['phase']} into "
-                    if seg["phase"] == "Outcome":
-                        if i + 1 < len(segments_list) and segments_list[i + 1]["phase"] != "Execute":
-                            target = i + 1
-                        elif i > 0 and segments_list[i - 1]["phase"] != "Execute":
-                            target = i - 1
-                        else:
-                            target = i - 1 if i > 0 else i + 1
-                    else:
-                        target = i - 1 if i > 0 else i + 1
-                    if 0 <= target < len(segments_list):
-                        segments_list[target]["start"] = min(
-                            segments_list[target]["start"], seg["start"]
-                        )
-                        segments_list[target]["end"] = max(
-                            segments_list[target]["end"], seg["end"]
-                        )
-                        segments_list[target]["why"] = append_note(
-                            segments_list[target]["why"],
-                            note + segments_list[target]["phase"] + "."
-                        )
-                        segments_list.pop(i)
-                        changed = True
-                        i = max(i - 1, 0)
-                        continue
-                i += 1
-        return segments_list
+    # Merge short segments, then remove A -> B -> A flicker patterns
+    # (short middle segment).
+    def note_merge(target: Dict, seg: Dict) -> None:
+        target["why"] = append_note(
+            target["why"],
+            f"Merged short {seg['phase']} into {target['phase']}."
+        )
+
+    def note_flicker(target: Dict, seg: Dict) -> None:
+        target["why"] = append_note(
+            target["why"],
+            f"Collapsed short {seg['phase']} flicker."
+        )
 
     mins = {
         "Explore": MIN_EXPLORE_S,
@@ -378,30 +362,17 @@ def segment_intent_phases(
         "Execute": MIN_EXECUTE_S,
         "Outcome": MIN_OUTCOME_S,
     }
-    segments = _merge_short_segments(segments, mins)
-
-    # Remove A -> B -> A flicker patterns (short middle segment), repeat until stable.
-    flicker_changed = True
-    while flicker_changed:
-        flicker_changed = False
-        i = 1
-        while i < len(segments) - 1:
-            prev_seg = segments[i - 1]
-            seg = segments[i]
-            next_seg = segments[i + 1]
-            if prev_seg["phase"] == next_seg["phase"] and prev_seg["phase"] != seg["phase"]:
-                if (seg["end"] - seg["start"]) < FLICKER_THRESHOLD_S:
-                    prev_seg["end"] = next_seg["end"]
-                    prev_seg["why"] = append_note(
-                        prev_seg["why"],
-                        f"Collapsed short {seg['phase']} flicker."
-                    )
-                    segments.pop(i + 1)
-                    segments.pop(i)
-                    flicker_changed = True
-                    i = max(i - 1, 1)
-                    continue
-            i += 1
+    segments = merge_short_segments(
+        segments,
+        mins,
+        target_rule=outcome_avoids_execute,
+        on_merge=note_merge,
+    )
+    segments = collapse_flicker(
+        segments, FLICKER_THRESHOLD_S, on_collapse=note_flicker
+    )
+
+    avg_motion, _, avg_interaction, avg_entropy = segment_stats(segments)
 
     # Outcome sanity: if no Execute exists, Outcome becomes Explore.
     has_execute = any(seg["phase"] == "Execute" for seg in segments)
@@ -421,14 +392,9 @@ def segment_intent_phases(
                 None,
             )
             if execute_index is not None:
-                for seg in segments[execute_index + 1:]:
-                    start_idx = nearest_index(seg["start"])
-                    end_idx = nearest_index(seg["end"])
-                    if end_idx < start_idx:
-                        start_idx, end_idx = end_idx, start_idx
-                    window = rolling_mean[start_idx:end_idx + 1]
-                    avg = sum(window) / len(window) if window else 0.0
-                    if avg < thresholds["low"]:
+                for i in range(execute_index + 1, len(segments)):
+                    seg = segments[i]
+                    if avg_motion[i] < thresholds["low"]:
                         seg["phase"] = "Outcome"
                         seg["why"] = append_note(
                             seg["why"],
@@ -438,24 +404,10 @@ def segment_intent_phases(
 
     # Demote Execute when motion spikes are diffuse and chaotic.
     if has_multisignal:
-        for seg in segments:
+        for i, seg in enumerate(segments):
             if seg["phase"] != "Execute":
                 continue
-            start_idx = nearest_index(seg["start"])
-            end_idx = nearest_index(seg["end"])
-            if end_idx < start_idx:
-                start_idx, end_idx = end_idx, start_idx
-            interaction_window = rolling_interaction[start_idx:end_idx + 1]
-            entropy_window = rolling_entropy[start_idx:end_idx + 1]
-            avg_interaction = (
-                sum(interaction_window) / len(interaction_window)
-                if interaction_window else 0.0
-            )
-            avg_entropy = (
-                sum(entropy_window) / len(entropy_window)
-                if entropy_window else 0.0
-            )
-            if avg_interaction <= 0.3 and avg_entropy >= 0.4:
+            if avg_interaction[i] <= 0.3 and avg_entropy[i] >= 0.4:
                 seg["phase"] = "Pursue"
                 seg["why"] = append_note(
                     seg["why"],
@@ -466,7 +418,7 @@ def segment_intent_phases(
     if segments:
         if segments[0]["start"] > times[0] + 1e-6:
             segments.insert(0, {
-                "start": round(times[0], 2),
+                "start": round(float(times[0]), 2),
                 "end": segments[0]["start"],
                 "phase": "Explore",
                 "why": "Inserted to cover clip start.",
@@ -479,7 +431,7 @@ def segment_intent_phases(
                     "Start clamped to close gap."
                 )
         if segments[-1]["end"] < times[-1] - 1e-6:
-            segments[-1]["end"] = round(times[-1], 2)
+            segments[-1]["end"] = round(float(times[-1]), 2)
             segments[-1]["why"] = append_note(
                 segments[-1]["why"],
                 "Extended to cover clip end."
@@ -515,14 +467,8 @@ def segment_intent_phases(
             return f"A clear burst of motion (peak {peak_str}) above the clip's spike level."
         return "Movement drops right after a burst, suggesting resolution/cooldown."
 
-    for seg in segments:
-        start_idx = nearest_index(seg["start"])
-        end_idx = nearest_index(seg["end"])
-        if end_idx < start_idx:
-            start_idx, end_idx = end_idx, start_idx
-        window = rolling_mean[start_idx:end_idx + 1]
-        avg = sum(window) / len(window) if window else 0.0
-        peak = max(window) if window else 0.0
+    avg_motion, peak_motion, _, _ = segment_stats(segments)
+    for seg, avg, peak in zip(segments, avg_motion.tolist(), peak_motion.tolist()):
         base_reason = build_reason(seg["phase"], avg, peak)
         if seg["why"]:
             seg["why"] = append_note(base_reason, seg["why"])
@@ -0,0 +1,113 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+import redis.asyncio as aioredis
+
+from app.services import job_store
+
+TERMINAL_STATUSES = ("done", "error")
+
+# A comment line is sent when nothing happened for this long, so proxies
+# keep the connection open and dead clients are noticed.
+KEEPALIVE_S = 15.0
+# Without Redis there is nothing to subscribe to; the stream re-reads the
+# status file this often instead.
+POLL_INTERVAL_S = 1.0
+
+_STATUS_RANK = {"uploading": 0, "queued": 0, "processing": 1, "done": 2, "error": 2}
+
+_async_pool: Optional[aioredis.ConnectionPool] = None
+
+
+def get_async_redis() -> Optional[aioredis.Redis]:
+    global _async_pool
+    if not job_store.REDIS_URL:
+        return None
+    if _async_pool is None:
+        _async_pool = aioredis.ConnectionPool.from_url(
+            job_store.REDIS_URL, decode_responses=True
+        )
+    return aioredis.Redis(connection_pool=_async_pool)
+
+def format_event(state: Dict[str, Any]) -> str:
+    payload = {
+        "job_id": state.get("job_id"),
+        "status": state.get("status"),
+        "progress": state.get("progress"),
+        "message": state.get("message"),
+        "result_ready": state.get("status") == "done",
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+def _order(state: Dict[str, Any]) -> tuple:
+    return (_STATUS_RANK.get(state.get("status"), 0), state.get("progress") or 0.0)
+
+async def _read_state(job_id: str) -> Optional[Dict[str, Any]]:
+    return await asyncio.to_thread(job_store.read_job_fields, job_id)
+
+async def job_events(
+    job_id: str,
+    client: Optional[aioredis.Redis] = None,
+    keepalive_s: float = KEEPALIVE_S,
+    poll_interval_s: float = POLL_INTERVAL_S,
+) -> AsyncIterator[str]:
+    """
+    Server-Sent Events for one job: the current state first, then every
+    change until the job is done or failed.
+
+    With a Redis client the stream subscribes to the job's channel before
+    reading the current state, so nothing published in between is lost.
+    Events that are older than what was already sent (the snapshot can be
+    newer than messages still queued behind it) are dropped, so clients
+    only ever see status and progress move forward.
+    """
+    if client is None:
+        async for event in _poll_events(job_id, poll_interval_s):
+            yield event
+        return
+
+    pubsub = client.pubsub()
+    await pubsub.subscribe(job_store.job_channel(job_id))
+    try:
+        state = await _read_state(job_id)
+        if state is None:
+            return
+        state.setdefault("job_id", job_id)
+        yield format_event(state)
+
+        loop = asyncio.get_running_loop()
+        last_sent = loop.time()
+        while state.get("status") not in TERMINAL_STATUSES:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=keepalive_s
+            )
+            if message is None:
+                # Also returned for the (ignored) subscribe confirmation.
+                if loop.time() - last_sent >= keepalive_s:
+                    last_sent = loop.time()
+                    yield ": keepalive\n\n"
+                continue
+            update = {**state, **json.loads(message["data"])}
+            if _order(update) < _order(state) or update == state:
+                continue
+            state = update
+            last_sent = loop.time()
+            yield format_event(state)
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
+
+async def _poll_events(job_id: str, poll_interval_s: float) -> AsyncIterator[str]:
+    state = None
+    while True:
+        update = await _read_state(job_id)
+        if update is None:
+            return
+        update.setdefault("job_id", job_id)
+        if update != state:
+            state = update
+            yield format_event(state)
+        if state.get("status") in TERMINAL_STATUSES:
+            return
+        await asyncio.sleep(poll_interval_s)
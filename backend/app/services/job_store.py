@@ -1,6 +1,7 @@
+import hashlib
 import json
 import os
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional
 
 import redis
 from dotenv import load_dotenv
@@ -10,31 +11,216 @@ load_dotenv()
 REDIS_URL = os.getenv("REDIS_URL")
 JOBS_DIR = os.getenv("JOBS_DIR", "./data/jobs")
 
+# Jobs live in a Redis hash per job, one JSON-encoded value per field, so a
+# progress tick rewrites a few short fields and never touches `result`.
+# The result is kept as the JSON text it was written as, together with a
+# `result_etag`, so it can be served without being parsed again. A job
+# answered from the result cache has no result of its own, only a
+# `result_ref` naming the job whose result it shares.
+JOB_KEY_PREFIX = "job:"
+# Before that, a job was one JSON string stored under its bare id. Such a
+# record (e.g. a job queued before an upgrade) is moved into the hash the
+# first time it is read or updated, so nothing needs migrating up front.
+
+# Every write that touches status, progress or message is also published,
+# without the result, on a per-job channel for the SSE endpoint.
+JOB_CHANNEL_PREFIX = "job-events:"
+EVENT_FIELDS = ("status", "progress", "message")
+
+STATUS_FIELDS = ("job_id", "status", "progress", "message", "result_etag")
+
+_pool: Optional[redis.ConnectionPool] = None
+
 
 def _get_redis() -> Optional[redis.Redis]:
+    global _pool
     if not REDIS_URL:
         return None
-    return redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    if _pool is None:
+        # redis-py resets the pool in forked children, so one per process.
+        _pool = redis.ConnectionPool.from_url(REDIS_URL, decode_responses=True)
+    return redis.Redis(connection_pool=_pool)
+
+def get_redis() -> Optional[redis.Redis]:
+    """The shared Redis client, or None when state is kept on disk."""
+    return _get_redis()
+
+def job_key(job_id: str) -> str:
+    return f"{JOB_KEY_PREFIX}{job_id}"
+
+def job_channel(job_id: str) -> str:
+    return f"{JOB_CHANNEL_PREFIX}{job_id}"
 
 def job_path(job_id: str) -> str:
     return os.path.join(JOBS_DIR, f"{job_id}.json")
 
+def result_path(job_id: str) -> str:
+    return os.path.join(JOBS_DIR, f"{job_id}.result.json")
+
+def result_etag(result_json: str) -> str:
+    return '"' + hashlib.sha256(result_json.encode("utf-8")).hexdigest()[:32] + '"'
+
+def _encode(fields: Dict[str, Any]) -> Dict[str, str]:
+    encoded = {name: json.dumps(value) for name, value in fields.items()}
+    if "result" in encoded:
+        encoded["result_etag"] = json.dumps(result_etag(encoded["result"]))
+    return encoded
+
+def _migrate_legacy(client: redis.Redis, job_id: str) -> bool:
+    """
+    Move a legacy string record into the job hash, without overwriting
+    fields already set there. True if there was one.
+    """
+    raw = client.get(job_id)
+    if raw is None:
+        return False
+    pipe = client.pipeline()
+    for name, value in _encode(json.loads(raw)).items():
+        pipe.hsetnx(job_key(job_id), name, value)
+    pipe.delete(job_id)
+    pipe.execute()
+    return True
+
+def _publish_event(pipe, job_id: str, fields: Dict[str, Any]) -> None:
+    event = {name: fields[name] for name in EVENT_FIELDS if name in fields}
+    if event:
+        event["job_id"] = job_id
+        pipe.publish(job_channel(job_id), json.dumps(event))
+
+def _read_file(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+def _write_file(job_id: str, fields: Dict[str, Any], replace: bool) -> None:
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    encoded = _encode(fields)
+    if "result" in encoded:
+        with open(result_path(job_id), "w") as f:
+            f.write(encoded.pop("result"))
+    elif replace and os.path.exists(result_path(job_id)):
+        os.remove(result_path(job_id))
+    record = {} if replace else (_read_file(job_path(job_id)) or {})
+    record.update({name: json.loads(value) for name, value in encoded.items()})
+    with open(job_path(job_id), "w") as f:
+        json.dump(record, f)
+
 def write_job(job_id: str, payload: Dict[str, Any]) -> None:
+    """Replace the whole job record."""
+    client = _get_redis()
+    if client:
+        pipe = client.pipeline()
+        pipe.delete(job_key(job_id), job_id)
+        pipe.hset(job_key(job_id), mapping=_encode(payload))
+        _publish_event(pipe, job_id, payload)
+        pipe.execute()
+        return
+    _write_file(job_id, payload, replace=True)
+
+def update_job(job_id: str, fields: Dict[str, Any]) -> None:
+    """
+    Set some fields of an existing job record, leaving the others (notably
+    `result`) untouched.
+    """
     client = _get_redis()
     if client:
-        client.set(job_id, json.dumps(payload))
+        pipe = client.pipeline(transaction=False)
+        pipe.hset(job_key(job_id), mapping=_encode(fields))
+        pipe.exists(job_id)
+        _publish_event(pipe, job_id, fields)
+        if pipe.execute()[1]:
+            # The fields just written win over the legacy record's.
+            _migrate_legacy(client, job_id)
         return
+    _write_file(job_id, fields, replace=False)
+
+def _marker_path(job_id: str, field: str) -> str:
+    return os.path.join(JOBS_DIR, f"{job_id}.{field}")
+
+def claim_job_field(job_id: str, field: str) -> bool:
+    """
+    Set `field` to true on a job unless it is already set, atomically
+    across processes. True if this call set it, i.e. won the claim.
+    """
+    client = _get_redis()
+    if client:
+        return bool(client.hsetnx(job_key(job_id), field, json.dumps(True)))
     os.makedirs(JOBS_DIR, exist_ok=True)
-    with open(job_path(job_id), "w") as f:
-        json.dump(payload, f)
+    try:
+        os.close(os.open(_marker_path(job_id, field), os.O_CREAT | os.O_EXCL))
+    except FileExistsError:
+        return False
+    return True
+
+def release_job_field(job_id: str, field: str) -> None:
+    """Undo `claim_job_field`, e.g. when the claimed step failed."""
+    client = _get_redis()
+    if client:
+        client.hdel(job_key(job_id), field)
+        return
+    try:
+        os.remove(_marker_path(job_id, field))
+    except FileNotFoundError:
+        pass
 
 def read_job(job_id: str) -> Optional[Dict[str, Any]]:
     client = _get_redis()
     if client:
-        raw = client.get(job_id)
-        return json.loads(raw) if raw else None
-    path = job_path(job_id)
-    if not os.path.exists(path):
+        raw = client.hgetall(job_key(job_id))
+        if not raw and _migrate_legacy(client, job_id):
+            raw = client.hgetall(job_key(job_id))
+        if not raw:
+            return None
+        record = {name: json.loads(value) for name, value in raw.items()}
+    else:
+        record = _read_file(job_path(job_id))
+        if record is None:
+            return None
+        if os.path.exists(result_path(job_id)):
+            record["result"] = _read_file(result_path(job_id))
+    if "result" not in record and record.get("result_ref"):
+        source = read_job(record["result_ref"]) or {}
+        record["result"] = source.get("result")
+    return record
+
+def read_job_fields(
+    job_id: str,
+    fields: Iterable[str] = STATUS_FIELDS,
+) -> Optional[Dict[str, Any]]:
+    """
+    Read only the named fields (by default everything but the result).
+    Fields that were never written are left out.
+    """
+    fields = [name for name in fields if name != "result"]
+    client = _get_redis()
+    if client:
+        values = client.hmget(job_key(job_id), fields)
+        if all(value is None for value in values) and _migrate_legacy(client, job_id):
+            values = client.hmget(job_key(job_id), fields)
+        record = {
+            name: json.loads(value)
+            for name, value in zip(fields, values)
+            if value is not None
+        }
+        return record or None
+    record = _read_file(job_path(job_id))
+    if record is None:
         return None
-    with open(path, "r") as f:
-        return json.load(f)
+    return {name: record[name] for name in fields if name in record}
+
+def read_job_result_json(job_id: str) -> Optional[str]:
+    """The stored result as JSON text, exactly as it was written."""
+    client = _get_redis()
+    if client:
+        result, ref = client.hmget(job_key(job_id), ["result", "result_ref"])
+        if result is None and ref is None and _migrate_legacy(client, job_id):
+            result, ref = client.hmget(job_key(job_id), ["result", "result_ref"])
+        if result is None and ref is not None:
+            return read_job_result_json(json.loads(ref))
+        return result
+    if not os.path.exists(result_path(job_id)):
+        ref = (read_job_fields(job_id, ("result_ref",)) or {}).get("result_ref")
+        return read_job_result_json(ref) if ref else None
+    with open(result_path(job_id), "r") as f:
+        return f.read()
@@ -1,4 +1,5 @@
 import json
+import threading
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
@@ -10,23 +11,20 @@ from app.ml.sequence.viterbi import (
     sequence_to_segments,
     viterbi_decode,
 )
+from app.services.signals import ArrayLike, as_float32
 
 
 @dataclass
 class ModelBundle:
     model: Any
     phases: List[str]
+    # (mtime_ns, size) of the model and metadata files it was loaded from.
+    version: Tuple[int, ...] = ()
 
 
-def _repo_root() -> Path:
-    return Path(__file__).resolve().parents[3]
-
-
-def _default_paths() -> Tuple[Path, Path]:
-    root = _repo_root()
-    model_path = root / "datasets/intent_segmentation_v1/models/intent_lgbm.txt"
-    metadata_path = root / "datasets/intent_segmentation_v1/processed/metadata.json"
-    return model_path, metadata_path
+# One loaded bundle per (model_path, metadata_path) in this process.
+_bundle_cache: Dict[Tuple[str, str], ModelBundle] = {}
+_bundle_cache_lock = threading.Lock()
 
 
 def load_model_bundle(
@@ -51,17 +49,66 @@ def load_model_bundle(
     return ModelBundle(model=model, phases=phases)
 
 
-def load_default_model_bundle() -> Optional[ModelBundle]:
-    model_path, metadata_path = _default_paths()
-    return load_model_bundle(model_path, metadata_path)
+def _file_version(model_path: Path, metadata_path: Path) -> Optional[Tuple[int, ...]]:
+    try:
+        model_stat = model_path.stat()
+        metadata_stat = metadata_path.stat()
+    except OSError:
+        return None
+    return (
+        model_stat.st_mtime_ns,
+        model_stat.st_size,
+        metadata_stat.st_mtime_ns,
+        metadata_stat.st_size,
+    )
+
+
+def get_model_bundle(
+    model_path: Path,
+    metadata_path: Path,
+) -> Optional[ModelBundle]:
+    """
+    Cached `load_model_bundle`: the bundle is parsed once per process and
+    reused until the files on disk change (by mtime or size), at which
+    point the new version is loaded and swapped in. Jobs already holding
+    the previous bundle keep using it. Bundles whose files were removed
+    are dropped from the cache.
+    """
+    key = (str(model_path), str(metadata_path))
+    version = _file_version(model_path, metadata_path)
+    if version is None:
+        return None
+
+    cached = _bundle_cache.get(key)
+    if cached is not None and cached.version == version:
+        return cached
+
+    with _bundle_cache_lock:
+        cached = _bundle_cache.get(key)
+        if cached is not None and cached.version == version:
+            return cached
+        bundle = load_model_bundle(model_path, metadata_path)
+        if bundle is None:
+            _bundle_cache.pop(key, None)
+            return None
+        bundle.version = version
+        # Versions the model store has since deleted will not be asked for
+        # again; don't keep their boosters alive.
+        for stale in [
+            other for other in _bundle_cache
+            if not all(Path(name).exists() for name in other)
+        ]:
+            del _bundle_cache[stale]
+        _bundle_cache[key] = bundle
+        return bundle
 
 
 def align_signal(
-    target_times: List[float],
-    source_times: List[float],
-    source_values: List[float],
+    target_times: ArrayLike,
+    source_times: ArrayLike,
+    source_values: ArrayLike,
 ) -> List[float]:
-    if not source_times or not source_values:
+    if len(source_times) == 0 or len(source_values) == 0:
         return [0.0 for _ in target_times]
 
     return np.interp(
@@ -74,11 +121,11 @@ def align_signal(
 
 
 def build_feature_matrix(
-    motion: List[float],
-    interaction: List[float],
-    entropy: List[float],
-    audio_energy: List[float],
-    audio_flux: List[float],
+    motion: ArrayLike,
+    interaction: ArrayLike,
+    entropy: ArrayLike,
+    audio_energy: ArrayLike,
+    audio_flux: ArrayLike,
 ) -> np.ndarray:
     min_len = min(
         len(motion),
@@ -92,11 +139,11 @@ def build_feature_matrix(
 
     features = np.stack(
         [
-            np.array(motion[:min_len], dtype=np.float32),
-            np.array(interaction[:min_len], dtype=np.float32),
-            np.array(entropy[:min_len], dtype=np.float32),
-            np.array(audio_energy[:min_len], dtype=np.float32),
-            np.array(audio_flux[:min_len], dtype=np.float32),
+            as_float32(motion)[:min_len],
+            as_float32(interaction)[:min_len],
+            as_float32(entropy)[:min_len],
+            as_float32(audio_energy)[:min_len],
+            as_float32(audio_flux)[:min_len],
         ],
         axis=1,
     )
@@ -104,17 +151,17 @@ def build_feature_matrix(
 
 
 def segment_intent_phases_model(
-    times: List[float],
-    motion: List[float],
-    interaction: List[float],
-    entropy: List[float],
-    audio_energy: List[float],
-    audio_flux: List[float],
+    times: ArrayLike,
+    motion: ArrayLike,
+    interaction: ArrayLike,
+    entropy: ArrayLike,
+    audio_energy: ArrayLike,
+    audio_flux: ArrayLike,
     model_bundle: ModelBundle,
     min_durations: Optional[Dict[str, float]] = None,
     penalty_scale: float = 1.0,
 ) -> List[Dict[str, float | str]]:
-    if not times or not motion:
+    if len(times) == 0 or len(motion) == 0:
         return []
 
     features = build_feature_matrix(
@@ -1,8 +1,35 @@
+import hashlib
+import json
+import logging
 import os
+import shutil
+import threading
+import time
+import uuid
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
-import boto3
+from app.services.s3_clients import get_s3_client, transfer_config
+
+# Minimum seconds between remote checks for a newer model version.
+MODEL_REFRESH_INTERVAL_S = float(os.getenv("MODEL_REFRESH_INTERVAL_S", "300"))
+
+_MODEL_FILES = ("intent_lgbm.txt", "metadata.json")
+_ETAGS_FILE = "etags.json"
+# MODEL_LOCAL_DIR/versions/<id>/ holds one complete model and its
+# metadata; MODEL_LOCAL_DIR/current is a symlink to the version in use.
+_VERSIONS_DIR = "versions"
+_CURRENT_LINK = "current"
+# Versions kept on disk besides the current one, for processes that
+# resolved the link just before it moved.
+_KEEP_PREVIOUS_VERSIONS = 1
+
+_refresh_lock = threading.Lock()
+_last_check: Optional[float] = None
+
+# Content digest of a set of model files: path tuple -> (version, digest),
+# where the version is the files' (mtime_ns, size). One entry per tuple.
+_digests: Dict[Tuple[str, ...], Tuple[Tuple[int, ...], str]] = {}
 
 
 def _env(name: str) -> str | None:
@@ -14,43 +41,190 @@ def _model_dir() -> Path:
     return Path(os.getenv("MODEL_LOCAL_DIR", "/tmp/intent_model")).resolve()
 
 
+def default_model_paths() -> Tuple[Path, Path]:
+    """The model shipped with the repo, used when no bucket is configured."""
+    root = Path(__file__).resolve().parents[3]
+    return (
+        root / "datasets/intent_segmentation_v1/models/intent_lgbm.txt",
+        root / "datasets/intent_segmentation_v1/processed/metadata.json",
+    )
+
+
 def _model_paths() -> Tuple[Path, Path]:
-    local_dir = _model_dir()
+    """
+    The files of the current version. The link is resolved once, so the
+    model and metadata always come from the same version even if a
+    refresh moves the link in between.
+    """
+    version_dir = (_model_dir() / _CURRENT_LINK).resolve()
     return (
-        local_dir / "intent_lgbm.txt",
-        local_dir / "metadata.json",
+        version_dir / "intent_lgbm.txt",
+        version_dir / "metadata.json",
     )
 
 
-def download_model_if_needed() -> Optional[Tuple[Path, Path]]:
-    endpoint_url = _env("R2_ENDPOINT") or _env("MODEL_S3_ENDPOINT_URL")
-    bucket = _env("R2_BUCKET") or _env("MODEL_S3_BUCKET")
-    access_key = _env("R2_ACCESS_KEY_ID") or _env("MODEL_S3_ACCESS_KEY_ID")
-    secret_key = _env("R2_SECRET_ACCESS_KEY") or _env("MODEL_S3_SECRET_ACCESS_KEY")
-    prefix = _env("MODEL_S3_PREFIX") or ""
+def _read_etags(version_dir: Path) -> Dict[str, str]:
+    try:
+        with (version_dir / _ETAGS_FILE).open("r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
 
-    if not bucket or not access_key or not secret_key:
-        return None
 
-    model_path, metadata_path = _model_paths()
-    model_path.parent.mkdir(parents=True, exist_ok=True)
+def _point_current_at(local_dir: Path, version_dir: Path) -> None:
+    tmp_link = local_dir / f".{_CURRENT_LINK}.{uuid.uuid4().hex}"
+    os.symlink(os.path.relpath(version_dir, local_dir), tmp_link)
+    os.replace(tmp_link, local_dir / _CURRENT_LINK)
 
-    if model_path.exists() and metadata_path.exists():
-        return model_path, metadata_path
 
-    client = boto3.client(
-        "s3",
-        endpoint_url=endpoint_url,
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
+def _prune_versions(local_dir: Path) -> None:
+    current = (local_dir / _CURRENT_LINK).resolve()
+    versions = sorted(
+        (path for path in (local_dir / _VERSIONS_DIR).iterdir() if path != current),
+        key=lambda path: path.stat().st_mtime_ns,
+        reverse=True,
     )
-
+    for path in versions[_KEEP_PREVIOUS_VERSIONS:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _sync_model_files(client, bucket: str, prefix: str, local_dir: Path) -> None:
+    """
+    Fetch the model files again if any remote ETag differs from the ones
+    of the current version. A new version is assembled in its own
+    directory (files that did not change are linked from the current
+    one) and published by swapping the `current` symlink, so readers see
+    either the old pair of files or the new pair, never a mix.
+    """
     def key_for(name: str) -> str:
         if prefix and not prefix.endswith("/"):
             return f"{prefix}/{name}"
         return f"{prefix}{name}"
 
-    client.download_file(bucket, key_for("intent_lgbm.txt"), str(model_path))
-    client.download_file(bucket, key_for("metadata.json"), str(metadata_path))
+    current_dir = (local_dir / _CURRENT_LINK).resolve()
+    current_etags = _read_etags(current_dir)
+    remote_etags = {
+        name: client.head_object(Bucket=bucket, Key=key_for(name)).get("ETag", "")
+        for name in _MODEL_FILES
+    }
+    if all(
+        (current_dir / name).exists() and etag and current_etags.get(name) == etag
+        for name, etag in remote_etags.items()
+    ):
+        return
+
+    version_dir = local_dir / _VERSIONS_DIR / uuid.uuid4().hex
+    version_dir.mkdir(parents=True)
+    try:
+        for name, etag in remote_etags.items():
+            target = version_dir / name
+            if (current_dir / name).exists() and etag and current_etags.get(name) == etag:
+                try:
+                    os.link(current_dir / name, target)
+                except OSError:
+                    shutil.copy2(current_dir / name, target)
+                continue
+            client.download_file(
+                bucket, key_for(name), str(target), Config=transfer_config()
+            )
+        with (version_dir / _ETAGS_FILE).open("w", encoding="utf-8") as handle:
+            json.dump(remote_etags, handle)
+        _point_current_at(local_dir, version_dir)
+    except BaseException:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+    _prune_versions(local_dir)
 
-    return model_path, metadata_path
+
+def download_model_if_needed() -> Optional[Tuple[Path, Path]]:
+    """
+    Make sure the configured model is available locally and return its
+    paths, or None when no model bucket is configured.
+
+    The remote copy is checked at most every MODEL_REFRESH_INTERVAL_S
+    seconds; a newer version (by ETag) is downloaded next to the current
+    one and swapped in as a whole.
+    If the check fails but a local copy exists, that copy is used.
+    """
+    global _last_check
+
+    endpoint_url = _env("R2_ENDPOINT") or _env("MODEL_S3_ENDPOINT_URL")
+    bucket = _env("R2_BUCKET") or _env("MODEL_S3_BUCKET")
+    access_key = _env("R2_ACCESS_KEY_ID") or _env("MODEL_S3_ACCESS_KEY_ID")
+    secret_key = _env("R2_SECRET_ACCESS_KEY") or _env("MODEL_S3_SECRET_ACCESS_KEY")
+    prefix = _env("MODEL_S3_PREFIX") or ""
+
+    if not bucket or not access_key or not secret_key:
+        return None
+
+    local_dir = _model_dir()
+    local_dir.mkdir(parents=True, exist_ok=True)
+
+    with _refresh_lock:
+        model_path, metadata_path = _model_paths()
+        have_local = model_path.exists() and metadata_path.exists()
+        now = time.monotonic()
+        if (
+            have_local
+            and _last_check is not None
+            and now - _last_check < MODEL_REFRESH_INTERVAL_S
+        ):
+            return model_path, metadata_path
+
+        client = get_s3_client(endpoint_url, access_key, secret_key)
+        try:
+            _sync_model_files(client, bucket, prefix, local_dir)
+        except Exception:
+            if not have_local:
+                raise
+            logging.warning(
+                "Model refresh failed; keeping local copy", exc_info=True
+            )
+        _last_check = now
+        return _model_paths()
+
+
+def active_model_paths() -> Optional[Tuple[Path, Path]]:
+    """
+    The model files jobs use right now: the configured remote model, else
+    the bundled default if it exists, else None (heuristic segmentation).
+    """
+    paths = download_model_if_needed()
+    if paths is None:
+        paths = default_model_paths()
+    if not all(path.exists() for path in paths):
+        return None
+    return paths
+
+
+def model_digest(paths: Tuple[Path, ...]) -> Optional[str]:
+    """
+    sha256 over the contents of the model files, so every process that
+    has the same model agrees on its version. Cached until a file's
+    mtime or size changes; digests of files that are gone are dropped.
+    """
+    try:
+        stats = [path.stat() for path in paths]
+    except OSError:
+        return None
+    key = tuple(str(path) for path in paths)
+    version = tuple(
+        value for stat in stats for value in (stat.st_mtime_ns, stat.st_size)
+    )
+    cached = _digests.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    hasher = hashlib.sha256()
+    for path in paths:
+        with path.open("rb") as handle:
+            for block in iter(lambda: handle.read(1024 * 1024), b""):
+                hasher.update(block)
+    digest = hasher.hexdigest()
+    for stale in [
+        other for other in _digests
+        if other != key and not all(os.path.exists(name) for name in other)
+    ]:
+        _digests.pop(stale, None)
+    _digests[key] = (version, digest)
+    return digest
@@ -1,108 +1,433 @@
+import math
+import multiprocessing
 import os
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
 import cv2
 import numpy as np
-from typing import List, Tuple
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+from app.services.signals import Signals
+from app.services.video_utils import iter_gray_frames
 
-def compute_motion_signal(
-    frames_dir: str,
-    fps_used: float
-) -> Tuple[List[float], List[float], List[float], List[float]]:
+# Long videos are split into time ranges decoded in parallel. Ranges are at
+# least MIN_CHUNK_S long so that ffmpeg start-up cost stays negligible.
+DECODE_WORKERS = (
+    int(os.getenv("MOTION_DECODE_WORKERS", "0")) or os.cpu_count() or 1
+)
+MIN_CHUNK_S = float(os.getenv("MOTION_MIN_CHUNK_S", "30"))
+
+
+# Frames are featurized in stacks of this many diffs at a time.
+BATCH_SIZE = int(os.getenv("MOTION_BATCH_SIZE", "16"))
+
+# How often a parallel decode reports its frame count back to the caller.
+PROGRESS_POLL_S = 0.5
+
+# Range workers are started from a fork server rather than forked from the
+# caller, which may already run threads (the job's audio decode) whose
+# locks a plain fork would copy in a held state. The server imports this
+# module once, so workers start without re-importing OpenCV and numpy.
+DECODE_START_METHOD = os.getenv("MOTION_DECODE_START_METHOD", "forkserver")
+if DECODE_START_METHOD == "forkserver":
+    multiprocessing.get_context("forkserver").set_forkserver_preload([__name__])
+
+# Frames decoded so far across a parallel decode, shared with its workers.
+_frames_decoded = None
+
+
+def _grid_bounds(size: int) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Compute a simple motion signal from extracted frames.
+    Start offsets and sizes of the non-empty cells when splitting `size`
+    pixels into 4 grid cells, the last cell taking the remainder.
+    """
+    cell = max(size // 4, 1)
+    starts: List[int] = []
+    sizes: List[int] = []
+    for i in range(4):
+        start = i * cell
+        end = size if i == 3 else min((i + 1) * cell, size)
+        if end > start:
+            starts.append(start)
+            sizes.append(end - start)
+    return np.array(starts, dtype=np.intp), np.array(sizes, dtype=np.int64)
 
-    Returns:
-        times: seconds from start of video (sampled by fps_used)
-        motion: normalized motion magnitude per frame
-        interaction: normalized motion concentration per frame
-        entropy: normalized luminance entropy per frame
+
+def _sum_bands(values: np.ndarray, dtype: type) -> np.ndarray:
+    """
+    Sum the last axis of `values` over the 4 grid bands of `_grid_bounds`,
+    via reshape + reduce with the remainder folded into the last band.
     """
+    size = values.shape[-1]
+    cell = size // 4
+    if cell == 0:
+        starts, _ = _grid_bounds(size)
+        return np.add.reduceat(values, starts, axis=-1, dtype=dtype)
+    lead = values.shape[:-1]
+    head = values[..., :3 * cell].reshape(lead + (3, cell))
+    head = head.sum(axis=-1, dtype=dtype)
+    tail = values[..., 3 * cell:].sum(axis=-1, dtype=dtype)
+    return np.concatenate([head, tail[..., None]], axis=-1)
 
-    frame_files = sorted(
-        f for f in os.listdir(frames_dir)
-        if f.endswith(".jpg")
+
+def motion_features_batch(
+    frames: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compute raw (unnormalized) motion features for a stack of K grayscale
+    frames of shape (K, height, width).
+
+    Returns float32 arrays of length K-1 for frames 1..K-1:
+        motion: mean absolute difference to the previous frame
+        interaction: coefficient of variation of the diff over a 4x4 grid
+        entropy: 32-bin luminance entropy, divided by log2(32)
+    """
+    frames = np.ascontiguousarray(frames, dtype=np.uint8)
+    count = frames.shape[0] - 1
+    if count < 1:
+        empty = np.empty(0, dtype=np.float32)
+        return empty, empty.copy(), empty.copy()
+
+    _, h, w = frames.shape
+    curr = frames[1:]
+    # One absdiff over the whole stack, viewed as a tall 2D image.
+    diffs = cv2.absdiff(
+        frames[:-1].reshape(-1, w),
+        curr.reshape(-1, w),
+    ).reshape(count, h, w)
+
+    # Integer cell sums are exact, so the means below equal np.mean per cell.
+    col_sums = _sum_bands(diffs, np.uint32)
+    cell_sums = _sum_bands(col_sums.swapaxes(1, 2), np.int64).swapaxes(1, 2)
+    cell_sums = np.ascontiguousarray(cell_sums).reshape(count, -1)
+    _, row_sizes = _grid_bounds(h)
+    _, col_sizes = _grid_bounds(w)
+    cell_means = cell_sums / np.outer(row_sizes, col_sizes).reshape(-1)
+
+    motion = cell_sums.sum(axis=1) / (h * w)
+
+    # Interaction: motion concentration across a 4x4 grid
+    cell_mean = cell_means.mean(axis=1)
+    cell_std = cell_means.std(axis=1)
+    interaction = cell_std / (cell_mean + 1e-6)
+
+    # Entropy: 32-bin normalized luminance entropy
+    hists = np.stack([
+        cv2.calcHist([gray], [0], None, [32], [0, 256]).ravel()
+        for gray in curr
+    ])
+    probs = hists / hists.sum(axis=1, keepdims=True)
+    entropy = -np.sum(probs * np.log2(probs + 1e-12), axis=1)
+    entropy = entropy.astype(np.float64) / np.log2(32)
+
+    return (
+        motion.astype(np.float32),
+        interaction.astype(np.float32),
+        entropy.astype(np.float32),
     )
 
-    if len(frame_files) < 2:
-        return [], [], [], []
 
-    motion_values: List[float] = []
-    interaction_values: List[float] = []
-    entropy_values: List[float] = []
-    times: List[float] = []
+def _normalize(values: np.ndarray) -> np.ndarray:
+    if values.size:
+        max_val = values.max()
+        if max_val > 0:
+            return values / max_val
+    return values
 
-    prev_gray = None
 
-    for idx, frame_name in enumerate(frame_files):
-        frame_path = os.path.join(frames_dir, frame_name)
+class MotionAccumulator:
+    """
+    Incrementally compute motion, interaction and entropy from a stream of
+    grayscale frames. Frames are buffered and featurized in batches of
+    `batch_size` diffs; only the last frame is carried between batches.
+    """
 
-        frame = cv2.imread(frame_path)
-        if frame is None:
-            continue
+    def __init__(self, fps_used: float, batch_size: Optional[int] = None):
+        self.fps_used = fps_used
+        self.batch_size = max(1, batch_size or BATCH_SIZE)
+        self.frame_count = 0
+        self._frames: List[np.ndarray] = []
+        self._indices: List[int] = []
+        self._times: List[np.ndarray] = []
+        self._motion: List[np.ndarray] = []
+        self._interaction: List[np.ndarray] = []
+        self._entropy: List[np.ndarray] = []
 
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-        if prev_gray is not None:
-            diff = cv2.absdiff(gray, prev_gray)
-            motion = float(np.mean(diff))
-            motion_values.append(motion)
-            times.append(idx / fps_used if fps_used > 0 else 0.0)
-
-            # Interaction: motion concentration across a 4x4 grid
-            h, w = diff.shape
-            cell_h = max(h // 4, 1)
-            cell_w = max(w // 4, 1)
-            cell_motions = []
-            for row in range(4):
-                for col in range(4):
-                    y0 = row * cell_h
-                    x0 = col * cell_w
-                    y1 = h if row == 3 else (row + 1) * cell_h
-                    x1 = w if col == 3 else (col + 1) * cell_w
-                    cell = diff[y0:y1, x0:x1]
-                    if cell.size == 0:
-                        continue
-                    cell_motions.append(float(np.mean(cell)))
-            if cell_motions:
-                cell_mean = float(np.mean(cell_motions))
-                cell_std = float(np.std(cell_motions))
-                interaction_values.append(
-                    cell_std / (cell_mean + 1e-6)
-                )
+    def add(self, gray: np.ndarray, index: Optional[int] = None) -> None:
+        """
+        Add one grayscale frame. `index` is the frame's position in the
+        sampled sequence (defaults to the number of frames seen so far).
+        """
+        if index is None:
+            index = self.frame_count
+        self.frame_count += 1
+
+        self._frames.append(gray)
+        self._indices.append(index)
+        if len(self._frames) > self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if len(self._frames) >= 2:
+            motion, interaction, entropy = motion_features_batch(
+                np.stack(self._frames)
+            )
+            indices = np.array(self._indices[1:], dtype=np.float64)
+            if self.fps_used > 0:
+                times = indices / self.fps_used
             else:
-                interaction_values.append(0.0)
-
-            # Entropy: 32-bin normalized luminance entropy
-            hist = cv2.calcHist([gray], [0], None, [32], [0, 256])
-            hist = hist.flatten()
-            total = float(np.sum(hist))
-            if total > 0:
-                probs = hist / total
-                entropy = -float(
-                    np.sum(
-                        probs * np.log2(probs + 1e-12)
-                    )
+                times = np.zeros_like(indices)
+            self._times.append(times)
+            self._motion.append(motion)
+            self._interaction.append(interaction)
+            self._entropy.append(entropy)
+        self._frames = self._frames[-1:]
+        self._indices = self._indices[-1:]
+
+    def close(self) -> None:
+        """
+        Featurize any buffered frames and release the carried frame.
+        No further frames may be added afterwards.
+        """
+        self._flush()
+        self._frames = []
+        self._indices = []
+
+    @classmethod
+    def concatenate(
+        cls,
+        parts: Sequence["MotionAccumulator"],
+        overlap_frames: int = 1,
+    ) -> "MotionAccumulator":
+        """
+        Stitch accumulators of consecutive frame ranges into one. Each part
+        after the first is expected to start on the last frame of the
+        previous part (`overlap_frames`), so its diffs continue seamlessly.
+        """
+        fps_used = parts[0].fps_used if parts else 0.0
+        combined = cls(fps_used=fps_used)
+        for part in parts:
+            part.close()
+            if part.frame_count == 0:
+                continue
+            if combined.frame_count > 0:
+                combined.frame_count -= overlap_frames
+            combined.frame_count += part.frame_count
+            combined._times.extend(part._times)
+            combined._motion.extend(part._motion)
+            combined._interaction.extend(part._interaction)
+            combined._entropy.extend(part._entropy)
+        return combined
+
+    def to_signals(self) -> Signals:
+        """
+        Return the accumulated signals, each normalized to [0, 1].
+        """
+        self.close()
+        if self.frame_count < 2 or not self._times:
+            return Signals(
+                np.empty(0),
+                motion=np.empty(0),
+                interaction=np.empty(0),
+                entropy=np.empty(0),
+            )
+        return Signals(
+            np.concatenate(self._times),
+            motion=_normalize(np.concatenate(self._motion)),
+            interaction=_normalize(np.concatenate(self._interaction)),
+            entropy=_normalize(np.concatenate(self._entropy)),
+        )
+
+    def finalize(
+        self,
+    ) -> Tuple[List[float], List[float], List[float], List[float]]:
+        """
+        Return (times, motion, interaction, entropy) as lists, with each
+        signal normalized to [0, 1].
+        """
+        signals = self.to_signals()
+        return (
+            signals.t.tolist(),
+            signals.motion.tolist(),
+            signals.interaction.tolist(),
+            signals.entropy.tolist(),
+        )
+
+
+def compute_motion_signal_from_frames(
+    frames: Iterable[np.ndarray],
+    fps_used: float,
+) -> Tuple[List[float], List[float], List[float], List[float]]:
+    """
+    Compute the motion signal from an iterable of grayscale frames, such as
+    `video_utils.iter_gray_frames`. Frames are consumed one at a time.
+
+    Returns the same (times, motion, interaction, entropy) tuple as
+    `compute_motion_signal`.
+    """
+    accumulator = MotionAccumulator(fps_used=fps_used)
+    for gray in frames:
+        accumulator.add(gray)
+    return accumulator.finalize()
+
+
+def _set_frame_counter(counter) -> None:
+    global _frames_decoded
+    _frames_decoded = counter
+
+
+def _accumulate_range(
+    video_path: str,
+    fps_used: int,
+    start_frame: int,
+    max_frames: Optional[int],
+    short_side: Optional[int],
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> MotionAccumulator:
+    accumulator = MotionAccumulator(fps_used=fps_used)
+    frames = iter_gray_frames(
+        video_path,
+        fps=fps_used,
+        short_side=short_side,
+        start_s=start_frame / float(fps_used),
+        max_frames=max_frames,
+    )
+    step = accumulator.batch_size
+    for offset, gray in enumerate(frames):
+        accumulator.add(gray, index=start_frame + offset)
+        if (offset + 1) % step == 0:
+            if on_progress is not None:
+                on_progress(offset + 1)
+            if _frames_decoded is not None:
+                with _frames_decoded.get_lock():
+                    _frames_decoded.value += step
+    # Only the computed signals travel back to the parent process.
+    accumulator.close()
+    return accumulator
+
+
+def _chunk_executor(workers: int, frame_counter=None) -> Executor:
+    # Daemonic processes (e.g. some pool workers) may not have children;
+    # threads still overlap the ffmpeg decoders and GIL-free OpenCV calls.
+    # The frame counter reaches process workers as a start-up argument.
+    if multiprocessing.current_process().daemon:
+        return ThreadPoolExecutor(
+            max_workers=workers,
+            initializer=_set_frame_counter,
+            initargs=(frame_counter,),
+        )
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(DECODE_START_METHOD),
+        initializer=_set_frame_counter,
+        initargs=(frame_counter,),
+    )
+
+
+def accumulate_video_motion(
+    video_path: str,
+    fps_used: int,
+    duration_s: Optional[float] = None,
+    workers: Optional[int] = None,
+    short_side: Optional[int] = None,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> MotionAccumulator:
+    """
+    Decode a video and accumulate its motion signal.
+
+    When the duration is known and long enough, the video is split into
+    time ranges that are decoded and featurized in parallel. Each range
+    decodes one extra frame past its end so that the frame diff across every
+    seam is computed exactly; the raw signals are then stitched in order.
+    Normalization happens afterwards, in `MotionAccumulator.finalize`.
+
+    `on_progress`, if given, is called from the calling thread with the
+    number of frames decoded so far: every batch for a single range, and
+    every PROGRESS_POLL_S while parallel ranges run.
+    """
+    if workers is None:
+        workers = DECODE_WORKERS
+
+    chunks = 1
+    if duration_s is not None and duration_s > 0:
+        chunks = max(1, min(workers, int(duration_s // MIN_CHUNK_S)))
+
+    if chunks == 1:
+        return _accumulate_range(
+            video_path, fps_used, 0, None, short_side, on_progress
+        )
+
+    total_frames = int(math.ceil(duration_s * fps_used))
+    chunk_frames = int(math.ceil(total_frames / chunks))
+    ranges = []
+    for chunk in range(chunks):
+        start_frame = chunk * chunk_frames
+        last = chunk == chunks - 1
+        # The final range runs to the end of the stream.
+        max_frames = None if last else chunk_frames + 1
+        ranges.append((start_frame, max_frames))
+
+    frame_counter = multiprocessing.get_context(DECODE_START_METHOD).Value("q", 0)
+    try:
+        with _chunk_executor(chunks, frame_counter) as executor:
+            futures = [
+                executor.submit(
+                    _accumulate_range,
+                    video_path,
+                    fps_used,
+                    start_frame,
+                    max_frames,
+                    short_side,
                 )
-                entropy_values.append(entropy / np.log2(32))
-            else:
-                entropy_values.append(0.0)
+                for start_frame, max_frames in ranges
+            ]
+            pending = set(futures)
+            while pending:
+                _, pending = wait(pending, timeout=PROGRESS_POLL_S)
+                if on_progress is not None:
+                    on_progress(frame_counter.value)
+            parts = [future.result() for future in futures]
+    finally:
+        # Thread workers set the counter in this process; drop it again.
+        _set_frame_counter(None)
 
-        prev_gray = gray
+    return MotionAccumulator.concatenate(parts)
 
-    # Normalize signals to [0, 1]
-    if motion_values:
-        max_val = max(motion_values)
-        if max_val > 0:
-            motion_values = [m / max_val for m in motion_values]
 
-    if interaction_values:
-        max_val = max(interaction_values)
-        if max_val > 0:
-            interaction_values = [v / max_val for v in interaction_values]
+def _iter_frame_files(frames_dir: str) -> Iterator[Tuple[int, np.ndarray]]:
+    frame_files = sorted(
+        f for f in os.listdir(frames_dir)
+        if f.endswith(".jpg")
+    )
+    if len(frame_files) < 2:
+        return
 
-    if entropy_values:
-        max_val = max(entropy_values)
-        if max_val > 0:
-            entropy_values = [v / max_val for v in entropy_values]
+    for idx, frame_name in enumerate(frame_files):
+        frame = cv2.imread(os.path.join(frames_dir, frame_name))
+        if frame is None:
+            continue
+        yield idx, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def compute_motion_signal(
+    frames_dir: str,
+    fps_used: float
+) -> Tuple[List[float], List[float], List[float], List[float]]:
+    """
+    Compute a simple motion signal from extracted frames.
 
-    return times, motion_values, interaction_values, entropy_values
+    Returns:
+        times: seconds from start of video (sampled by fps_used)
+        motion: normalized motion magnitude per frame
+        interaction: normalized motion concentration per frame
+        entropy: normalized luminance entropy per frame
+    """
+    accumulator = MotionAccumulator(fps_used=fps_used)
+    for idx, gray in _iter_frame_files(frames_dir):
+        accumulator.add(gray, index=idx)
+    return accumulator.finalize()
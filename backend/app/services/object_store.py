@@ -1,8 +1,9 @@
 import os
-from typing import Optional
+from typing import Any, Dict, Optional
 
-import boto3
-from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from app.services.s3_clients import get_s3_client, transfer_config
 
 
 R2_BUCKET = os.getenv("R2_BUCKET")
@@ -11,6 +12,9 @@ R2_ACCESS_KEY_ID = os.getenv("R2_ACCESS_KEY_ID")
 R2_SECRET_ACCESS_KEY = os.getenv("R2_SECRET_ACCESS_KEY")
 R2_PUBLIC_URL = os.getenv("R2_PUBLIC_URL")
 
+# Lifetime of presigned URLs handed to browsers for direct uploads.
+PRESIGNED_URL_EXPIRES_S = int(os.getenv("PRESIGNED_URL_EXPIRES_S", "3600"))
+
 
 def r2_enabled() -> bool:
     return all([R2_BUCKET, R2_ENDPOINT, R2_ACCESS_KEY_ID, R2_SECRET_ACCESS_KEY])
@@ -19,13 +23,8 @@ def r2_enabled() -> bool:
 def _get_client():
     if not r2_enabled():
         raise RuntimeError("R2 storage is not configured.")
-    return boto3.client(
-        "s3",
-        endpoint_url=R2_ENDPOINT,
-        aws_access_key_id=R2_ACCESS_KEY_ID,
-        aws_secret_access_key=R2_SECRET_ACCESS_KEY,
-        region_name="auto",
-        config=Config(signature_version="s3v4"),
+    return get_s3_client(
+        R2_ENDPOINT, R2_ACCESS_KEY_ID, R2_SECRET_ACCESS_KEY, region_name="auto"
     )
 
 
@@ -35,9 +34,143 @@ def upload_bytes(key: str, data: bytes, content_type: Optional[str] = None) -> N
     client.put_object(Bucket=R2_BUCKET, Key=key, Body=data, **extra)
 
 
+class MultipartUpload:
+    """
+    One S3 multipart upload. Parts may be sent from several threads at
+    once, or by a browser through presigned part URLs; every part but the
+    last must be at least 5 MiB. Pass `upload_id` to pick up an upload
+    that was started earlier.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        content_type: Optional[str] = None,
+        upload_id: Optional[str] = None,
+    ):
+        self.key = key
+        self._client = _get_client()
+        if upload_id is None:
+            extra = {"ContentType": content_type} if content_type else {}
+            response = self._client.create_multipart_upload(
+                Bucket=R2_BUCKET, Key=key, **extra
+            )
+            upload_id = response["UploadId"]
+        self.upload_id = upload_id
+        self._etags: Dict[int, str] = {}
+
+    def upload_part(self, part_number: int, data: bytes) -> None:
+        response = self._client.upload_part(
+            Bucket=R2_BUCKET,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=data,
+        )
+        self._etags[part_number] = response["ETag"]
+
+    def presigned_part_url(
+        self,
+        part_number: int,
+        expires_s: int = PRESIGNED_URL_EXPIRES_S,
+    ) -> str:
+        return self._client.generate_presigned_url(
+            "upload_part",
+            Params={
+                "Bucket": R2_BUCKET,
+                "Key": self.key,
+                "UploadId": self.upload_id,
+                "PartNumber": part_number,
+            },
+            ExpiresIn=expires_s,
+        )
+
+    def complete(self, etags: Optional[Dict[int, str]] = None) -> None:
+        """Finish the upload from the parts sent here, or the given ETags."""
+        etags = self._etags if etags is None else etags
+        parts = [
+            {"PartNumber": number, "ETag": etag}
+            for number, etag in sorted(etags.items())
+        ]
+        self._client.complete_multipart_upload(
+            Bucket=R2_BUCKET,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+
+    def abort(self) -> None:
+        self._client.abort_multipart_upload(
+            Bucket=R2_BUCKET, Key=self.key, UploadId=self.upload_id
+        )
+
+
+def presigned_put_url(
+    key: str,
+    content_type: Optional[str] = None,
+    expires_s: int = PRESIGNED_URL_EXPIRES_S,
+) -> str:
+    """A URL the holder can PUT the object to (with the same Content-Type)."""
+    client = _get_client()
+    params = {"Bucket": R2_BUCKET, "Key": key}
+    if content_type:
+        params["ContentType"] = content_type
+    return client.generate_presigned_url(
+        "put_object", Params=params, ExpiresIn=expires_s
+    )
+
+
+def presigned_get_url(key: str, expires_s: int = PRESIGNED_URL_EXPIRES_S) -> str:
+    """A URL the holder can GET (including ranged GETs) the object from."""
+    client = _get_client()
+    return client.generate_presigned_url(
+        "get_object", Params={"Bucket": R2_BUCKET, "Key": key}, ExpiresIn=expires_s
+    )
+
+
+def read_range(key: str, offset: int, length: int) -> bytes:
+    """Up to `length` bytes of an object starting at `offset`."""
+    client = _get_client()
+    try:
+        response = client.get_object(
+            Bucket=R2_BUCKET, Key=key, Range=f"bytes={offset}-{offset + length - 1}"
+        )
+    except ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") == "InvalidRange":
+            return b""
+        raise
+    return response["Body"].read()
+
+
+def head_object(key: str) -> Optional[Dict[str, Any]]:
+    """Size, type and ETag of an object, or None if it does not exist."""
+    client = _get_client()
+    try:
+        response = client.head_object(Bucket=R2_BUCKET, Key=key)
+    except ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return None
+        raise
+    return {
+        "size": response["ContentLength"],
+        "content_type": response.get("ContentType"),
+        "etag": response.get("ETag"),
+    }
+
+
+def download_bytes(key: str) -> bytes:
+    client = _get_client()
+    return client.get_object(Bucket=R2_BUCKET, Key=key)["Body"].read()
+
+
+def delete_object(key: str) -> None:
+    client = _get_client()
+    client.delete_object(Bucket=R2_BUCKET, Key=key)
+
+
 def download_to_path(key: str, destination: str) -> None:
     client = _get_client()
-    client.download_file(R2_BUCKET, key, destination)
+    client.download_file(R2_BUCKET, key, destination, Config=transfer_config())
 
 
 def get_public_url(key: str) -> Optional[str]:
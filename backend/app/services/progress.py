@@ -0,0 +1,120 @@
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Share of a job's wall time spent in each stage, in pipeline order. Decode
+# covers ffmpeg and the motion featurizer, which run as one frame loop;
+# audio is decoded alongside it, so only the wait for it remains. These are
+# estimates from the decode and segmentation benchmarks; `finish` logs
+# the measured stage times so they can be re-tuned.
+STAGE_WEIGHTS: Tuple[Tuple[str, float], ...] = (
+    ("download", 0.10),
+    ("decode", 0.60),
+    ("audio", 0.05),
+    ("inference", 0.15),
+    ("finalise", 0.10),
+)
+
+# Sub-stage updates are written at most this often and only when progress
+# moved by at least MIN_PROGRESS_STEP; stage changes are always written.
+MIN_WRITE_INTERVAL_S = 0.5
+MIN_PROGRESS_STEP = 0.01
+
+# Progress stays below this until the job writes its final record.
+MAX_RUNNING_PROGRESS = 0.99
+
+
+class ProgressReporter:
+    """
+    Turns stage changes and per-stage fractions into overall job progress.
+
+    Each stage owns a slice of [0, 1] sized by its weight; `update` moves
+    within the current slice. Progress never goes backwards. Writes go
+    through `write(job_id, fields)` and only carry status, progress and
+    message (see `job_store.update_job`). Not thread-safe: call it from
+    the job's thread.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        write: Callable[[str, Dict[str, Any]], None],
+        weights: Tuple[Tuple[str, float], ...] = STAGE_WEIGHTS,
+        min_interval_s: float = MIN_WRITE_INTERVAL_S,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.job_id = job_id
+        self._write = write
+        self._min_interval_s = min_interval_s
+        self._clock = clock
+
+        total = sum(weight for _, weight in weights) or 1.0
+        self._slices: Dict[str, Tuple[float, float]] = {}
+        offset = 0.0
+        for name, weight in weights:
+            self._slices[name] = (offset, weight / total)
+            offset += weight / total
+
+        self.progress = 0.0
+        self._stage: Optional[str] = None
+        self._stage_started = 0.0
+        self._message = ""
+        self._written_progress = -1.0
+        self._written_at: Optional[float] = None
+        self.timings: List[Tuple[str, float]] = []
+
+    def stage(self, name: str, message: str) -> None:
+        """Finish the current stage and start `name`; always written."""
+        now = self._clock()
+        self._close_stage(now)
+        self._stage = name
+        self._stage_started = now
+        self._message = message
+        offset, _ = self._slices[name]
+        self._advance(offset)
+        self._flush(now)
+
+    def update(self, fraction: float, message: Optional[str] = None) -> None:
+        """Report progress within the current stage (`fraction` in [0, 1])."""
+        if self._stage is None:
+            return
+        if message is not None:
+            self._message = message
+        offset, width = self._slices[self._stage]
+        self._advance(offset + width * min(max(fraction, 0.0), 1.0))
+
+        now = self._clock()
+        if self.progress - self._written_progress < MIN_PROGRESS_STEP:
+            return
+        if (
+            self._written_at is not None
+            and now - self._written_at < self._min_interval_s
+        ):
+            return
+        self._flush(now)
+
+    def finish(self) -> None:
+        """Close the last stage and log how long every stage took."""
+        self._close_stage(self._clock())
+        self._stage = None
+        logging.info(
+            "Job %s stage times: %s",
+            self.job_id,
+            ", ".join(f"{name}={elapsed:.2f}s" for name, elapsed in self.timings),
+        )
+
+    def _advance(self, progress: float) -> None:
+        self.progress = max(self.progress, min(progress, MAX_RUNNING_PROGRESS))
+
+    def _close_stage(self, now: float) -> None:
+        if self._stage is not None:
+            self.timings.append((self._stage, now - self._stage_started))
+
+    def _flush(self, now: float) -> None:
+        self._write(self.job_id, {
+            "status": "processing",
+            "progress": round(self.progress, 3),
+            "message": self._message,
+        })
+        self._written_progress = self.progress
+        self._written_at = now
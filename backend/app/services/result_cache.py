@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.services import job_store
+
+# Results are cached per (video content, analysis settings) and point at
+# the job that produced them; a hit completes a new job by referencing
+# that job's result. The least recently used entries beyond this many are
+# dropped (the results themselves stay with their jobs).
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+
+_ENTRIES_KEY = "result-cache:entries"  # cache key -> source job id
+_LRU_KEY = "result-cache:lru"  # cache key -> last use (unix time)
+_STATS_KEY = "result-cache:stats"  # hits, misses, evictions
+_FINGERPRINT_KEY = "result-cache:fingerprint"  # settings workers run with
+_VIDEOS_KEY = "video-blobs"  # sha256 -> stored copy of that video
+
+_file_lock = threading.Lock()
+
+
+def settings_fingerprint(settings: Dict[str, Any]) -> str:
+    """A short, stable digest of everything besides the video that shapes a result."""
+    encoded = json.dumps(settings, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+def cache_key(content_sha256: str, fingerprint: str) -> str:
+    return f"{content_sha256}:{fingerprint}"
+
+def key_fingerprint(key: str) -> str:
+    return key.rsplit(":", 1)[-1]
+
+# ----------------------------
+# File backend (no Redis)
+# ----------------------------
+
+def _index_path() -> str:
+    return os.path.join(job_store.JOBS_DIR, "content_index.json")
+
+def _load_index() -> Dict[str, Any]:
+    try:
+        with open(_index_path(), "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    index.setdefault("entries", {})
+    index.setdefault("lru", {})
+    index.setdefault("stats", {})
+    index.setdefault("videos", {})
+    return index
+
+def _save_index(index: Dict[str, Any]) -> None:
+    os.makedirs(job_store.JOBS_DIR, exist_ok=True)
+    tmp_path = f"{_index_path()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, _index_path())
+
+# ----------------------------
+# Results
+# ----------------------------
+
+def lookup_result(key: str) -> Optional[str]:
+    """The job whose result answers `key`, counting a hit or a miss."""
+    client = job_store.get_redis()
+    if client:
+        job_id = client.hget(_ENTRIES_KEY, key)
+        pipe = client.pipeline(transaction=False)
+        if job_id is not None:
+            pipe.zadd(_LRU_KEY, {key: time.time()})
+        pipe.hincrby(_STATS_KEY, "hits" if job_id is not None else "misses", 1)
+        pipe.execute()
+        return job_id
+
+    with _file_lock:
+        index = _load_index()
+        job_id = index["entries"].get(key)
+        if job_id is not None:
+            index["lru"][key] = time.time()
+        stat = "hits" if job_id is not None else "misses"
+        index["stats"][stat] = index["stats"].get(stat, 0) + 1
+        _save_index(index)
+    return job_id
+
+def store_result(key: str, job_id: str, max_entries: Optional[int] = None) -> None:
+    """Remember that `job_id` holds the result for `key`, evicting LRU entries."""
+    if max_entries is None:
+        max_entries = RESULT_CACHE_MAX_ENTRIES
+    client = job_store.get_redis()
+    if client:
+        pipe = client.pipeline(transaction=False)
+        pipe.hset(_ENTRIES_KEY, mapping={key: job_id})
+        pipe.zadd(_LRU_KEY, {key: time.time()})
+        pipe.zcard(_LRU_KEY)
+        size = pipe.execute()[-1]
+        if size > max_entries:
+            evicted = [name for name, _ in client.zpopmin(_LRU_KEY, size - max_entries)]
+            pipe = client.pipeline(transaction=False)
+            pipe.hdel(_ENTRIES_KEY, *evicted)
+            pipe.hincrby(_STATS_KEY, "evictions", len(evicted))
+            pipe.execute()
+        return
+
+    with _file_lock:
+        index = _load_index()
+        index["entries"][key] = job_id
+        index["lru"][key] = time.time()
+        excess = len(index["lru"]) - max_entries
+        if excess > 0:
+            oldest = sorted(index["lru"], key=index["lru"].get)[:excess]
+            for name in oldest:
+                index["lru"].pop(name)
+                index["entries"].pop(name, None)
+            index["stats"]["evictions"] = index["stats"].get("evictions", 0) + excess
+        _save_index(index)
+
+def cache_stats() -> Dict[str, int]:
+    client = job_store.get_redis()
+    if client:
+        stats = {name: int(value) for name, value in client.hgetall(_STATS_KEY).items()}
+        entries = client.zcard(_LRU_KEY)
+    else:
+        index = _load_index()
+        stats = dict(index["stats"])
+        entries = len(index["entries"])
+    return {
+        "hits": stats.get("hits", 0),
+        "misses": stats.get("misses", 0),
+        "evictions": stats.get("evictions", 0),
+        "entries": entries,
+    }
+
+# ----------------------------
+# Settings fingerprint
+# ----------------------------
+
+# Only workers know the model and settings they analyse with (the API
+# never loads the model), so they publish the fingerprint and the API
+# reads it to build cache keys at upload time.
+
+def publish_fingerprint(fingerprint: str) -> None:
+    client = job_store.get_redis()
+    if client:
+        client.set(_FINGERPRINT_KEY, fingerprint)
+        return
+    with _file_lock:
+        index = _load_index()
+        if index.get("fingerprint") != fingerprint:
+            index["fingerprint"] = fingerprint
+            _save_index(index)
+
+def published_fingerprint() -> Optional[str]:
+    """The fingerprint last published by a worker, or None before any has."""
+    client = job_store.get_redis()
+    if client:
+        return client.get(_FINGERPRINT_KEY)
+    return _load_index().get("fingerprint")
+
+# ----------------------------
+# Stored videos
+# ----------------------------
+
+def find_video(content_sha256: str) -> Optional[Dict[str, Any]]:
+    """The stored copy of a video with this content, if one was recorded."""
+    client = job_store.get_redis()
+    if client:
+        raw = client.hget(_VIDEOS_KEY, content_sha256)
+        return json.loads(raw) if raw is not None else None
+    return _load_index()["videos"].get(content_sha256)
+
+def remember_video(content_sha256: str, stored: Dict[str, Any]) -> None:
+    client = job_store.get_redis()
+    if client:
+        client.hset(_VIDEOS_KEY, mapping={content_sha256: json.dumps(stored)})
+        return
+    with _file_lock:
+        index = _load_index()
+        index["videos"][content_sha256] = stored
+        _save_index(index)
+
+def forget_video(content_sha256: str) -> None:
+    client = job_store.get_redis()
+    if client:
+        client.hdel(_VIDEOS_KEY, content_sha256)
+        return
+    with _file_lock:
+        index = _load_index()
+        index["videos"].pop(content_sha256, None)
+        _save_index(index)
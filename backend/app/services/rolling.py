@@ -0,0 +1,77 @@
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+ArrayLike = Union[Sequence[float], np.ndarray]
+
+# Windows up to this size are summed offset by offset, in the same order as
+# a left-to-right sum over each window; wider windows use prefix sums.
+EXACT_WINDOW_MAX = 16
+
+
+def window_bounds(
+    length: int,
+    window_size: int,
+    centered: bool = False,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Half-open [start, end) bounds of every window, clipped at the edges.
+
+    Trailing windows cover the last `window_size` samples up to and
+    including i. Centred windows cover i ± window_size // 2.
+    """
+    index = np.arange(length)
+    if centered:
+        half = window_size // 2
+        start = np.maximum(index - half, 0)
+        end = np.minimum(index + half + 1, length)
+    else:
+        start = np.maximum(index - window_size + 1, 0)
+        end = index + 1
+    return start, end
+
+
+def rolling_mean(
+    values: ArrayLike,
+    window_size: int,
+    centered: bool = False,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Moving average along the last axis, linear in the signal length.
+
+    `values` may be one signal of shape (n,) or several stacked as (k, n).
+    Windows shrink at the edges instead of padding, so every output is the
+    mean of the samples actually inside its window.
+
+    Float inputs keep their dtype (anything else becomes float64). Small
+    windows reproduce `sum(window) / len(window)` bit for bit, so values
+    that sit exactly on a threshold stay there; wide windows are taken
+    from a float64 prefix sum. Pass `out` to reuse a result buffer.
+    """
+    data = np.asarray(values)
+    if not np.issubdtype(data.dtype, np.floating):
+        data = data.astype(np.float64)
+    length = data.shape[-1]
+    if out is None:
+        out = np.empty(data.shape, dtype=data.dtype)
+    if length == 0:
+        return out
+
+    start, end = window_bounds(length, max(window_size, 1), centered)
+    counts = end - start
+    widest = int(counts.max())
+
+    if widest <= EXACT_WINDOW_MAX:
+        out[...] = 0.0
+        taken = np.empty(data.shape, dtype=data.dtype)
+        for offset in range(widest):
+            data.take(start + offset, axis=-1, out=taken, mode="clip")
+            np.add(out, taken, out=out, where=counts > offset)
+    else:
+        prefix = np.zeros(data.shape[:-1] + (length + 1,), dtype=np.float64)
+        np.cumsum(data, axis=-1, out=prefix[..., 1:])
+        np.subtract(prefix[..., end], prefix[..., start], out=out)
+
+    out /= counts.astype(out.dtype)
+    return out
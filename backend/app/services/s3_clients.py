@@ -0,0 +1,69 @@
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+MB = 1024 * 1024
+
+# Parallel ranged GETs per download and their size. Objects smaller than
+# the threshold are fetched with one request. Tune per deployment: more
+# concurrency helps on high-latency links, bigger chunks on fast ones.
+TRANSFER_MAX_CONCURRENCY = int(os.getenv("S3_TRANSFER_MAX_CONCURRENCY", "8"))
+TRANSFER_CHUNK_BYTES = int(os.getenv("S3_TRANSFER_CHUNK_MB", "16")) * MB
+TRANSFER_THRESHOLD_BYTES = int(os.getenv("S3_TRANSFER_THRESHOLD_MB", "16")) * MB
+
+_clients: Dict[Tuple[Optional[str], ...], Any] = {}
+_clients_pid: Optional[int] = None
+_clients_lock = threading.Lock()
+
+
+def get_s3_client(
+    endpoint_url: Optional[str],
+    access_key: Optional[str],
+    secret_key: Optional[str],
+    region_name: Optional[str] = None,
+):
+    """
+    One S3 client per process and set of credentials.
+
+    Clients are thread-safe once built, but building one (credential and
+    endpoint resolution, a new connection pool) is slow and not safe to
+    do concurrently, hence the lock. Forked workers get fresh clients
+    rather than sharing the parent's sockets.
+    """
+    global _clients_pid
+    key = (endpoint_url, access_key, secret_key, region_name)
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        client = _clients.get(key)
+        if client is None:
+            client = boto3.client(
+                "s3",
+                endpoint_url=endpoint_url,
+                aws_access_key_id=access_key,
+                aws_secret_access_key=secret_key,
+                region_name=region_name,
+                config=Config(
+                    signature_version="s3v4",
+                    max_pool_connections=max(10, 2 * TRANSFER_MAX_CONCURRENCY),
+                ),
+            )
+            _clients[key] = client
+    return client
+
+def transfer_config(
+    max_concurrency: int = TRANSFER_MAX_CONCURRENCY,
+    chunk_bytes: int = TRANSFER_CHUNK_BYTES,
+    threshold_bytes: int = TRANSFER_THRESHOLD_BYTES,
+) -> TransferConfig:
+    return TransferConfig(
+        multipart_threshold=threshold_bytes,
+        multipart_chunksize=chunk_bytes,
+        max_concurrency=max_concurrency,
+        use_threads=max_concurrency > 1,
+    )
@@ -0,0 +1,46 @@
+import io
+import os
+from typing import Any, Dict
+
+from app.services.object_store import download_bytes, upload_bytes
+from app.services.signals import Signals
+
+# Where the per-job signals are kept when videos are stored locally. With
+# object storage they go to SIGNALS_PREFIX in the same bucket.
+SIGNALS_DIR = os.getenv("SIGNALS_DIR", "./data/signals")
+SIGNALS_PREFIX = "signals/"
+
+
+def save_signal_artefact(
+    job_id: str,
+    signals: Signals,
+    storage_backend: str,
+    **metadata: Any,
+) -> Dict[str, str]:
+    """
+    Persist a job's extracted signals (compressed float32 npz) so it can
+    be re-segmented without decoding the video again. Returns the record
+    `load_signal_artefact` needs.
+    """
+    if storage_backend == "r2":
+        buffer = io.BytesIO()
+        signals.save_npz(buffer, **metadata)
+        key = f"{SIGNALS_PREFIX}{job_id}.npz"
+        upload_bytes(key, buffer.getvalue(), "application/octet-stream")
+        return {"backend": "r2", "key": key}
+
+    os.makedirs(SIGNALS_DIR, exist_ok=True)
+    path = os.path.join(SIGNALS_DIR, f"{job_id}.npz")
+    partial = f"{path}.part"
+    with open(partial, "wb") as f:
+        signals.save_npz(f, **metadata)
+    os.replace(partial, path)
+    return {"backend": "local", "key": path}
+
+def load_signal_artefact(artefact: Dict[str, str]) -> Signals:
+    if artefact["backend"] == "r2":
+        source = io.BytesIO(download_bytes(artefact["key"]))
+    else:
+        source = artefact["key"]
+    signals, _ = Signals.load_npz(source)
+    return signals
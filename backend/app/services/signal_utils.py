@@ -1,30 +1,28 @@
-from typing import List
+from typing import List, Sequence, Union
+
+import numpy as np
+
+from app.services.rolling import rolling_mean
 
 
 def smooth_signal(
-    signal: List[float],
+    signal: Union[Sequence[float], np.ndarray],
     window_size: int = 5,
-) -> List[float]:
+) -> Union[List[float], np.ndarray]:
     """
     Apply a simple moving average to a 1D signal.
 
     Args:
-        signal: raw signal values
+        signal: raw signal values (list or ndarray)
         window_size: number of points to average over
 
     Returns:
-        smoothed signal (same length as input)
+        smoothed signal (same length and container type as input)
     """
-    if not signal or window_size <= 1:
+    if len(signal) == 0 or window_size <= 1:
         return signal
 
-    smoothed = []
-    half = window_size // 2
-
-    for i in range(len(signal)):
-        start = max(0, i - half)
-        end = min(len(signal), i + half + 1)
-        window = signal[start:end]
-        smoothed.append(sum(window) / len(window))
-
-    return smoothed
+    smoothed = rolling_mean(signal, window_size, centered=True)
+    if isinstance(signal, np.ndarray):
+        return smoothed.astype(signal.dtype, copy=False)
+    return smoothed.tolist()
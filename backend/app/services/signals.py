@@ -0,0 +1,170 @@
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+ArrayLike = Union[Sequence[float], np.ndarray]
+
+# Per-frame channels carried alongside the shared time axis.
+CHANNELS = (
+    "motion",
+    "motion_smooth",
+    "interaction",
+    "entropy",
+    "audio_energy",
+    "audio_flux",
+)
+
+# Model input columns, in the order the LightGBM model was trained on.
+FEATURE_CHANNELS = (
+    "motion",
+    "interaction",
+    "entropy",
+    "audio_energy",
+    "audio_flux",
+)
+
+
+def as_float32(values: ArrayLike) -> np.ndarray:
+    """View `values` as a 1D float32 array, copying only when needed."""
+    array = np.asarray(values, dtype=np.float32)
+    return array if array.ndim == 1 else array.reshape(-1)
+
+
+def align_to(
+    target_times: ArrayLike,
+    source_times: ArrayLike,
+    source_values: ArrayLike,
+) -> np.ndarray:
+    """
+    Linearly resample `source_values` onto `target_times` as float32.
+    Values outside the source range (or a missing source) become 0.
+    """
+    target = np.asarray(target_times, dtype=np.float64)
+    if len(source_times) == 0 or len(source_values) == 0:
+        return np.zeros(target.size, dtype=np.float32)
+    return np.interp(
+        target,
+        np.asarray(source_times, dtype=np.float64),
+        np.asarray(source_values, dtype=np.float64),
+        left=0.0,
+        right=0.0,
+    ).astype(np.float32)
+
+
+class Signals:
+    """
+    Per-frame analysis signals sharing one time axis.
+
+    `t` is a float64 array of seconds; every channel in CHANNELS is either
+    None or a float32 array of the same length. Signals flow through the
+    pipeline as arrays and only become lists in `to_payload`.
+    """
+
+    __slots__ = ("t",) + CHANNELS
+
+    def __init__(
+        self,
+        t: ArrayLike,
+        motion: Optional[ArrayLike] = None,
+        motion_smooth: Optional[ArrayLike] = None,
+        interaction: Optional[ArrayLike] = None,
+        entropy: Optional[ArrayLike] = None,
+        audio_energy: Optional[ArrayLike] = None,
+        audio_flux: Optional[ArrayLike] = None,
+    ):
+        self.t = np.asarray(t, dtype=np.float64)
+        if self.t.ndim != 1:
+            self.t = self.t.reshape(-1)
+        channels = {
+            "motion": motion,
+            "motion_smooth": motion_smooth,
+            "interaction": interaction,
+            "entropy": entropy,
+            "audio_energy": audio_energy,
+            "audio_flux": audio_flux,
+        }
+        for name, values in channels.items():
+            if values is not None:
+                values = as_float32(values)
+                if values.size != self.t.size:
+                    raise ValueError(
+                        f"Signal '{name}' has {values.size} samples, "
+                        f"expected {self.t.size}."
+                    )
+            setattr(self, name, values)
+
+    def __len__(self) -> int:
+        return int(self.t.size)
+
+    def __repr__(self) -> str:
+        present = [name for name in CHANNELS if getattr(self, name) is not None]
+        return f"Signals(frames={len(self)}, channels={present})"
+
+    def channel(self, name: str) -> np.ndarray:
+        """Return a channel, or zeros if it was never set."""
+        values = getattr(self, name)
+        if values is None:
+            return np.zeros(self.t.size, dtype=np.float32)
+        return values
+
+    def with_channels(self, **channels: Optional[ArrayLike]) -> "Signals":
+        """Return a new Signals sharing unchanged arrays with this one."""
+        values = {name: getattr(self, name) for name in CHANNELS}
+        values.update(channels)
+        return Signals(self.t, **values)
+
+    def feature_matrix(self) -> np.ndarray:
+        """(frames, 5) float32 model input in FEATURE_CHANNELS order."""
+        if not len(self):
+            return np.empty((0, len(FEATURE_CHANNELS)), dtype=np.float32)
+        return np.stack(
+            [self.channel(name) for name in FEATURE_CHANNELS],
+            axis=1,
+        )
+
+    def to_payload(self, decimals: int = 6) -> Dict[str, List[float]]:
+        """
+        JSON-ready lists for the API result. This is the only place the
+        arrays are converted to Python lists.
+        """
+        def to_list(values: np.ndarray) -> List[float]:
+            return np.round(values.astype(np.float64), decimals).tolist()
+
+        motion = self.channel("motion")
+        smooth = self.motion_smooth if self.motion_smooth is not None else motion
+        return {
+            "t": to_list(self.t),
+            "motion_raw": to_list(motion),
+            "motion_smooth": to_list(smooth),
+            "interaction": to_list(self.channel("interaction")),
+            "entropy": to_list(self.channel("entropy")),
+            "audio_energy": to_list(self.channel("audio_energy")),
+            "audio_flux": to_list(self.channel("audio_flux")),
+        }
+
+    def save_npz(self, path: Union[str, Path, BinaryIO], **metadata: Any) -> None:
+        """Write the signals (and scalar metadata) to a compressed npz."""
+        arrays = {
+            name: getattr(self, name)
+            for name in CHANNELS
+            if getattr(self, name) is not None
+        }
+        np.savez_compressed(path, t=self.t, **arrays, **metadata)
+
+    @classmethod
+    def load_npz(
+        cls,
+        path: Union[str, Path, BinaryIO],
+    ) -> Tuple["Signals", Dict[str, Any]]:
+        """Load signals written by `save_npz`; returns (signals, metadata)."""
+        with np.load(path) as data:
+            channels = {
+                name: data[name] for name in CHANNELS if name in data.files
+            }
+            metadata = {
+                key: data[key].item()
+                for key in data.files
+                if key != "t" and key not in CHANNELS
+            }
+            return cls(data["t"], **channels), metadata
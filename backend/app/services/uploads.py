@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from fastapi import UploadFile
+
+from app.services.object_store import (
+    MultipartUpload,
+    delete_object,
+    head_object,
+    upload_bytes,
+)
+from app.services.result_cache import find_video, forget_video, remember_video
+
+# Request bodies are read this much at a time.
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# Object-store part size (S3 requires >= 5 MiB for all but the last part)
+# and how many parts may be in flight. Memory per upload stays around
+# (UPLOAD_MAX_PARTS_IN_FLIGHT + 1) * UPLOAD_PART_BYTES.
+UPLOAD_PART_BYTES = 8 * 1024 * 1024
+UPLOAD_MAX_PARTS_IN_FLIGHT = 4
+
+# Direct (presigned) uploads: files above the threshold are sent by the
+# browser as multipart parts, so a dropped connection only costs a part.
+DIRECT_MULTIPART_THRESHOLD = 100 * 1024 * 1024
+DIRECT_PART_BYTES = 64 * 1024 * 1024
+MAX_PARTS = 10000
+
+
+@dataclass
+class StoredUpload:
+    size: int
+    sha256: str
+
+
+def plan_direct_parts(size: Optional[int]) -> Optional[Tuple[int, int]]:
+    """
+    (part_size, part_count) for a direct upload of `size` bytes, or None
+    when a single presigned PUT will do.
+    """
+    if size is None or size <= DIRECT_MULTIPART_THRESHOLD:
+        return None
+    part_size = max(DIRECT_PART_BYTES, -(-size // MAX_PARTS))
+    return part_size, -(-size // part_size)
+
+def _write_chunk(handle: BinaryIO, hasher, chunk: bytes) -> None:
+    hasher.update(chunk)
+    handle.write(chunk)
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+async def save_upload_to_path(
+    file: UploadFile,
+    destination: str,
+    chunk_bytes: int = UPLOAD_CHUNK_BYTES,
+) -> StoredUpload:
+    """
+    Copy an upload to `destination` chunk by chunk, hashing as it goes.
+    Disk writes run in the threadpool so the event loop never blocks on
+    them. The file only appears at `destination` once it is complete.
+    """
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    partial = f"{destination}.part"
+    hasher = hashlib.sha256()
+    size = 0
+    handle = await asyncio.to_thread(open, partial, "wb")
+    try:
+        while chunk := await file.read(chunk_bytes):
+            size += len(chunk)
+            await asyncio.to_thread(_write_chunk, handle, hasher, chunk)
+        await asyncio.to_thread(handle.close)
+        os.replace(partial, destination)
+    except BaseException:
+        handle.close()
+        _remove_quietly(partial)
+        raise
+    return StoredUpload(size=size, sha256=hasher.hexdigest())
+
+async def save_upload_to_object_store(
+    file: UploadFile,
+    key: str,
+    content_type: Optional[str] = None,
+    chunk_bytes: int = UPLOAD_CHUNK_BYTES,
+    part_bytes: int = UPLOAD_PART_BYTES,
+    max_parts_in_flight: int = UPLOAD_MAX_PARTS_IN_FLIGHT,
+) -> StoredUpload:
+    """
+    Stream an upload to the object store as a multipart upload, hashing
+    as it goes. At most `max_parts_in_flight` parts are being sent at any
+    time; reading the request waits for a free slot. Uploads smaller than
+    one part are sent with a single PUT instead.
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    buffer = bytearray()
+    upload: Optional[MultipartUpload] = None
+    slots = asyncio.Semaphore(max_parts_in_flight)
+    pending: List[asyncio.Task] = []
+
+    async def send_part(part_number: int, data: bytes) -> None:
+        try:
+            await asyncio.to_thread(upload.upload_part, part_number, data)
+        finally:
+            slots.release()
+
+    async def flush_part() -> None:
+        nonlocal buffer, upload
+        if upload is None:
+            upload = await asyncio.to_thread(MultipartUpload, key, content_type)
+        await slots.acquire()
+        failed = [task for task in pending if task.done() and task.exception()]
+        if failed:
+            slots.release()
+            raise failed[0].exception()
+        data, buffer = bytes(buffer), bytearray()
+        pending.append(asyncio.create_task(send_part(len(pending) + 1, data)))
+
+    try:
+        while chunk := await file.read(chunk_bytes):
+            size += len(chunk)
+            hasher.update(chunk)
+            buffer += chunk
+            if len(buffer) >= part_bytes:
+                await flush_part()
+
+        if upload is None:
+            await asyncio.to_thread(upload_bytes, key, bytes(buffer), content_type)
+        else:
+            if buffer:
+                await flush_part()
+            await asyncio.gather(*pending)
+            await asyncio.to_thread(upload.complete)
+    except BaseException:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if upload is not None:
+            await asyncio.to_thread(upload.abort)
+        raise
+    return StoredUpload(size=size, sha256=hasher.hexdigest())
+
+def _copy_exists(stored: Dict[str, str]) -> bool:
+    if stored["backend"] == "r2":
+        return head_object(stored["key"]) is not None
+    return os.path.exists(stored["key"])
+
+def _delete_copy(stored: Dict[str, str]) -> None:
+    if stored["backend"] == "r2":
+        delete_object(stored["key"])
+    else:
+        _remove_quietly(stored["key"])
+
+def keep_single_copy(content_sha256: str, stored: Dict[str, str]) -> Dict[str, str]:
+    """
+    Deduplicate a freshly stored upload (`backend`, `key`, `url`) by
+    content. If an earlier copy of the same video still exists on the same
+    backend, the new copy is deleted and the earlier one returned;
+    otherwise the new copy is recorded for later uploads and returned.
+    """
+    existing = find_video(content_sha256)
+    if (
+        existing is not None
+        and existing["key"] != stored["key"]
+        and existing["backend"] == stored["backend"]
+    ):
+        if _copy_exists(existing):
+            _delete_copy(stored)
+            return existing
+        forget_video(content_sha256)
+    remember_video(content_sha256, stored)
+    return stored
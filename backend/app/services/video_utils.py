@@ -1,29 +1,140 @@
+import json
 import os
+import struct
 import subprocess
-from typing import Optional, Tuple
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.analysis_settings import ANALYSIS_SHORT_SIDE
+
+# Top-level boxes an ISO-BMFF file (MP4, MOV, M4V) can start with.
+_ISOBMFF_FIRST_BOXES = (b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide")
+# How much of the file head is fetched at once, and how many top-level
+# boxes are walked before giving up.
+_CONTAINER_SCAN_BYTES = 64 * 1024
+_CONTAINER_MAX_BOXES = 32
+
+
+class TruncatedStreamError(subprocess.CalledProcessError):
+    """ffmpeg failed after it had already produced some output."""
+
+
+def ffmpeg_input_args(video_path: str) -> List[str]:
+    """
+    The `-i` arguments for an input. URLs (presigned object-store links)
+    reconnect after a dropped connection instead of ending the stream
+    early, so a network blip does not silently truncate the analysis.
+    """
+    args = []
+    if video_path.startswith(("http://", "https://")):
+        args += [
+            "-reconnect", "1",
+            "-reconnect_streamed", "1",
+            "-reconnect_on_network_error", "1",
+            "-reconnect_delay_max", "10",
+        ]
+    return args + ["-i", video_path]
+
+
+def analysis_size(
+    width: int,
+    height: int,
+    short_side: Optional[int] = None,
+) -> Tuple[int, int]:
+    """
+    Return the (width, height) frames are decoded at for analysis.
+    Frames are only ever downscaled; dimensions are kept even.
+    """
+    if short_side is None:
+        short_side = ANALYSIS_SHORT_SIDE
+    if short_side <= 0 or min(width, height) <= short_side:
+        return width, height
+
+    scale = short_side / float(min(width, height))
+    scaled_w = max(2, int(round(width * scale / 2.0)) * 2)
+    scaled_h = max(2, int(round(height * scale / 2.0)) * 2)
+    return scaled_w, scaled_h
+
+
+def _frame_filter(
+    fps: int,
+    size: Optional[Tuple[int, int]],
+    target: Optional[Tuple[int, int]],
+) -> str:
+    filters = [f"fps={fps}"]
+    if size is not None and target is not None and target != size:
+        filters.append(f"scale={target[0]}:{target[1]}:flags=area")
+    return ",".join(filters)
+
+
+def is_streamable_container(read_at: Callable[[int, int], bytes]) -> bool:
+    """
+    Whether a video can be decoded front to back as it arrives.
+
+    `read_at(offset, length)` returns up to `length` bytes of the file from
+    `offset` (a ranged GET for remote objects). MP4/MOV files are only
+    streamable when their `moov` index precedes the media data; with a
+    trailing `moov` the decoder has to seek to the end first. Other
+    containers (WebM/Matroska, MPEG-TS, ...) are treated as streamable.
+    """
+    head = read_at(0, _CONTAINER_SCAN_BYTES)
+    if len(head) < 8 or head[4:8] not in _ISOBMFF_FIRST_BOXES:
+        return True
+
+    offset = 0
+    for _ in range(_CONTAINER_MAX_BOXES):
+        if offset + 16 <= len(head):
+            header = head[offset:offset + 16]
+        else:
+            header = read_at(offset, 16)
+        if len(header) < 8:
+            return False
+        size, kind = struct.unpack(">I4s", header[:8])
+        if kind == b"moov":
+            return True
+        if kind == b"mdat":
+            return False
+        if size == 1 and len(header) == 16:
+            size = struct.unpack(">Q", header[8:16])[0]
+        if size < 8:
+            # Size 0 (box runs to the end of the file) or a corrupt header.
+            return False
+        offset += size
+    return False
+
 
 def extract_frames(
     video_path: str,
     output_dir: str,
     fps: int = 5,
+    short_side: Optional[int] = None,
 ) -> Tuple[int, int]:
     """
-    Extract frames from a video using ffmpeg.
+    Extract frames from a video using ffmpeg, downscaled to the analysis
+    resolution (see `analysis_size`).
 
     Returns:
         (frames_extracted, fps_used)
     """
     os.makedirs(output_dir, exist_ok=True)
 
+    size = probe_video_size(video_path)
+    target = (
+        analysis_size(size[0], size[1], short_side)
+        if size is not None
+        else None
+    )
+
     # ffmpeg command:
     # -i input video
-    # -vf fps=FPS → sample frames
+    # -vf fps=FPS[,scale=W:H] → sample (and downscale) frames
     # frame_%06d.jpg → zero-padded filenames
     cmd = [
         "ffmpeg",
         "-y",                  # overwrite existing files
         "-i", video_path,
-        "-vf", f"fps={fps}",
+        "-vf", _frame_filter(fps, size, target),
         os.path.join(output_dir, "frame_%06d.jpg"),
     ]
 
@@ -43,6 +154,132 @@ def extract_frames(
     return len(frames), fps
 
 
+def probe_video_size(video_path: str) -> Optional[Tuple[int, int]]:
+    """
+    Probe the display size (width, height) of the first video stream.
+    Accounts for rotation metadata, since ffmpeg auto-rotates on decode.
+    Returns None if probing fails.
+    """
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries",
+        "stream=width,height:stream_tags=rotate:stream_side_data=rotation",
+        "-of", "json",
+        video_path,
+    ]
+    try:
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        streams = json.loads(result.stdout).get("streams", [])
+    except (subprocess.SubprocessError, FileNotFoundError, ValueError):
+        return None
+
+    if not streams:
+        return None
+    stream = streams[0]
+    try:
+        width = int(stream["width"])
+        height = int(stream["height"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if width <= 0 or height <= 0:
+        return None
+
+    rotation = stream.get("tags", {}).get("rotate")
+    for side_data in stream.get("side_data_list", []):
+        if "rotation" in side_data:
+            rotation = side_data["rotation"]
+    try:
+        quarter_turns = int(round(float(rotation or 0) / 90.0))
+    except (TypeError, ValueError):
+        quarter_turns = 0
+    if quarter_turns % 2:
+        width, height = height, width
+
+    return width, height
+
+
+def iter_gray_frames(
+    video_path: str,
+    fps: int = 5,
+    short_side: Optional[int] = None,
+    start_s: float = 0.0,
+    max_frames: Optional[int] = None,
+) -> Iterator[np.ndarray]:
+    """
+    Decode a video with ffmpeg and yield sampled frames as grayscale
+    uint8 arrays of shape (height, width), downscaled to the analysis
+    resolution (see `analysis_size`).
+
+    Frames are streamed over a pipe as raw video, so nothing is written
+    to disk and only the frame being read is held by this generator.
+    `start_s` seeks before decoding and `max_frames` stops after that many
+    sampled frames, which lets callers decode a time range of the video.
+    """
+    size = probe_video_size(video_path)
+    if size is None:
+        raise RuntimeError(f"Unable to probe video size for {video_path}")
+    width, height = analysis_size(size[0], size[1], short_side)
+
+    cmd = ["ffmpeg", "-nostdin"]
+    if start_s > 0:
+        cmd += ["-ss", f"{start_s:.6f}"]
+    cmd += ffmpeg_input_args(video_path)
+    cmd += [
+        "-an",
+        "-vf", _frame_filter(fps, size, (width, height)) + ",format=gray",
+    ]
+    if max_frames is not None:
+        cmd += ["-frames:v", str(max_frames)]
+    cmd += [
+        "-f", "rawvideo",
+        "-pix_fmt", "gray",
+        "pipe:1",
+    ]
+    frame_bytes = width * height
+
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    frames_read = 0
+    reached_end = False
+    try:
+        while True:
+            frame = np.empty((height, width), dtype=np.uint8)
+            view = memoryview(frame).cast("B")
+            filled = 0
+            while filled < frame_bytes:
+                count = proc.stdout.readinto(view[filled:])
+                if not count:
+                    break
+                filled += count
+            if filled < frame_bytes:
+                break
+            frames_read += 1
+            yield frame
+        reached_end = True
+    finally:
+        # Only a consumer that stops early gets here with ffmpeg running.
+        if not reached_end and proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        returncode = proc.wait()
+
+    # ffmpeg ended on its own: anything but success means the stream was
+    # cut short (e.g. a dropped connection), not that the video ended.
+    if returncode != 0:
+        error = TruncatedStreamError if frames_read else subprocess.CalledProcessError
+        raise error(returncode, cmd)
+
+
 def get_video_duration(video_path: str) -> Optional[float]:
     """
     Probe video duration in seconds using ffprobe.
@@ -0,0 +1,143 @@
+"""
+In-memory stand-ins shared by the tests: a Redis client covering the
+commands the job store and result cache use, and an object-store
+multipart upload.
+"""
+
+import json
+import threading
+import time
+
+
+class FakeRedis:
+    """Strings, hashes, sorted sets, counters and publish."""
+
+    def __init__(self):
+        self.strings = {}
+        self.hashes = {}
+        self.zsets = {}
+        self.commands = []
+        self.published = []
+
+    def get(self, key):
+        return self.strings.get(key)
+
+    def set(self, key, value):
+        self.strings[key] = value
+
+    def hset(self, key, mapping):
+        self.commands.append(("hset", key, dict(mapping)))
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def hsetnx(self, key, field, value):
+        record = self.hashes.setdefault(key, {})
+        if field in record:
+            return 0
+        record[field] = value
+        return 1
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hmget(self, key, fields):
+        self.commands.append(("hmget", key, list(fields)))
+        record = self.hashes.get(key, {})
+        return [record.get(name) for name in fields]
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.hashes.get(key, {}).pop(field, None)
+
+    def hincrby(self, key, field, amount):
+        record = self.hashes.setdefault(key, {})
+        record[field] = str(int(record.get(field, 0)) + amount)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.commands.append(("delete", key))
+            self.hashes.pop(key, None)
+            self.strings.pop(key, None)
+
+    def exists(self, *keys):
+        return sum(key in self.strings or key in self.hashes for key in keys)
+
+    def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def zpopmin(self, key, count):
+        zset = self.zsets.get(key, {})
+        popped = sorted(zset.items(), key=lambda item: item[1])[:count]
+        for name, _ in popped:
+            del zset[name]
+        return popped
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues commands and runs them in order on execute()."""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((getattr(self.client, name), args, kwargs))
+        return queue
+
+    def execute(self):
+        return [method(*args, **kwargs) for method, args, kwargs in self.calls]
+
+
+class FakeMultipartUpload:
+    """
+    Records parts, completion and aborts. Every instance is kept in
+    `instances`; reset it per test. Uploading part `fail_on_part` raises.
+    """
+
+    instances = []
+
+    def __init__(self, key, content_type=None, upload_id=None, fail_on_part=None):
+        self.key = key
+        self.upload_id = upload_id or "upload-1"
+        self.parts = {}
+        self.completed = False
+        self.etags = None
+        self.aborted = False
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.fail_on_part = fail_on_part
+        self._lock = threading.Lock()
+        FakeMultipartUpload.instances.append(self)
+
+    def presigned_part_url(self, part_number):
+        return f"https://bucket.test/{self.key}?partNumber={part_number}"
+
+    def upload_part(self, part_number, data):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        time.sleep(0.01)
+        with self._lock:
+            self.in_flight -= 1
+        if part_number == self.fail_on_part:
+            raise RuntimeError("part failed")
+        self.parts[part_number] = data
+
+    def complete(self, etags=None):
+        self.completed = True
+        self.etags = etags
+
+    def abort(self):
+        self.aborted = True
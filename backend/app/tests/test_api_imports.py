@@ -0,0 +1,19 @@
+import os
+import sys
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+from app.benchmarks.bench_import_time import HEAVY_MODULES, measure_imports
+
+
+def test_api_does_not_import_ml_stack():
+    timings = measure_imports("app.main")
+
+    assert "app.main" in timings
+    assert "app.workers.tasks" not in timings
+    assert "app.services.model_store" not in timings
+    assert [name for name in HEAVY_MODULES if name in timings] == []
@@ -0,0 +1,115 @@
+import os
+import subprocess
+import sys
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+import numpy as np
+import pytest
+
+from app.ml.features import audio_features
+from app.services.video_utils import TruncatedStreamError
+
+
+def _tone_then_silence(sample_rate: int) -> np.ndarray:
+    t = np.arange(sample_rate) / sample_rate
+    tone = 0.5 * np.sin(2 * np.pi * 440.0 * t)
+    return np.concatenate([tone, np.zeros(sample_rate)]).astype(np.float32)
+
+
+def _fake_decoder(samples: np.ndarray, block_override=None):
+    def iter_blocks(audio_path, sample_rate, block_samples):
+        size = block_override or block_samples
+        for start in range(0, samples.size, size):
+            yield samples[start:start + size]
+    return iter_blocks
+
+
+def test_features_are_independent_of_block_size(monkeypatch):
+    samples = _tone_then_silence(8000)
+
+    results = []
+    for block in [None, 777, 50_000]:
+        monkeypatch.setattr(
+            audio_features,
+            "iter_pcm_blocks",
+            _fake_decoder(samples, block),
+        )
+        results.append(
+            audio_features.compute_audio_features(
+                "clip.mp4", fps=10.0, sample_rate=8000
+            )
+        )
+
+    for times, energy, flux in results[1:]:
+        assert np.array_equal(times, results[0][0])
+        assert np.allclose(energy, results[0][1], atol=1e-6)
+        assert np.allclose(flux, results[0][2], atol=1e-6)
+
+
+def test_one_frame_per_hop_aligned_to_fps(monkeypatch):
+    samples = _tone_then_silence(8000)
+    monkeypatch.setattr(
+        audio_features, "iter_pcm_blocks", _fake_decoder(samples)
+    )
+
+    times, energy, flux = audio_features.compute_audio_features(
+        "clip.mp4", fps=10.0, sample_rate=8000
+    )
+
+    assert times.size == 1 + samples.size // 800
+    assert times[1] == 0.1
+    assert energy.dtype == np.float32
+    assert energy.max() == 1.0
+    assert energy[-1] == 0.0
+    assert flux[0] == 0.0
+
+
+def test_empty_audio_returns_empty(monkeypatch):
+    monkeypatch.setattr(
+        audio_features,
+        "iter_pcm_blocks",
+        _fake_decoder(np.empty(0, dtype=np.float32)),
+    )
+    times, energy, flux = audio_features.compute_audio_features(
+        "clip.mp4", fps=10.0
+    )
+    assert times.size == energy.size == flux.size == 0
+
+
+def test_times_follow_the_audio_when_the_hop_is_rounded(monkeypatch):
+    # 16000 / 15 is not a whole number of samples, so the hop is rounded;
+    # a click 9 minutes in must still be reported 9 minutes in.
+    sample_rate, fps = 16000, 15.0
+    samples = np.zeros(600 * sample_rate, dtype=np.float32)
+    click = 540 * sample_rate
+    samples[click:click + 160] = 1.0
+    monkeypatch.setattr(
+        audio_features, "iter_pcm_blocks", _fake_decoder(samples)
+    )
+
+    times, energy, flux = audio_features.compute_audio_features(
+        "clip.mp4", fps=fps, sample_rate=sample_rate
+    )
+
+    assert abs(times[np.argmax(energy)] - 540.0) < 1.0 / fps
+    assert abs(times[-1] - 600.0) < 1.0 / fps
+
+
+def test_audio_cut_short_raises(monkeypatch):
+    script = "import sys; sys.stdout.buffer.write(bytes(4000)); sys.stdout.flush(); sys.exit(1)"
+    popen = subprocess.Popen
+    monkeypatch.setattr(
+        audio_features.subprocess, "Popen",
+        lambda cmd, **kwargs: popen([sys.executable, "-c", script], **kwargs),
+    )
+
+    samples = []
+    with pytest.raises(TruncatedStreamError):
+        for block in audio_features.iter_pcm_blocks("https://bucket/clip.mp4", 8000, 250):
+            samples.append(block.size)
+    assert sum(samples) == 1000
@@ -0,0 +1,189 @@
+import os
+import sys
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+from fastapi import HTTPException
+
+from app.api import routes
+from app.core.schemas import UploadCompleteRequest, UploadInitRequest
+from app.services import job_store, object_store, uploads
+from app.tests.fakes import FakeMultipartUpload, FakeRedis
+
+
+@pytest.fixture
+def bucket(monkeypatch, tmp_path):
+    """R2 configured with dummy credentials; presigning needs no network."""
+    for name, value in {
+        "R2_BUCKET": "videos",
+        "R2_ENDPOINT": "http://localhost:9000",
+        "R2_ACCESS_KEY_ID": "test",
+        "R2_SECRET_ACCESS_KEY": "test",
+        "R2_PUBLIC_URL": "https://cdn.test",
+    }.items():
+        monkeypatch.setattr(object_store, name, value)
+    monkeypatch.setattr(job_store, "_get_redis", lambda: None)
+    monkeypatch.setattr(job_store, "JOBS_DIR", str(tmp_path))
+
+    objects = {}
+    enqueued = []
+    monkeypatch.setattr(routes, "head_object", objects.get)
+    monkeypatch.setattr(
+        routes, "enqueue_analysis_job", lambda *args: enqueued.append(args)
+    )
+    monkeypatch.setattr(routes, "MultipartUpload", FakeMultipartUpload)
+    FakeMultipartUpload.instances = []
+    return objects, enqueued
+
+
+def test_small_uploads_get_one_presigned_put(bucket):
+    objects, enqueued = bucket
+
+    init = routes.init_direct_upload(
+        UploadInitRequest(filename="clip.webm", content_type="video/webm", size=1234)
+    )
+
+    url = urlparse(init.upload_url)
+    assert url.path == f"/videos/uploads/{init.job_id}.webm"
+    assert "X-Amz-Signature" in parse_qs(url.query)
+    assert init.headers == {"Content-Type": "video/webm"}
+    assert init.part_urls == []
+    assert job_store.read_job_fields(init.job_id)["status"] == "uploading"
+
+    with pytest.raises(HTTPException) as exc:
+        routes.complete_direct_upload(UploadCompleteRequest(job_id=init.job_id))
+    assert exc.value.status_code == 400
+    assert enqueued == []
+
+    objects[init.key] = {"size": 1234, "content_type": "video/webm", "etag": '"abc"'}
+    routes.complete_direct_upload(UploadCompleteRequest(job_id=init.job_id))
+
+    assert enqueued == [(init.job_id, "r2", init.key)]
+    record = job_store.read_job(init.job_id)
+    assert record["status"] == "queued"
+    assert record["storage"]["size"] == 1234
+    assert record["result"]["video"]["url"] == f"https://cdn.test/{init.key}"
+
+    # Completing again (a retry) returns the same job without a second run.
+    again = routes.complete_direct_upload(UploadCompleteRequest(job_id=init.job_id))
+    assert again.job_id == init.job_id
+    assert len(enqueued) == 1
+
+
+def test_large_uploads_get_part_urls(bucket):
+    objects, enqueued = bucket
+    size = uploads.DIRECT_MULTIPART_THRESHOLD + 5
+
+    init = routes.init_direct_upload(UploadInitRequest(filename="long.mp4", size=size))
+
+    assert init.upload_url is None
+    assert init.upload_id == "upload-1"
+    assert init.part_size * len(init.part_urls) >= size
+    assert init.part_size * (len(init.part_urls) - 1) < size
+
+    objects[init.key] = {"size": size, "content_type": "video/mp4", "etag": '"x-2"'}
+    parts = [{"part_number": 1, "etag": '"a"'}, {"part_number": 2, "etag": '"b"'}]
+    routes.complete_direct_upload(UploadCompleteRequest(job_id=init.job_id, parts=parts))
+
+    assert [
+        (upload.key, upload.upload_id, upload.etags)
+        for upload in FakeMultipartUpload.instances
+        if upload.completed
+    ] == [(init.key, "upload-1", {1: '"a"', 2: '"b"'})]
+    assert enqueued == [(init.job_id, "r2", init.key)]
+
+
+def test_size_mismatch_is_rejected(bucket):
+    objects, enqueued = bucket
+    init = routes.init_direct_upload(UploadInitRequest(filename="clip.mp4", size=10))
+    objects[init.key] = {"size": 9, "content_type": "video/mp4", "etag": '"e"'}
+
+    with pytest.raises(HTTPException) as exc:
+        routes.complete_direct_upload(UploadCompleteRequest(job_id=init.job_id))
+    assert exc.value.status_code == 400
+    assert enqueued == []
+
+
+def test_direct_uploads_need_object_storage(monkeypatch):
+    monkeypatch.setattr(object_store, "R2_BUCKET", None)
+    with pytest.raises(HTTPException) as exc:
+        routes.init_direct_upload(UploadInitRequest(filename="clip.mp4"))
+    assert exc.value.status_code == 409
+
+
+def test_part_plan_stays_within_the_part_limit():
+    assert uploads.plan_direct_parts(None) is None
+    assert uploads.plan_direct_parts(uploads.DIRECT_MULTIPART_THRESHOLD) is None
+    part_size, part_count = uploads.plan_direct_parts(5 * 1024 ** 4)
+    assert part_count <= uploads.MAX_PARTS
+    assert part_size * part_count >= 5 * 1024 ** 4
+
+
+def test_head_object_reports_missing_objects(bucket, monkeypatch):
+    client = boto3.client(
+        "s3",
+        endpoint_url="http://localhost:9000",
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+        region_name="auto",
+    )
+    monkeypatch.setattr(object_store, "_get_client", lambda: client)
+    with Stubber(client) as stub:
+        stub.add_client_error("head_object", service_error_code="404", http_status_code=404)
+        stub.add_response(
+            "head_object",
+            {"ContentLength": 42, "ContentType": "video/mp4", "ETag": '"e"'},
+            {"Bucket": "videos", "Key": "uploads/a.mp4"},
+        )
+        assert object_store.head_object("uploads/missing.mp4") is None
+        assert object_store.head_object("uploads/a.mp4") == {
+            "size": 42, "content_type": "video/mp4", "etag": '"e"'
+        }
+
+
+@pytest.mark.parametrize("backend", ["file", "redis"])
+def test_concurrent_completions_queue_once(bucket, monkeypatch, backend):
+    objects, enqueued = bucket
+    if backend == "redis":
+        client = FakeRedis()
+        monkeypatch.setattr(job_store, "_get_redis", lambda: client)
+    init = routes.init_direct_upload(UploadInitRequest(filename="clip.mp4", size=10))
+    objects[init.key] = {"size": 10, "content_type": "video/mp4", "etag": '"e"'}
+
+    # Both requests read the job while it is still "uploading".
+    read_job_fields = routes.read_job_fields
+    snapshot = read_job_fields(init.job_id, ("status", "storage", "upload_completed"))
+    monkeypatch.setattr(routes, "read_job_fields", lambda *args: dict(snapshot))
+
+    first = routes.complete_direct_upload(UploadCompleteRequest(job_id=init.job_id))
+    second = routes.complete_direct_upload(UploadCompleteRequest(job_id=init.job_id))
+
+    assert first.job_id == second.job_id == init.job_id
+    assert enqueued == [(init.job_id, "r2", init.key)]
+    assert read_job_fields(init.job_id)["status"] == "queued"
+
+
+def test_failed_enqueue_can_be_retried(bucket, monkeypatch):
+    objects, enqueued = bucket
+    init = routes.init_direct_upload(UploadInitRequest(filename="clip.mp4", size=10))
+    objects[init.key] = {"size": 10, "content_type": "video/mp4", "etag": '"e"'}
+
+    def broker_down(*args):
+        raise ConnectionError("broker down")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(routes, "enqueue_analysis_job", broker_down)
+        with pytest.raises(ConnectionError):
+            routes.complete_direct_upload(UploadCompleteRequest(job_id=init.job_id))
+    assert job_store.read_job_fields(init.job_id)["status"] == "uploading"
+
+    routes.complete_direct_upload(UploadCompleteRequest(job_id=init.job_id))
+    assert enqueued == [(init.job_id, "r2", init.key)]
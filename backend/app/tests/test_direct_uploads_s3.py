@@ -0,0 +1,161 @@
+import os
+import sys
+import urllib.request
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+
+from app.api import routes
+from app.core.schemas import (
+    UploadCompleteRequest,
+    UploadedPart,
+    UploadInitRequest,
+)
+from app.services import job_store, object_store, s3_clients, uploads
+
+moto_server = pytest.importorskip("moto.server")
+
+MIB = 1024 * 1024
+
+
+@pytest.fixture(scope="module")
+def s3_endpoint():
+    """A local S3 (moto) that the presigned URLs are really sent to."""
+    server = moto_server.ThreadedMotoServer(
+        ip_address="127.0.0.1", port=0, verbose=False
+    )
+    server.start()
+    host, port = server.get_host_and_port()
+    endpoint = f"http://{host}:{port}"
+    yield endpoint
+    server.stop()
+
+
+@pytest.fixture
+def bucket(monkeypatch, tmp_path, s3_endpoint):
+    name = f"videos-{tmp_path.name}".lower().replace("_", "-")[:63]
+    boto3.client(
+        "s3",
+        endpoint_url=s3_endpoint,
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+        region_name="us-east-1",
+    ).create_bucket(Bucket=name)
+    for setting, value in {
+        "R2_BUCKET": name,
+        "R2_ENDPOINT": s3_endpoint,
+        "R2_ACCESS_KEY_ID": "test",
+        "R2_SECRET_ACCESS_KEY": "test",
+        "R2_PUBLIC_URL": "https://cdn.test",
+    }.items():
+        monkeypatch.setattr(object_store, setting, value)
+    monkeypatch.setattr(s3_clients, "_clients", {})
+    monkeypatch.setattr(job_store, "_get_redis", lambda: None)
+    monkeypatch.setattr(job_store, "JOBS_DIR", str(tmp_path))
+
+    enqueued = []
+    monkeypatch.setattr(
+        routes, "enqueue_analysis_job", lambda *args: enqueued.append(args)
+    )
+    return enqueued
+
+
+def _put(url, data, headers=None):
+    """PUT like the browser does; returns the response headers."""
+    # urllib would otherwise label the body as a form.
+    headers = {"Content-Type": "application/octet-stream", **(headers or {})}
+    request = urllib.request.Request(url, data=data, method="PUT", headers=headers)
+    with urllib.request.urlopen(request) as response:
+        return response.headers
+
+
+def test_presigned_put_stores_the_object_with_its_content_type(bucket):
+    enqueued = bucket
+    data = os.urandom(4096)
+
+    init = routes.init_direct_upload(
+        UploadInitRequest(filename="clip.webm", content_type="video/webm", size=len(data))
+    )
+    # The Content-Type is part of the signature, so the browser must send it.
+    signed = parse_qs(urlparse(init.upload_url).query)["X-Amz-SignedHeaders"][0]
+    assert "content-type" in signed.split(";")
+
+    _put(init.upload_url, data, init.headers)
+    routes.complete_direct_upload(UploadCompleteRequest(job_id=init.job_id))
+
+    assert enqueued == [(init.job_id, "r2", init.key)]
+    stored = object_store.head_object(init.key)
+    assert stored["size"] == len(data)
+    assert stored["content_type"] == "video/webm"
+    assert object_store.download_bytes(init.key) == data
+    assert job_store.read_job(init.job_id)["storage"]["etag"] == stored["etag"]
+
+
+def test_presigned_parts_complete_with_the_etags_the_client_reports(
+    bucket, monkeypatch
+):
+    enqueued = bucket
+    monkeypatch.setattr(uploads, "DIRECT_MULTIPART_THRESHOLD", MIB)
+    monkeypatch.setattr(uploads, "DIRECT_PART_BYTES", 5 * MIB)
+    data = os.urandom(5 * MIB + 12345)
+
+    init = routes.init_direct_upload(
+        UploadInitRequest(filename="clip.mp4", content_type="video/mp4", size=len(data))
+    )
+    assert init.upload_url is None
+    assert init.part_size == 5 * MIB
+    assert len(init.part_urls) == 2
+
+    parts = []
+    for number, url in enumerate(init.part_urls, start=1):
+        chunk = data[(number - 1) * init.part_size:number * init.part_size]
+        etag = _put(url, chunk)["ETag"]
+        parts.append(UploadedPart(part_number=number, etag=etag))
+
+    # A made-up ETag is refused by S3; the job stays open for a retry.
+    bad = [parts[0], UploadedPart(part_number=2, etag='"0000"')]
+    with pytest.raises(ClientError):
+        routes.complete_direct_upload(
+            UploadCompleteRequest(job_id=init.job_id, parts=bad)
+        )
+    assert enqueued == []
+    assert job_store.read_job_fields(init.job_id)["status"] == "uploading"
+
+    routes.complete_direct_upload(
+        UploadCompleteRequest(job_id=init.job_id, parts=parts)
+    )
+
+    assert enqueued == [(init.job_id, "r2", init.key)]
+    stored = object_store.head_object(init.key)
+    assert stored["size"] == len(data)
+    assert stored["content_type"] == "video/mp4"
+    assert object_store.download_bytes(init.key) == data
+
+
+def test_a_short_upload_is_refused_by_the_size_check(bucket):
+    enqueued = bucket
+
+    init = routes.init_direct_upload(
+        UploadInitRequest(filename="clip.mp4", content_type="video/mp4", size=2048)
+    )
+    _put(init.upload_url, b"x" * 1000, init.headers)
+
+    with pytest.raises(HTTPException) as exc:
+        routes.complete_direct_upload(UploadCompleteRequest(job_id=init.job_id))
+    assert exc.value.status_code == 400
+    assert "1000" in exc.value.detail
+    assert enqueued == []
+
+    # After re-uploading the whole file, the same job completes.
+    _put(init.upload_url, b"x" * 2048, init.headers)
+    routes.complete_direct_upload(UploadCompleteRequest(job_id=init.job_id))
+    assert enqueued == [(init.job_id, "r2", init.key)]
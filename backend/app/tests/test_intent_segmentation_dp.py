@@ -59,3 +59,13 @@ def test_execute_on_spike_region():
     segments = segment_intent_phases(times, motion)
 
     assert any(seg["phase"] == "Execute" for seg in segments)
+
+
+def test_reasons_report_segment_window_stats():
+    times = [i * 0.2 for i in range(100)]
+    motion = [0.1] * 50 + [0.8] * 5 + [0.1] * 45
+    segments = segment_intent_phases(times, motion)
+
+    execute = next(seg for seg in segments if seg["phase"] == "Execute")
+    assert "peak 0.80" in execute["why"]
+    assert "avg motion 0.1" in segments[0]["why"]
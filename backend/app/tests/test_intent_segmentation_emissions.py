@@ -0,0 +1,147 @@
+import os
+import sys
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+from typing import Dict
+
+import numpy as np
+
+from app.services.intent_segmentation import (
+    _PHASES,
+    _decode_phase_indices,
+    _emission_scores,
+    _transition_penalty_matrix,
+)
+
+
+THRESHOLDS = {"low": 0.22, "pursue": 0.30, "spike": 0.40}
+
+
+def _reference_emission(
+    phase: str,
+    m: float,
+    prev_phase: str,
+    thr: Dict[str, float],
+    interaction_t: float,
+    entropy_t: float,
+    use_multisignal: bool,
+) -> float:
+    """The original per-frame emission rules."""
+    low = thr["low"]
+    pursue = thr["pursue"]
+    spike = thr["spike"]
+
+    if phase == "Explore":
+        score = 0.0
+        if m < low:
+            score += 2.0
+        if low <= m < pursue:
+            score += 0.8
+        if m >= spike:
+            score -= 2.0
+        if use_multisignal:
+            if entropy_t >= 0.6:
+                score += 0.8
+            if interaction_t <= 0.25:
+                score += 0.5
+            if interaction_t >= 0.6 and m >= pursue:
+                score -= 0.8
+        return score
+
+    if phase == "Pursue":
+        score = 0.0
+        if pursue <= m < spike:
+            score += 2.0
+        if low <= m < pursue:
+            score += 0.8
+        if m < low:
+            score -= 1.5
+        if m >= spike:
+            score -= 1.0
+        if use_multisignal:
+            if 0.35 <= interaction_t < 0.7:
+                score += 0.8
+            if interaction_t <= 0.25:
+                score -= 0.6
+            if entropy_t >= 0.75:
+                score -= 0.6
+            if prev_phase == "Outcome":
+                score -= 1.0
+        return score
+
+    if phase == "Execute":
+        score = 3.0 if m >= spike else -2.0
+        if use_multisignal:
+            if interaction_t >= 0.6:
+                score += 1.2
+            if interaction_t <= 0.3:
+                score -= 1.5
+            if entropy_t >= 0.8:
+                score -= 1.2
+            if interaction_t <= 0.3 and entropy_t >= 0.4:
+                score -= 2.0
+            if interaction_t <= 0.25 and entropy_t >= 0.7:
+                score -= 2.0
+        return score
+
+    if phase == "Outcome":
+        score = 0.0
+        if prev_phase == "Execute" and m < low:
+            score += 2.5
+        if prev_phase == "Outcome" and m < pursue:
+            score += 1.2
+        if use_multisignal:
+            if m < low and interaction_t <= 0.25:
+                score += 1.0
+            if m < low and entropy_t <= 0.35:
+                score += 0.8
+            if interaction_t >= 0.5:
+                score -= 1.2
+            if entropy_t >= 0.6:
+                score -= 1.2
+        if score == 0.0:
+            score = -2.0
+        return score
+
+    return -2.0
+
+
+def _signals(rng, steps):
+    # Quantized values land exactly on the rule boundaries.
+    motion = np.round(rng.random(steps) * 20) / 20
+    interaction = np.round(rng.random(steps) * 20) / 20
+    entropy = np.round(rng.random(steps) * 20) / 20
+    return motion, interaction, entropy
+
+
+def test_emission_tensor_matches_scalar_rules():
+    rng = np.random.default_rng(5)
+    motion, interaction, entropy = _signals(rng, 400)
+    for use_multisignal in (False, True):
+        scores = _emission_scores(
+            motion, interaction, entropy, THRESHOLDS, use_multisignal
+        )
+        assert scores.shape == (400, len(_PHASES), len(_PHASES))
+        for t in range(400):
+            for p, prev in enumerate(_PHASES):
+                for c, curr in enumerate(_PHASES):
+                    assert scores[t, p, c] == _reference_emission(
+                        curr,
+                        motion[t],
+                        prev,
+                        THRESHOLDS,
+                        interaction[t],
+                        entropy[t],
+                        use_multisignal,
+                    )
+
+
+def test_decode_prefers_lowest_index_on_ties():
+    emissions = np.zeros((6, len(_PHASES), len(_PHASES)))
+    path = _decode_phase_indices(emissions, _transition_penalty_matrix())
+    assert path.tolist() == [0] * 6
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+from app.services import job_events, job_store
+from app.tests.fakes import FakeRedis
+
+
+class FakeBroker(FakeRedis):
+    """Redis stand-in: job hashes for the sync store, pub/sub for asyncio."""
+
+    def __init__(self):
+        super().__init__()
+        self.subscribers = {}
+
+    def publish(self, channel, message):
+        for queue in self.subscribers.get(channel, []):
+            queue.put_nowait(message)
+
+    # Async client used by job_events.
+    def pubsub(self):
+        return FakePubSub(self)
+
+
+class FakePubSub:
+    def __init__(self, broker):
+        self.broker = broker
+        self.queue = asyncio.Queue()
+        self.channels = []
+
+    async def subscribe(self, channel):
+        self.channels.append(channel)
+        self.broker.subscribers.setdefault(channel, []).append(self.queue)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=None):
+        try:
+            data = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return {"type": "message", "channel": self.channels[0], "data": data}
+
+    async def unsubscribe(self):
+        for channel in self.channels:
+            self.broker.subscribers[channel].remove(self.queue)
+        self.channels = []
+
+    async def aclose(self):
+        pass
+
+
+def _parse(stream_chunks):
+    return [
+        json.loads(chunk[len("data: "):])
+        for chunk in stream_chunks
+        if chunk.startswith("data: ")
+    ]
+
+
+def test_many_subscribers_see_every_event_in_order(monkeypatch):
+    broker = FakeBroker()
+    monkeypatch.setattr(job_store, "_get_redis", lambda: broker)
+
+    async def scenario():
+        job_store.write_job("j1", {"job_id": "j1", "status": "queued", "progress": 0.0})
+        streams = [job_events.job_events("j1", client=broker) for _ in range(200)]
+        snapshots = await asyncio.gather(*(stream.__anext__() for stream in streams))
+
+        async def rest(stream):
+            return [chunk async for chunk in stream]
+
+        tasks = [asyncio.create_task(rest(stream)) for stream in streams]
+        for step in range(1, 50):
+            job_store.update_job("j1", {"status": "processing", "progress": step / 50})
+            if step % 7 == 0:
+                await asyncio.sleep(0)
+        job_store.update_job("j1", {"status": "done", "progress": 1.0, "result": {}})
+        chunks = await asyncio.wait_for(asyncio.gather(*tasks), timeout=10)
+        return [[first] + more for first, more in zip(snapshots, chunks)]
+
+    results = asyncio.run(scenario())
+
+    expected = [0.0] + [step / 50 for step in range(1, 50)] + [1.0]
+    for chunks in results:
+        events = _parse(chunks)
+        assert [event["progress"] for event in events] == expected
+        assert events[-1]["status"] == "done"
+        assert events[-1]["result_ready"]
+        assert all("result" not in event for event in events)
+    assert broker.subscribers["job-events:j1"] == []
+
+
+def test_events_older_than_the_snapshot_are_dropped(monkeypatch):
+    broker = FakeBroker()
+    monkeypatch.setattr(job_store, "_get_redis", lambda: broker)
+    job_store.write_job("j1", {"job_id": "j1", "status": "processing", "progress": 0.5})
+
+    async def scenario():
+        stream = job_events.job_events("j1", client=broker)
+        first = await stream.__anext__()
+        # Published before the snapshot was read, delivered after it.
+        broker.publish("job-events:j1", json.dumps({"status": "processing", "progress": 0.3}))
+        job_store.update_job("j1", {"status": "error", "message": "boom"})
+        return [first] + [chunk async for chunk in stream]
+
+    events = _parse(asyncio.run(scenario()))
+    assert [(e["status"], e["progress"]) for e in events] == [
+        ("processing", 0.5),
+        ("error", 0.5),
+    ]
+
+
+def test_quiet_streams_send_keepalives(monkeypatch):
+    broker = FakeBroker()
+    monkeypatch.setattr(job_store, "_get_redis", lambda: broker)
+    job_store.write_job("j1", {"job_id": "j1", "status": "processing", "progress": 0.1})
+
+    async def scenario():
+        stream = job_events.job_events("j1", client=broker, keepalive_s=0.01)
+        chunks = [await stream.__anext__(), await stream.__anext__()]
+        await stream.aclose()
+        return chunks
+
+    chunks = asyncio.run(scenario())
+    assert chunks[1] == ": keepalive\n\n"
+    assert broker.subscribers["job-events:j1"] == []
+
+
+def test_file_store_falls_back_to_polling(monkeypatch, tmp_path):
+    monkeypatch.setattr(job_store, "_get_redis", lambda: None)
+    monkeypatch.setattr(job_store, "JOBS_DIR", str(tmp_path))
+    job_store.write_job("j1", {"job_id": "j1", "status": "processing", "progress": 0.2})
+
+    async def scenario():
+        stream = job_events.job_events("j1", poll_interval_s=0.01)
+        first = await stream.__anext__()
+        job_store.update_job("j1", {"status": "done", "progress": 1.0})
+        return [first] + [chunk async for chunk in stream]
+
+    events = _parse(asyncio.run(scenario()))
+    assert [e["status"] for e in events] == ["processing", "done"]
@@ -0,0 +1,129 @@
+import gzip
+import json
+import os
+import sys
+from collections import OrderedDict
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+import pytest
+from fastapi import HTTPException
+
+from app.api import routes
+from app.services import job_store
+
+RESULT = {"segments": [{"phase": "Explore", "start": 0.0, "end": 1.5}] * 100}
+
+
+@pytest.fixture
+def jobs(monkeypatch, tmp_path):
+    monkeypatch.setattr(job_store, "_get_redis", lambda: None)
+    monkeypatch.setattr(job_store, "JOBS_DIR", str(tmp_path))
+    monkeypatch.setattr(routes, "_gzip_cache", OrderedDict())
+    job_store.write_job("j1", {
+        "job_id": "j1",
+        "status": "processing",
+        "progress": 0.5,
+        "message": "Decoding video",
+        "result": None,
+    })
+    return job_store
+
+
+def test_status_never_includes_the_result(jobs):
+    status = routes.get_job_status("j1")
+    assert status.status == "processing"
+    assert status.progress == 0.5
+    assert not status.result_ready
+    assert "result" not in status.model_dump()
+
+    with pytest.raises(HTTPException) as exc:
+        routes.get_job_status("missing")
+    assert exc.value.status_code == 404
+
+
+def test_result_waits_for_the_job_to_finish(jobs):
+    with pytest.raises(HTTPException) as exc:
+        routes.get_job_result("j1")
+    assert exc.value.status_code == 409
+
+
+def test_result_is_served_with_etag_and_gzip(jobs):
+    jobs.update_job("j1", {"status": "done", "progress": 1.0, "result": RESULT})
+    assert routes.get_job_status("j1").result_ready
+
+    plain = routes.get_job_result("j1", if_none_match=None, accept_encoding=None)
+    assert plain.status_code == 200
+    assert json.loads(plain.body) == RESULT
+    assert "content-encoding" not in plain.headers
+    etag = plain.headers["etag"]
+
+    packed = routes.get_job_result("j1", if_none_match=None, accept_encoding="gzip, br")
+    assert packed.headers["content-encoding"] == "gzip"
+    assert packed.headers["etag"] == etag
+    assert gzip.decompress(packed.body) == plain.body
+
+    cached = routes.get_job_result("j1", if_none_match=f'"other", {etag}', accept_encoding=None)
+    assert cached.status_code == 304
+    assert cached.body == b""
+
+    jobs.update_job("j1", {"result": {"segments": []}})
+    changed = routes.get_job_result("j1", if_none_match=etag, accept_encoding=None)
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip", True),
+    ("br, GZIP;q=0.5", True),
+    ("x-gzip", True),
+    ("*", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0, br", False),
+    ("*;q=0", False),
+    ("gzip;q=0, *", False),
+    ("br, identity", False),
+    ("", False),
+    (None, False),
+])
+def test_gzip_follows_accept_encoding_q_values(accept_encoding, expected):
+    assert routes._accepts_gzip(accept_encoding) is expected
+
+
+def test_repeat_gzip_downloads_reuse_the_compressed_result(jobs, monkeypatch):
+    jobs.update_job("j1", {"status": "done", "progress": 1.0, "result": RESULT})
+    compressed = []
+    compress = gzip.compress
+    monkeypatch.setattr(
+        routes.gzip, "compress",
+        lambda data, **kwargs: compressed.append(data) or compress(data, **kwargs),
+    )
+
+    first = routes.get_job_result("j1", if_none_match=None, accept_encoding="gzip")
+    with monkeypatch.context() as patch:
+        patch.setattr(routes, "read_job_result_json", lambda job_id: pytest.fail())
+        again = routes.get_job_result("j1", if_none_match=None, accept_encoding="gzip")
+
+    assert len(compressed) == 1
+    assert again.body == first.body
+    assert again.headers["content-encoding"] == "gzip"
+    assert again.headers["etag"] == first.headers["etag"]
+
+    refused = routes.get_job_result("j1", if_none_match=None, accept_encoding="gzip;q=0")
+    assert refused.status_code == 200
+    assert "content-encoding" not in refused.headers
+
+
+def test_gzip_cache_drops_the_least_recently_sent(monkeypatch):
+    monkeypatch.setattr(routes, "_gzip_cache", OrderedDict())
+    monkeypatch.setattr(routes, "GZIP_CACHE_MAX_BYTES", 10)
+    routes._store_gzip('"a"', b"1234")
+    routes._store_gzip('"b"', b"1234")
+    assert routes._cached_gzip('"a"') == b"1234"
+    routes._store_gzip('"c"', b"1234")
+
+    assert list(routes._gzip_cache) == ['"a"', '"c"']
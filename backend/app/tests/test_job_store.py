@@ -0,0 +1,138 @@
+import json
+import os
+import sys
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+from app.services import job_store
+from app.tests.fakes import FakeRedis
+
+
+QUEUED = {
+    "job_id": "j1",
+    "status": "queued",
+    "progress": 0.0,
+    "message": "Queued for processing",
+    "result": {"video": {"url": "/videos/j1.mp4"}},
+}
+
+
+def test_progress_updates_leave_result_untouched(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(job_store, "_get_redis", lambda: client)
+
+    job_store.write_job("j1", QUEUED)
+    job_store.update_job("j1", {"status": "processing", "progress": 0.4})
+
+    assert client.commands[-1] == (
+        "hset", "job:j1", {"status": '"processing"', "progress": "0.4"}
+    )
+    record = job_store.read_job("j1")
+    assert record["status"] == "processing"
+    assert record["progress"] == 0.4
+    assert record["result"] == QUEUED["result"]
+    assert job_store.read_job("missing") is None
+
+
+def test_file_store_keeps_result_in_its_own_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(job_store, "_get_redis", lambda: None)
+    monkeypatch.setattr(job_store, "JOBS_DIR", str(tmp_path))
+
+    job_store.write_job("j1", QUEUED)
+    job_store.update_job("j1", {"status": "processing", "progress": 0.4})
+    job_store.update_job("j1", {"status": "done", "result": {"segments": []}})
+
+    assert os.path.exists(job_store.result_path("j1"))
+    record = job_store.read_job("j1")
+    assert record["status"] == "done"
+    assert record["progress"] == 0.4
+    assert record["result"] == {"segments": []}
+
+    job_store.write_job("j2", {"job_id": "j2", "status": "queued"})
+    assert job_store.read_job("j2") == {"job_id": "j2", "status": "queued"}
+
+
+def test_writes_publish_progress_without_the_result(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(job_store, "_get_redis", lambda: client)
+
+    job_store.write_job("j1", QUEUED)
+    job_store.update_job("j1", {"status": "processing", "progress": 0.4})
+    job_store.update_job("j1", {"result": {"segments": []}})
+
+    assert client.published == [
+        ("job-events:j1", {
+            "job_id": "j1",
+            "status": "queued",
+            "progress": 0.0,
+            "message": "Queued for processing",
+        }),
+        ("job-events:j1", {"job_id": "j1", "status": "processing", "progress": 0.4}),
+    ]
+
+
+def test_status_reads_skip_the_result(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(job_store, "_get_redis", lambda: client)
+
+    job_store.write_job("j1", QUEUED)
+    status = job_store.read_job_fields("j1")
+
+    assert "result" not in client.commands[-1][2]
+    assert status["status"] == "queued"
+    assert "result" not in status
+    raw = job_store.read_job_result_json("j1")
+    assert raw == '{"video": {"url": "/videos/j1.mp4"}}'
+    assert status["result_etag"] == job_store.result_etag(raw)
+    assert job_store.read_job_fields("missing") is None
+
+
+def test_file_store_status_and_result_reads(monkeypatch, tmp_path):
+    monkeypatch.setattr(job_store, "_get_redis", lambda: None)
+    monkeypatch.setattr(job_store, "JOBS_DIR", str(tmp_path))
+
+    job_store.write_job("j1", {"job_id": "j1", "status": "queued"})
+    assert job_store.read_job_result_json("j1") is None
+    job_store.update_job("j1", {"status": "done", "result": {"segments": []}})
+
+    raw = job_store.read_job_result_json("j1")
+    assert raw == '{"segments": []}'
+    assert job_store.read_job_fields("j1", ("status", "result_etag")) == {
+        "status": "done",
+        "result_etag": job_store.result_etag(raw),
+    }
+
+
+def test_redis_clients_share_one_pool(monkeypatch):
+    monkeypatch.setattr(job_store, "REDIS_URL", "redis://localhost:6379/0")
+    monkeypatch.setattr(job_store, "_pool", None)
+
+    first = job_store._get_redis()
+    second = job_store._get_redis()
+
+    assert first.connection_pool is second.connection_pool
+
+
+def test_legacy_string_records_are_moved_into_the_hash(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(job_store, "_get_redis", lambda: client)
+    # Written by the previous release: the whole record as a string.
+    client.set("j1", json.dumps(QUEUED))
+    client.set("j2", json.dumps({**QUEUED, "job_id": "j2"}))
+
+    assert job_store.read_job_fields("j1")["status"] == "queued"
+    assert job_store.read_job("j1")["result"] == QUEUED["result"]
+    assert client.get("j1") is None
+
+    # A worker's partial update keeps the rest of the legacy record.
+    job_store.update_job("j2", {"status": "processing", "progress": 0.5})
+    record = job_store.read_job("j2")
+    assert record["status"] == "processing"
+    assert record["progress"] == 0.5
+    assert record["job_id"] == "j2"
+    assert record["result"] == QUEUED["result"]
+    assert client.get("j2") is None
@@ -88,3 +88,34 @@ def test_segment_intent_phases_model_outputs_segments():
     assert segments[-1]["phase"] == "Outcome"
     assert segments[0]["start"] == 0.0
     assert segments[-1]["end"] == 5.0
+
+
+def test_model_bundle_is_cached_until_files_change(tmp_path, monkeypatch):
+    import app.services.learned_intent_segmentation as learned
+
+    model_path = tmp_path / "intent_lgbm.txt"
+    metadata_path = tmp_path / "metadata.json"
+    model_path.write_text("v1")
+    metadata_path.write_text('{"phases": ["explore", "execute"]}')
+
+    loads = []
+
+    def fake_load(model_path, metadata_path):
+        loads.append(model_path.read_text())
+        return ModelBundle(model=DummyModel([]), phases=["explore", "execute"])
+
+    monkeypatch.setattr(learned, "load_model_bundle", fake_load)
+
+    first = learned.get_model_bundle(model_path, metadata_path)
+    second = learned.get_model_bundle(model_path, metadata_path)
+    assert first is second
+    assert loads == ["v1"]
+
+    model_path.write_text("v2 with a new size")
+    third = learned.get_model_bundle(model_path, metadata_path)
+    assert third is not first
+    assert third.version != first.version
+    assert loads == ["v1", "v2 with a new size"]
+
+    model_path.unlink()
+    assert learned.get_model_bundle(model_path, metadata_path) is None
@@ -0,0 +1,131 @@
+import os
+import sys
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+from app.services import model_store, s3_clients
+
+
+class FakeS3:
+    def __init__(self, objects):
+        self.objects = objects
+        self.downloads = []
+
+    def head_object(self, Bucket, Key):
+        return {"ETag": self.objects[Key][0]}
+
+    def download_file(self, bucket, key, filename, Config=None):
+        self.downloads.append(key)
+        with open(filename, "w", encoding="utf-8") as handle:
+            handle.write(self.objects[key][1])
+
+
+def _configure(monkeypatch, tmp_path, client):
+    monkeypatch.setenv("MODEL_LOCAL_DIR", str(tmp_path))
+    monkeypatch.setenv("MODEL_S3_BUCKET", "models")
+    monkeypatch.setenv("MODEL_S3_ACCESS_KEY_ID", "key")
+    monkeypatch.setenv("MODEL_S3_SECRET_ACCESS_KEY", "secret")
+    for name in ["R2_BUCKET", "R2_ACCESS_KEY_ID", "R2_SECRET_ACCESS_KEY"]:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(s3_clients.boto3, "client", lambda *a, **k: client)
+    monkeypatch.setattr(s3_clients, "_clients", {})
+    monkeypatch.setattr(model_store, "_last_check", None)
+
+
+def test_model_is_refreshed_only_when_etag_changes(tmp_path, monkeypatch):
+    client = FakeS3({
+        "intent_lgbm.txt": ('"a"', "model v1"),
+        "metadata.json": ('"m"', "{}"),
+    })
+    _configure(monkeypatch, tmp_path, client)
+    monkeypatch.setattr(model_store, "MODEL_REFRESH_INTERVAL_S", 0.0)
+
+    model_path, metadata_path = model_store.download_model_if_needed()
+    assert model_path.read_text() == "model v1"
+    assert sorted(client.downloads) == ["intent_lgbm.txt", "metadata.json"]
+
+    client.downloads.clear()
+    model_store.download_model_if_needed()
+    assert client.downloads == []
+
+    client.objects["intent_lgbm.txt"] = ('"b"', "model v2")
+    new_model, new_metadata = model_store.download_model_if_needed()
+    assert client.downloads == ["intent_lgbm.txt"]
+    assert new_model.read_text() == "model v2"
+    assert new_metadata.read_text() == "{}"
+    assert not list(tmp_path.glob(".current.*"))
+
+
+def test_new_versions_are_swapped_in_as_a_whole(tmp_path, monkeypatch):
+    client = FakeS3({
+        "intent_lgbm.txt": ('"a"', "model v1"),
+        "metadata.json": ('"m"', '{"v": 1}'),
+    })
+    _configure(monkeypatch, tmp_path, client)
+    monkeypatch.setattr(model_store, "MODEL_REFRESH_INTERVAL_S", 0.0)
+    old_paths = model_store.download_model_if_needed()
+
+    for version in (2, 3, 4):
+        client.objects["intent_lgbm.txt"] = (f'"a{version}"', f"model v{version}")
+        client.objects["metadata.json"] = (f'"m{version}"', f'{{"v": {version}}}')
+        model_store.download_model_if_needed()
+        if version == 2:
+            # A reader that resolved the paths before the swap still gets
+            # a matching pair.
+            assert [path.read_text() for path in old_paths] == ["model v1", '{"v": 1}']
+
+    model_path, metadata_path = model_store.active_model_paths()
+    assert model_path.parent == metadata_path.parent
+    assert (model_path.read_text(), metadata_path.read_text()) == ("model v4", '{"v": 4}')
+    # The current version and one previous one are kept.
+    assert len(list((tmp_path / "versions").iterdir())) == 2
+
+
+def test_model_digests_keep_one_entry_per_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_store, "_digests", {})
+    model = tmp_path / "intent_lgbm.txt"
+    metadata = tmp_path / "metadata.json"
+    metadata.write_text("{}")
+
+    digests = set()
+    for version in range(5):
+        model.write_text("model" + "!" * version)
+        digests.add(model_store.model_digest((model, metadata)))
+
+    assert len(digests) == 5
+    assert len(model_store._digests) == 1
+
+
+def test_remote_checks_are_throttled(tmp_path, monkeypatch):
+    client = FakeS3({
+        "intent_lgbm.txt": ('"a"', "model v1"),
+        "metadata.json": ('"m"', "{}"),
+    })
+    _configure(monkeypatch, tmp_path, client)
+    monkeypatch.setattr(model_store, "MODEL_REFRESH_INTERVAL_S", 3600.0)
+
+    model_store.download_model_if_needed()
+    client.objects["intent_lgbm.txt"] = ('"b"', "model v2")
+    model_path, _ = model_store.download_model_if_needed()
+    assert model_path.read_text() == "model v1"
+
+
+def test_failed_refresh_keeps_local_copy(tmp_path, monkeypatch):
+    client = FakeS3({
+        "intent_lgbm.txt": ('"a"', "model v1"),
+        "metadata.json": ('"m"', "{}"),
+    })
+    _configure(monkeypatch, tmp_path, client)
+    monkeypatch.setattr(model_store, "MODEL_REFRESH_INTERVAL_S", 0.0)
+    model_store.download_model_if_needed()
+
+    def unavailable(Bucket, Key):
+        raise ConnectionError("offline")
+
+    client.head_object = unavailable
+    model_path, _ = model_store.download_model_if_needed()
+    assert model_path.read_text() == "model v1"
@@ -1,9 +1,12 @@
 import os
+import shutil
+import subprocess
 import sys
 import tempfile
 
 import cv2
 import numpy as np
+import pytest
 
 sys.path.append(
     os.path.abspath(
@@ -11,7 +14,43 @@ sys.path.append(
     )
 )
 
-from app.services.motion_utils import compute_motion_signal
+from app.services import motion_utils
+from app.services.motion_utils import (
+    MotionAccumulator,
+    accumulate_video_motion,
+    compute_motion_signal,
+    motion_features_batch,
+    compute_motion_signal_from_frames,
+)
+
+
+def _per_frame_features(prev_gray, gray):
+    """Reference: the original per-frame motion/interaction/entropy loop."""
+    diff = cv2.absdiff(gray, prev_gray)
+    motion = float(np.mean(diff))
+
+    h, w = diff.shape
+    cell_h = max(h // 4, 1)
+    cell_w = max(w // 4, 1)
+    cell_motions = []
+    for row in range(4):
+        for col in range(4):
+            y0 = row * cell_h
+            x0 = col * cell_w
+            y1 = h if row == 3 else (row + 1) * cell_h
+            x1 = w if col == 3 else (col + 1) * cell_w
+            cell = diff[y0:y1, x0:x1]
+            if cell.size == 0:
+                continue
+            cell_motions.append(float(np.mean(cell)))
+    interaction = float(np.std(cell_motions)) / (
+        float(np.mean(cell_motions)) + 1e-6
+    )
+
+    hist = cv2.calcHist([gray], [0], None, [32], [0, 256]).flatten()
+    probs = hist / float(np.sum(hist))
+    entropy = -float(np.sum(probs * np.log2(probs + 1e-12))) / np.log2(32)
+    return motion, interaction, entropy
 
 
 def _write_test_frame(path: str, value: int) -> None:
@@ -33,3 +72,126 @@ def test_compute_motion_signal_returns_seconds():
         assert len(motion) == 1
         assert len(interaction) == 1
         assert len(entropy) == 1
+
+
+def test_streamed_frames_match_frames_dir():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        grays = []
+        for i, value in enumerate([0, 120, 255, 60]):
+            path = os.path.join(tmp_dir, f"frame_{i + 1:06d}.jpg")
+            _write_test_frame(path, value)
+            grays.append(cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2GRAY))
+
+        expected = compute_motion_signal(tmp_dir, fps_used=5.0)
+
+    streamed = compute_motion_signal_from_frames(iter(grays), fps_used=5.0)
+
+    assert streamed == expected
+    assert streamed[0] == [0.2, 0.4, 0.6]
+
+
+def test_streamed_frames_need_two_frames():
+    frame = np.zeros((8, 8), dtype=np.uint8)
+    assert compute_motion_signal_from_frames([frame], fps_used=5.0) == (
+        [], [], [], []
+    )
+
+
+def test_concatenated_chunks_match_single_pass():
+    rng = np.random.default_rng(0)
+    frames = [
+        rng.integers(0, 256, size=(12, 16), dtype=np.uint8)
+        for _ in range(10)
+    ]
+
+    single = MotionAccumulator(fps_used=5.0)
+    for gray in frames:
+        single.add(gray)
+
+    parts = []
+    for start, stop in [(0, 4), (3, 7), (6, 10)]:
+        part = MotionAccumulator(fps_used=5.0)
+        for idx in range(start, stop):
+            part.add(frames[idx], index=idx)
+        parts.append(part)
+    stitched = MotionAccumulator.concatenate(parts)
+
+    assert stitched.frame_count == single.frame_count
+    assert stitched.finalize() == single.finalize()
+
+
+def test_batch_kernel_matches_per_frame_reference():
+    rng = np.random.default_rng(1)
+    for shape in [(1, 1), (2, 3), (3, 5), (7, 9), (36, 64), (45, 81)]:
+        frames = rng.integers(0, 256, size=(6,) + shape, dtype=np.uint8)
+        motion, interaction, entropy = motion_features_batch(frames)
+
+        assert motion.dtype == np.float32
+        assert len(motion) == len(frames) - 1
+        for k in range(1, len(frames)):
+            expected = _per_frame_features(frames[k - 1], frames[k])
+            actual = (motion[k - 1], interaction[k - 1], entropy[k - 1])
+            assert np.allclose(actual, expected, rtol=1e-6, atol=1e-7)
+
+
+def test_parallel_decode_reports_frame_progress(monkeypatch):
+    rng = np.random.default_rng(1)
+    frames = rng.integers(0, 256, size=(200, 12, 16), dtype=np.uint8)
+
+    def fake_frames(video_path, fps, short_side=None, start_s=0.0, max_frames=None):
+        start = int(round(start_s * fps))
+        stop = len(frames) if max_frames is None else start + max_frames
+        yield from frames[start:min(stop, len(frames))]
+
+    monkeypatch.setattr(motion_utils, "iter_gray_frames", fake_frames)
+    # The fake decoder only exists in this process, so workers are forked
+    # from it instead of started from the fork server.
+    monkeypatch.setattr(motion_utils, "DECODE_START_METHOD", "fork")
+    monkeypatch.setattr(motion_utils, "MIN_CHUNK_S", 5.0)
+    monkeypatch.setattr(motion_utils, "PROGRESS_POLL_S", 0.01)
+
+    single_counts = []
+    single = accumulate_video_motion(
+        "clip.mp4", fps_used=10, on_progress=single_counts.append
+    )
+    parallel_counts = []
+    parallel = accumulate_video_motion(
+        "clip.mp4",
+        fps_used=10,
+        duration_s=20.0,
+        workers=4,
+        on_progress=parallel_counts.append,
+    )
+
+    assert single_counts == list(range(16, 201, 16))
+    assert parallel_counts and parallel_counts == sorted(parallel_counts)
+    assert parallel_counts[-1] <= len(frames) + 4
+    assert parallel.finalize() == single.finalize()
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+@pytest.mark.parametrize("rate", ["30", "30000/1001", "25"])
+def test_parallel_ranges_of_a_real_clip_match_a_single_pass(monkeypatch, tmp_path, rate):
+    # Seam exactness relies on how ffmpeg seeks (-ss before -i) and
+    # resamples, so decode an encoded clip whose range starts fall between
+    # keyframes, including rates whose frames do not land on range starts.
+    clip = str(tmp_path / "clip.mp4")
+    subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"testsrc2=duration=12:size=160x120:rate={rate}",
+            "-c:v", "libx264", "-g", "45", "-pix_fmt", "yuv420p", clip,
+        ],
+        check=True,
+    )
+    monkeypatch.setattr(motion_utils, "MIN_CHUNK_S", 4.0)
+
+    single = accumulate_video_motion(clip, fps_used=15)
+    parallel = accumulate_video_motion(clip, fps_used=15, duration_s=12.0, workers=3)
+
+    assert single.frame_count > 170
+    assert parallel.frame_count == single.frame_count
+    expected = single.finalize()
+    actual = parallel.finalize()
+    for want, got in zip(expected, actual):
+        assert np.allclose(got, want)
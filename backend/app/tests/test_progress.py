@@ -0,0 +1,82 @@
+import os
+import sys
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+import pytest
+
+from app.services.progress import ProgressReporter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _reporter(clock):
+    writes = []
+    reporter = ProgressReporter(
+        "job-1",
+        write=lambda job_id, payload: writes.append(payload),
+        weights=(("decode", 3.0), ("finalise", 1.0)),
+        min_interval_s=0.5,
+        clock=clock,
+    )
+    return reporter, writes
+
+
+def test_stages_map_to_weighted_slices():
+    clock = FakeClock()
+    reporter, writes = _reporter(clock)
+
+    reporter.stage("decode", "Decoding")
+    clock.now = 1.0
+    reporter.update(0.5)
+    clock.now = 2.0
+    reporter.stage("finalise", "Finalizing")
+
+    assert [w["progress"] for w in writes] == [0.0, 0.375, 0.75]
+    assert writes[-1]["message"] == "Finalizing"
+    assert all(w["status"] == "processing" and "result" not in w for w in writes)
+
+
+def test_updates_are_rate_limited_but_stages_are_not():
+    clock = FakeClock()
+    reporter, writes = _reporter(clock)
+
+    reporter.stage("decode", "Decoding")
+    for step in range(1, 100):
+        clock.now = step * 0.01
+        reporter.update(step / 100)
+    assert len(writes) == 2
+
+    reporter.stage("finalise", "Finalizing")
+    assert len(writes) == 3
+    assert reporter.progress == pytest.approx(0.75)
+
+
+def test_progress_never_goes_backwards_or_reaches_one():
+    clock = FakeClock()
+    reporter, writes = _reporter(clock)
+
+    reporter.stage("decode", "Decoding")
+    clock.now = 1.0
+    reporter.update(0.8)
+    clock.now = 2.0
+    reporter.update(0.2)
+    reporter.stage("finalise", "Finalizing")
+    clock.now = 3.0
+    reporter.update(1.5)
+    reporter.finish()
+
+    progresses = [w["progress"] for w in writes]
+    assert progresses == sorted(progresses)
+    assert progresses[-1] == 0.99
+    assert [name for name, _ in reporter.timings] == ["decode", "finalise"]
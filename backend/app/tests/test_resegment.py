@@ -0,0 +1,173 @@
+import os
+import sys
+import time
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+import numpy as np
+import pytest
+from celery.exceptions import TimeoutError as CeleryTimeoutError
+from fastapi import HTTPException
+
+from app.api import routes
+from app.core.schemas import ResegmentRequest
+from app.services import job_store, signal_artefacts
+from app.services.intent_segmentation import segment_intent_phases
+from app.services.signals import Signals
+from app.workers import signatures, tasks
+
+
+def _signals(frames=9001, fps=15):
+    # Ten minutes; the clip ends on a whole second, as the segmenter's
+    # end-of-clip check rounds to 2 decimals.
+    rng = np.random.default_rng(7)
+    t = np.arange(frames) / fps
+    motion = np.clip(0.3 + 0.25 * np.sin(t / 3.0) + 0.1 * rng.standard_normal(frames), 0, 1)
+    return Signals(
+        t,
+        motion=motion,
+        motion_smooth=motion,
+        interaction=rng.random(frames),
+        entropy=rng.random(frames),
+        audio_energy=rng.random(frames),
+        audio_flux=rng.random(frames),
+    )
+
+
+def test_artefacts_round_trip_locally(monkeypatch, tmp_path):
+    monkeypatch.setattr(signal_artefacts, "SIGNALS_DIR", str(tmp_path))
+    signals = _signals(300)
+
+    artefact = signal_artefacts.save_signal_artefact("j1", signals, "local", fps=15)
+    loaded = signal_artefacts.load_signal_artefact(artefact)
+
+    assert artefact == {"backend": "local", "key": str(tmp_path / "j1.npz")}
+    assert os.listdir(tmp_path) == ["j1.npz"]
+    assert loaded.motion.dtype == np.float32
+    for name in ("t", "motion", "motion_smooth", "interaction", "audio_flux"):
+        assert np.array_equal(getattr(loaded, name), getattr(signals, name))
+
+
+def test_artefacts_round_trip_through_object_storage(monkeypatch):
+    bucket = {}
+    monkeypatch.setattr(
+        signal_artefacts, "upload_bytes",
+        lambda key, data, content_type: bucket.__setitem__(key, data),
+    )
+    monkeypatch.setattr(signal_artefacts, "download_bytes", bucket.__getitem__)
+    signals = _signals(300)
+
+    artefact = signal_artefacts.save_signal_artefact("j1", signals, "r2")
+    loaded = signal_artefacts.load_signal_artefact(artefact)
+
+    assert artefact == {"backend": "r2", "key": "signals/j1.npz"}
+    # float32 channels compress to a fraction of the JSON payload.
+    assert len(bucket["signals/j1.npz"]) < 7 * 4 * 300 + 2048
+    assert np.array_equal(loaded.entropy, signals.entropy)
+
+
+def test_resegment_matches_a_full_run_with_those_settings(monkeypatch, tmp_path):
+    monkeypatch.setattr(signal_artefacts, "SIGNALS_DIR", str(tmp_path))
+    monkeypatch.setattr(tasks, "active_model_paths", lambda: None)
+    signals = _signals()
+    artefact = signal_artefacts.save_signal_artefact("j1", signals, "local")
+    loaded = signal_artefacts.load_signal_artefact(artefact)
+
+    for granularity in ("coarse", "fine"):
+        start = time.perf_counter()
+        analysis = tasks.resegment_job(artefact, {"granularity": granularity})
+        elapsed = time.perf_counter() - start
+
+        monkeypatch.setenv("INTENT_GRANULARITY", granularity)
+        expected = tasks._ensure_segment_ids_and_fields(segment_intent_phases(
+            loaded.t,
+            loaded.motion_smooth,
+            interaction=loaded.interaction,
+            entropy=loaded.entropy,
+        ))
+        monkeypatch.delenv("INTENT_GRANULARITY")
+        assert analysis["segments"] == expected
+        assert set(analysis) == {"summary", "metrics", "segments", "transitions"}
+        # Ten minutes of signals; the budget is well under a second.
+        assert elapsed < 1.0
+
+
+def test_resegment_rejects_unavailable_models(monkeypatch, tmp_path):
+    monkeypatch.setattr(signal_artefacts, "SIGNALS_DIR", str(tmp_path))
+    monkeypatch.setattr(tasks, "active_model_paths", lambda: None)
+    artefact = signal_artefacts.save_signal_artefact("j1", _signals(100), "local")
+
+    with pytest.raises(ValueError, match="No intent model"):
+        tasks.resegment_job(artefact, {"mode": "model"})
+
+
+class FakePending:
+    def __init__(self, outcome):
+        self.outcome = outcome
+
+    def get(self, timeout):
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+
+@pytest.fixture
+def jobs(monkeypatch, tmp_path):
+    monkeypatch.setattr(job_store, "_get_redis", lambda: None)
+    monkeypatch.setattr(job_store, "JOBS_DIR", str(tmp_path))
+    artefact = {"backend": "local", "key": "/signals/src.npz"}
+    job_store.write_job("src", {"job_id": "src", "status": "done", "signals_artefact": artefact})
+    job_store.write_job("copy", {"job_id": "copy", "status": "done", "result_ref": "src"})
+    job_store.write_job("old", {"job_id": "old", "status": "done"})
+    sent = []
+    outcome = {"value": {"summary": {}, "metrics": {}, "segments": [], "transitions": []}}
+
+    def enqueue(artefact, params):
+        sent.append((artefact, params))
+        return FakePending(outcome["value"])
+
+    monkeypatch.setattr(routes, "enqueue_resegment", enqueue)
+    return artefact, sent, outcome
+
+
+def test_route_sends_the_stored_signals_to_a_worker(jobs):
+    artefact, sent, _ = jobs
+
+    response = routes.resegment_job("copy", ResegmentRequest(granularity="fine"))
+
+    assert response.job_id == "copy"
+    assert sent == [(artefact, {"mode": "auto", "granularity": "fine", "penalty_scale": None})]
+
+
+def test_route_errors(jobs):
+    _, _, outcome = jobs
+    for job_id, status in (("missing", 404), ("old", 409)):
+        with pytest.raises(HTTPException) as exc:
+            routes.resegment_job(job_id, ResegmentRequest())
+        assert exc.value.status_code == status
+
+    for error, status in ((CeleryTimeoutError(), 504), (ValueError("No intent model"), 422)):
+        outcome["value"] = error
+        with pytest.raises(HTTPException) as exc:
+            routes.resegment_job("src", ResegmentRequest(mode="model"))
+        assert exc.value.status_code == status
+
+
+def test_resegmentation_has_its_own_queue(monkeypatch):
+    sent = []
+    monkeypatch.setattr(
+        signatures.celery_app, "send_task",
+        lambda name, args, **options: sent.append((name, options)),
+    )
+
+    signatures.enqueue_resegment({"backend": "local", "key": "x.npz"}, {})
+    signatures.enqueue_analysis_job("j1", "local", "x.mp4")
+
+    assert sent == [
+        (signatures.RESEGMENT_JOB, {"queue": "resegment"}),
+        (signatures.RUN_ANALYSIS_JOB, {}),
+    ]
@@ -0,0 +1,176 @@
+import asyncio
+import io
+import os
+import sys
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+import pytest
+from fastapi import UploadFile
+
+from app.api import routes
+from app.services import job_store, result_cache, uploads
+from app.tests.fakes import FakeRedis
+
+
+@pytest.fixture(params=["file", "redis"])
+def store(request, monkeypatch, tmp_path):
+    client = FakeRedis() if request.param == "redis" else None
+    monkeypatch.setattr(job_store, "_get_redis", lambda: client)
+    monkeypatch.setattr(job_store, "JOBS_DIR", str(tmp_path))
+    ticks = iter(range(1000))
+    monkeypatch.setattr(result_cache.time, "time", lambda: float(next(ticks)))
+    return client
+
+
+def test_hits_misses_and_lru_eviction(store):
+    assert result_cache.lookup_result("a") is None
+    result_cache.store_result("a", "job-a", max_entries=2)
+    result_cache.store_result("b", "job-b", max_entries=2)
+    assert result_cache.lookup_result("a") == "job-a"
+
+    # "b" is now the least recently used entry.
+    result_cache.store_result("c", "job-c", max_entries=2)
+
+    assert result_cache.lookup_result("b") is None
+    assert result_cache.lookup_result("a") == "job-a"
+    assert result_cache.lookup_result("c") == "job-c"
+    assert result_cache.cache_stats() == {
+        "hits": 3, "misses": 2, "evictions": 1, "entries": 2
+    }
+
+
+def test_fingerprint_covers_model_and_settings(monkeypatch, tmp_path):
+    from app.workers import tasks
+
+    model = tmp_path / "intent_lgbm.txt"
+    metadata = tmp_path / "metadata.json"
+    model.write_text("model v1")
+    metadata.write_text("{}")
+    monkeypatch.setenv("INTENT_GRANULARITY", "normal")
+
+    fingerprint = tasks._analysis_fingerprint((model, metadata))
+    assert tasks._analysis_fingerprint((model, metadata)) == fingerprint
+    key = result_cache.cache_key("abc", fingerprint)
+    assert key.startswith("abc:")
+    assert result_cache.key_fingerprint(key) == fingerprint
+
+    monkeypatch.setenv("INTENT_GRANULARITY", "fine")
+    assert tasks._analysis_fingerprint((model, metadata)) != fingerprint
+    monkeypatch.setenv("INTENT_GRANULARITY", "normal")
+
+    model.write_text("model v2!")
+    assert tasks._analysis_fingerprint((model, metadata)) != fingerprint
+    assert tasks._analysis_fingerprint(None) != fingerprint
+
+
+def test_fingerprint_is_published_for_the_api(store):
+    assert result_cache.published_fingerprint() is None
+    result_cache.publish_fingerprint("f1")
+    result_cache.publish_fingerprint("f2")
+    assert result_cache.published_fingerprint() == "f2"
+
+
+def test_jobs_can_share_another_jobs_result(store):
+    job_store.write_job("src", {"job_id": "src", "status": "done", "result": {"segments": [1]}})
+    etag = job_store.read_job_fields("src")["result_etag"]
+    job_store.write_job("copy", {
+        "job_id": "copy", "status": "done", "result_ref": "src", "result_etag": etag,
+    })
+
+    assert job_store.read_job("copy")["result"] == {"segments": [1]}
+    assert job_store.read_job_result_json("copy") == job_store.read_job_result_json("src")
+
+
+@pytest.fixture
+def local_uploads(store, monkeypatch, tmp_path):
+    upload_dir = tmp_path / "uploads"
+    upload_dir.mkdir()
+    enqueued = []
+    monkeypatch.setattr(routes, "UPLOAD_DIR", str(upload_dir))
+    monkeypatch.setattr(routes, "r2_enabled", lambda: False)
+    monkeypatch.setattr(routes, "enqueue_analysis_job", lambda *args: enqueued.append(args))
+    result_cache.publish_fingerprint("settings-1")
+    return upload_dir, enqueued
+
+
+def _upload(data):
+    response = asyncio.run(
+        routes.upload_video(UploadFile(file=io.BytesIO(data), filename="clip.mp4"))
+    )
+    return response.job_id
+
+
+def test_reuploads_share_storage_and_results(local_uploads):
+    upload_dir, enqueued = local_uploads
+
+    first = _upload(b"same clip")
+    second = _upload(b"same clip")
+
+    # One stored copy, and the second job still runs while the first is pending.
+    assert len(os.listdir(upload_dir)) == 1
+    assert enqueued[0][2] == enqueued[1][2]
+
+    # Once a job finishes, its result answers later uploads without a job run.
+    job_store.update_job(first, {"status": "done", "result": {"segments": ["x"]}})
+    key = job_store.read_job_fields(first, ("cache_key",))["cache_key"]
+    assert key == job_store.read_job_fields(second, ("cache_key",))["cache_key"]
+    result_cache.store_result(key, first)
+
+    third = _upload(b"same clip")
+    assert len(enqueued) == 2
+    assert job_store.read_job_fields(third)["status"] == "done"
+    assert job_store.read_job_result_json(third) == job_store.read_job_result_json(first)
+    assert result_cache.cache_stats()["hits"] == 1
+
+    _upload(b"another clip")
+    assert len(enqueued) == 3
+    assert len(os.listdir(upload_dir)) == 2
+    assert second != first
+
+
+def test_missing_copies_are_replaced(store, tmp_path):
+    old = {"backend": "local", "key": str(tmp_path / "gone.mp4"), "url": "/videos/gone.mp4"}
+    result_cache.remember_video("sha", old)
+    new_path = tmp_path / "new.mp4"
+    new_path.write_bytes(b"v")
+    new = {"backend": "local", "key": str(new_path), "url": "/videos/new.mp4"}
+
+    assert uploads.keep_single_copy("sha", new) == new
+    assert new_path.exists()
+    assert result_cache.find_video("sha") == new
+
+
+def test_uploads_are_analysed_when_the_cache_cannot_answer(local_uploads, monkeypatch):
+    upload_dir, enqueued = local_uploads
+
+    def broken():
+        raise ConnectionError("cache unavailable")
+
+    monkeypatch.setattr(routes, "published_fingerprint", broken)
+    failed = _upload(b"clip")
+    monkeypatch.setattr(routes, "published_fingerprint", lambda: None)
+    unknown = _upload(b"clip")
+
+    assert [args[0] for args in enqueued] == [failed, unknown]
+    for job_id in (failed, unknown):
+        record = job_store.read_job_fields(job_id, ("status", "cache_key"))
+        assert record["status"] == "queued"
+        assert record["cache_key"] is None
+
+
+def test_workers_cache_under_the_key_given_at_upload(store):
+    from app.workers import tasks
+
+    key = result_cache.cache_key("sha", "settings-1")
+    for job_id in ("same", "swapped"):
+        job_store.write_job(job_id, {"job_id": job_id, "status": "done", "cache_key": key})
+
+    tasks._cache_result("swapped", "settings-2")
+    assert result_cache.lookup_result(key) is None
+    tasks._cache_result("same", "settings-1")
+    assert result_cache.lookup_result(key) == "same"
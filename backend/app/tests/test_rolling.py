@@ -0,0 +1,75 @@
+import os
+import sys
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+import numpy as np
+import pytest
+
+from app.services.rolling import EXACT_WINDOW_MAX, rolling_mean
+from app.services.signal_utils import smooth_signal
+
+
+def _reference(values, window_size, centered):
+    """Slice-and-sum moving average, as the callers used to compute it."""
+    half = window_size // 2
+    result = []
+    for i in range(len(values)):
+        if centered:
+            window = values[max(0, i - half):min(len(values), i + half + 1)]
+        else:
+            window = values[max(0, i - window_size + 1):i + 1]
+        result.append(sum(window) / len(window))
+    return np.asarray(result, dtype=values.dtype)
+
+
+@pytest.mark.parametrize("centered", [False, True])
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_small_windows_match_slice_sums_exactly(centered, dtype):
+    rng = np.random.default_rng(3)
+    values = rng.random(200).astype(dtype)
+    for window_size in (1, 2, 3, 4, 5, 7):
+        result = rolling_mean(values, window_size, centered=centered)
+        assert result.dtype == dtype
+        assert np.array_equal(result, _reference(values, window_size, centered))
+
+
+def test_constant_runs_match_slice_sums():
+    values = np.array([0.4] * 20 + [0.15] * 20)
+    # A prefix sum would drift off 0.4 by an ulp and flip `>= 0.4` rules.
+    assert np.array_equal(rolling_mean(values, 5), _reference(values, 5, False))
+
+
+def test_wide_windows_use_prefix_sums():
+    rng = np.random.default_rng(4)
+    values = rng.random(500)
+    window_size = EXACT_WINDOW_MAX * 2 + 1
+    for centered in (False, True):
+        np.testing.assert_allclose(
+            rolling_mean(values, window_size, centered=centered),
+            _reference(values, window_size, centered),
+            rtol=1e-12,
+        )
+
+
+def test_stacked_signals_and_output_buffer():
+    rng = np.random.default_rng(5)
+    stacked = rng.random((3, 50))
+    out = np.empty_like(stacked)
+
+    result = rolling_mean(stacked, 5, out=out)
+
+    assert result is out
+    for row in range(3):
+        assert np.array_equal(result[row], rolling_mean(stacked[row], 5))
+
+
+def test_smooth_signal_keeps_container_type():
+    assert smooth_signal([1, 2, 3, 4], window_size=3) == [1.5, 2.0, 3.0, 3.5]
+    smoothed = smooth_signal(np.array([1.0, 2.0, 3.0], dtype=np.float32), 3)
+    assert smoothed.dtype == np.float32
+    assert smooth_signal([], window_size=5) == []
@@ -0,0 +1,64 @@
+import os
+import sys
+import threading
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+from app.services import object_store, s3_clients
+
+
+def test_clients_are_built_once_per_credentials(monkeypatch):
+    monkeypatch.setattr(s3_clients, "_clients", {})
+    built = []
+    monkeypatch.setattr(
+        s3_clients.boto3, "client", lambda *a, **k: built.append(k) or object()
+    )
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                s3_clients.get_s3_client("http://s3.test", "key", "secret")
+            )
+        )
+        for _ in range(16)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(built) == 1
+    assert all(client is results[0] for client in results)
+    other = s3_clients.get_s3_client("http://s3.test", "other", "secret")
+    assert other is not results[0]
+    assert built[0]["config"].max_pool_connections >= s3_clients.TRANSFER_MAX_CONCURRENCY
+
+
+def test_forked_processes_get_their_own_client(monkeypatch):
+    monkeypatch.setattr(s3_clients, "_clients", {})
+    monkeypatch.setattr(s3_clients.boto3, "client", lambda *a, **k: object())
+
+    parent = s3_clients.get_s3_client(None, "key", "secret")
+    monkeypatch.setattr(s3_clients, "_clients_pid", -1)
+    assert s3_clients.get_s3_client(None, "key", "secret") is not parent
+
+
+def test_object_store_reuses_its_client(monkeypatch):
+    monkeypatch.setattr(s3_clients, "_clients", {})
+    for name in ("R2_BUCKET", "R2_ENDPOINT", "R2_ACCESS_KEY_ID", "R2_SECRET_ACCESS_KEY"):
+        monkeypatch.setattr(object_store, name, "test")
+    monkeypatch.setattr(object_store, "R2_ENDPOINT", "http://localhost:9000")
+
+    assert object_store._get_client() is object_store._get_client()
+
+
+def test_transfer_config_is_explicit():
+    config = s3_clients.transfer_config(max_concurrency=4, chunk_bytes=8 * s3_clients.MB)
+    assert config.max_request_concurrency == 4
+    assert config.multipart_chunksize == 8 * s3_clients.MB
+    assert not s3_clients.transfer_config(max_concurrency=1).use_threads
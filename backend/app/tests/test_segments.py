@@ -0,0 +1,142 @@
+import os
+import sys
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+import copy
+import random
+
+from app.ml.sequence.segments import (
+    collapse_flicker,
+    merge_short_segments,
+    outcome_avoids_execute,
+)
+
+
+PHASES = ["Explore", "Pursue", "Execute", "Outcome"]
+MINS = {"Explore": 1.6, "Pursue": 1.0, "Execute": 0.5, "Outcome": 0.7}
+
+
+def _reference_merge(segments, mins, outcome_rule):
+    """The original rescanning merge loop."""
+    changed = True
+    while changed:
+        changed = False
+        i = 0
+        while i < len(segments):
+            seg = segments[i]
+            if seg["end"] - seg["start"] + 1e-6 < mins.get(seg["phase"], 0.0):
+                if outcome_rule and seg["phase"] == "Outcome":
+                    if i + 1 < len(segments) and segments[i + 1]["phase"] != "Execute":
+                        target = i + 1
+                    elif i > 0 and segments[i - 1]["phase"] != "Execute":
+                        target = i - 1
+                    else:
+                        target = i - 1 if i > 0 else i + 1
+                else:
+                    target = i - 1 if i > 0 else i + 1
+                if 0 <= target < len(segments):
+                    segments[target]["start"] = min(segments[target]["start"], seg["start"])
+                    segments[target]["end"] = max(segments[target]["end"], seg["end"])
+                    segments[target]["why"] += f"+{seg['phase']}"
+                    segments.pop(i)
+                    changed = True
+                    i = max(i - 1, 0)
+                    continue
+            i += 1
+    return segments
+
+
+def _reference_flicker(segments, max_duration):
+    """The original rescanning A -> B -> A loop."""
+    changed = True
+    while changed:
+        changed = False
+        i = 1
+        while i < len(segments) - 1:
+            prev_seg, seg, next_seg = segments[i - 1], segments[i], segments[i + 1]
+            if prev_seg["phase"] == next_seg["phase"] != seg["phase"]:
+                if seg["end"] - seg["start"] < max_duration:
+                    prev_seg["end"] = next_seg["end"]
+                    prev_seg["why"] += f"~{seg['phase']}"
+                    segments.pop(i + 1)
+                    segments.pop(i)
+                    changed = True
+                    i = max(i - 1, 1)
+                    continue
+            i += 1
+    return segments
+
+
+def _random_segments(rng, count):
+    segments = []
+    start = 0.0
+    for _ in range(count):
+        end = round(start + rng.choice([0.0, 0.2, 0.4, 0.6, 1.0, 2.0]), 2)
+        segments.append({
+            "start": start,
+            "end": end,
+            "phase": rng.choice(PHASES),
+            "why": "",
+        })
+        start = end
+    return segments
+
+
+def _merge_note(target, seg):
+    target["why"] += f"+{seg['phase']}"
+
+
+def _flicker_note(target, seg):
+    target["why"] += f"~{seg['phase']}"
+
+
+def test_merge_matches_rescanning_loop():
+    rng = random.Random(0)
+    for trial in range(300):
+        segments = _random_segments(rng, rng.randint(0, 60))
+        for outcome_rule in (False, True):
+            expected = _reference_merge(copy.deepcopy(segments), MINS, outcome_rule)
+            kwargs = {"target_rule": outcome_avoids_execute} if outcome_rule else {}
+            result = merge_short_segments(
+                copy.deepcopy(segments), MINS, on_merge=_merge_note, **kwargs
+            )
+            assert result == expected
+
+
+def test_flicker_matches_rescanning_loop():
+    rng = random.Random(1)
+    for trial in range(300):
+        segments = _random_segments(rng, rng.randint(0, 60))
+        expected = _reference_flicker(copy.deepcopy(segments), 0.6)
+        result = collapse_flicker(
+            copy.deepcopy(segments), 0.6, on_collapse=_flicker_note
+        )
+        assert result == expected
+
+
+def test_single_short_segment_is_kept():
+    segments = [{"start": 0.0, "end": 0.2, "phase": "Explore", "why": ""}]
+    assert merge_short_segments(segments, MINS) == segments
+
+
+def test_stress_100k_raw_segments():
+    rng = random.Random(2)
+    segments = _random_segments(rng, 100_000)
+    end = segments[-1]["end"]
+
+    merged = merge_short_segments(
+        segments, MINS, target_rule=outcome_avoids_execute
+    )
+    collapsed = collapse_flicker(merged, 0.6)
+
+    assert collapsed[0]["start"] == 0.0
+    assert collapsed[-1]["end"] == end
+    for seg in merged:
+        assert seg["end"] - seg["start"] + 1e-6 >= MINS[seg["phase"]]
+    for prev_seg, next_seg in zip(collapsed, collapsed[1:]):
+        assert prev_seg["end"] <= next_seg["start"] + 1e-6
@@ -0,0 +1,82 @@
+import os
+import sys
+import tempfile
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+import numpy as np
+import pytest
+
+from app.services.signals import Signals, align_to
+
+
+def test_channels_are_float32_on_shared_axis():
+    signals = Signals([0.0, 0.5, 1.0], motion=[0.1, 0.2, 0.3])
+
+    assert len(signals) == 3
+    assert signals.t.dtype == np.float64
+    assert signals.motion.dtype == np.float32
+    assert signals.audio_flux is None
+    assert signals.channel("audio_flux").tolist() == [0.0, 0.0, 0.0]
+
+
+def test_mismatched_channel_length_is_rejected():
+    with pytest.raises(ValueError):
+        Signals([0.0, 0.5, 1.0], motion=[0.1, 0.2])
+
+
+def test_with_channels_shares_unchanged_arrays():
+    signals = Signals([0.0, 0.5], motion=[0.1, 0.2])
+    updated = signals.with_channels(entropy=[0.3, 0.4])
+
+    assert updated.motion is signals.motion
+    assert signals.entropy is None
+    assert updated.entropy.tolist() == pytest.approx([0.3, 0.4])
+
+
+def test_feature_matrix_uses_model_column_order():
+    signals = Signals(
+        [0.0, 1.0],
+        motion=[1, 1],
+        interaction=[2, 2],
+        entropy=[3, 3],
+        audio_energy=[4, 4],
+    )
+    features = signals.feature_matrix()
+
+    assert features.shape == (2, 5)
+    assert features.dtype == np.float32
+    assert features[0].tolist() == [1.0, 2.0, 3.0, 4.0, 0.0]
+
+
+def test_payload_is_lists_with_smooth_fallback():
+    payload = Signals([0.0, 0.2], motion=[0.5, 1.0]).to_payload()
+
+    assert payload["t"] == [0.0, 0.2]
+    assert payload["motion_raw"] == [0.5, 1.0]
+    assert payload["motion_smooth"] == [0.5, 1.0]
+    assert payload["audio_energy"] == [0.0, 0.0]
+
+
+def test_npz_round_trip():
+    signals = Signals([0.0, 0.2, 0.4], motion=[0.1, 0.2, 0.3], entropy=[1, 0, 1])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "clip.npz")
+        signals.save_npz(path, fps_used=5.0)
+        loaded, metadata = Signals.load_npz(path)
+
+    assert loaded.t.tolist() == signals.t.tolist()
+    assert loaded.motion.tolist() == signals.motion.tolist()
+    assert loaded.interaction is None
+    assert metadata == {"fps_used": 5.0}
+
+
+def test_align_to_zero_fills_missing_audio():
+    assert align_to([0.0, 1.0], [], []).tolist() == [0.0, 0.0]
+    aligned = align_to([0.0, 1.0, 2.0], [0.0, 2.0], [0.0, 2.0])
+    assert aligned.dtype == np.float32
+    assert aligned.tolist() == [0.0, 1.0, 2.0]
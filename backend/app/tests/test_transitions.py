@@ -0,0 +1,85 @@
+import os
+import sys
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+import random
+
+import numpy as np
+
+from app.services.signals import Signals
+from app.workers.tasks import _mark_hesitation, _segments_to_transitions
+
+
+def _reference_delta(t, signal, boundary_time, window_s=0.8):
+    """The original full-scan window delta."""
+    before_vals = []
+    after_vals = []
+    for ti, si in zip(t.tolist(), signal.tolist()):
+        if boundary_time - window_s <= ti < boundary_time:
+            before_vals.append(si)
+        elif boundary_time <= ti <= boundary_time + window_s:
+            after_vals.append(si)
+    if not before_vals or not after_vals:
+        return None
+    return (sum(after_vals) / len(after_vals)) - (sum(before_vals) / len(before_vals))
+
+
+def _reference_hesitation(transitions, window_s=2.0):
+    """The original all-pairs hesitation check."""
+    for i, tr in enumerate(transitions):
+        nearby = [
+            t for j, t in enumerate(transitions)
+            if i != j and abs(t["time"] - tr["time"]) <= window_s
+        ]
+        if nearby:
+            tr["hesitation"] = True
+
+
+def _random_segments(rng, clip_s):
+    segments = []
+    start = 0.0
+    while start < clip_s:
+        end = min(round(start + rng.choice([0.0, 0.2, 0.5, 1.3, 3.0]), 2), clip_s)
+        segments.append({
+            "id": f"seg_{len(segments)}",
+            "start": start,
+            "end": end,
+            "phase": rng.choice(["Explore", "Pursue", "Execute", "Outcome"]),
+        })
+        start = end
+    return segments
+
+
+def test_transition_deltas_match_full_scan():
+    rng = random.Random(0)
+    np_rng = np.random.default_rng(0)
+    for _ in range(20):
+        t = np.arange(0, 60, 1 / 15)
+        signals = Signals(t, motion=np_rng.random(t.size))
+        signals = signals.with_channels(motion_smooth=signals.motion)
+        segments = _random_segments(rng, float(t[-1]) + 0.5)
+
+        transitions = _segments_to_transitions(segments, signals)
+
+        assert len(transitions) == len(segments) - 1
+        for tr, seg in zip(transitions, segments):
+            expected = _reference_delta(signals.t, signals.motion_smooth, seg["end"])
+            assert tr["signal_delta"]["motion"] == expected
+
+
+def test_hesitation_matches_all_pairs():
+    rng = random.Random(1)
+    for _ in range(50):
+        times = [round(rng.uniform(0, 60), 1) for _ in range(rng.randint(0, 40))]
+        fast = [{"time": t, "hesitation": False} for t in times]
+        slow = [{"time": t, "hesitation": False} for t in times]
+
+        _mark_hesitation(fast)
+        _reference_hesitation(slow)
+
+        assert fast == slow
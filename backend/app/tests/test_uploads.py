@@ -0,0 +1,96 @@
+import asyncio
+import hashlib
+import io
+import os
+import sys
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+import pytest
+from fastapi import UploadFile
+
+from app.services import uploads
+from app.tests.fakes import FakeMultipartUpload
+
+DATA = os.urandom(3 * 1024 * 1024 + 123)
+
+
+def _upload_file(data=DATA):
+    return UploadFile(file=io.BytesIO(data), filename="clip.mp4")
+
+
+def test_local_uploads_are_streamed_and_hashed(tmp_path):
+    destination = str(tmp_path / "uploads" / "job.mp4")
+
+    stored = asyncio.run(
+        uploads.save_upload_to_path(_upload_file(), destination, chunk_bytes=64 * 1024)
+    )
+
+    assert stored.size == len(DATA)
+    assert stored.sha256 == hashlib.sha256(DATA).hexdigest()
+    with open(destination, "rb") as f:
+        assert f.read() == DATA
+    assert os.listdir(tmp_path / "uploads") == ["job.mp4"]
+
+
+def test_object_store_uploads_use_bounded_multipart(monkeypatch):
+    FakeMultipartUpload.instances = []
+    monkeypatch.setattr(uploads, "MultipartUpload", FakeMultipartUpload)
+
+    stored = asyncio.run(uploads.save_upload_to_object_store(
+        _upload_file(),
+        "uploads/job.mp4",
+        chunk_bytes=32 * 1024,
+        part_bytes=256 * 1024,
+        max_parts_in_flight=2,
+    ))
+
+    upload = FakeMultipartUpload.instances[0]
+    assert upload.completed and not upload.aborted
+    assert sorted(upload.parts) == list(range(1, len(upload.parts) + 1))
+    assert b"".join(upload.parts[n] for n in sorted(upload.parts)) == DATA
+    assert all(len(upload.parts[n]) == 256 * 1024 for n in sorted(upload.parts)[:-1])
+    assert 1 < upload.peak_in_flight <= 2
+    assert stored.sha256 == hashlib.sha256(DATA).hexdigest()
+    assert stored.size == len(DATA)
+
+
+def test_small_object_store_uploads_use_one_put(monkeypatch):
+    FakeMultipartUpload.instances = []
+    monkeypatch.setattr(uploads, "MultipartUpload", FakeMultipartUpload)
+    puts = []
+    monkeypatch.setattr(
+        uploads, "upload_bytes", lambda key, data, content_type: puts.append((key, data))
+    )
+
+    stored = asyncio.run(
+        uploads.save_upload_to_object_store(_upload_file(b"tiny"), "uploads/t.mp4")
+    )
+
+    assert puts == [("uploads/t.mp4", b"tiny")]
+    assert FakeMultipartUpload.instances == []
+    assert stored.size == 4
+
+
+def test_failed_parts_abort_the_upload(monkeypatch):
+    FakeMultipartUpload.instances = []
+    monkeypatch.setattr(
+        uploads,
+        "MultipartUpload",
+        lambda key, content_type: FakeMultipartUpload(key, content_type, fail_on_part=2),
+    )
+
+    with pytest.raises(RuntimeError, match="part failed"):
+        asyncio.run(uploads.save_upload_to_object_store(
+            _upload_file(),
+            "uploads/job.mp4",
+            part_bytes=256 * 1024,
+            max_parts_in_flight=2,
+        ))
+
+    upload = FakeMultipartUpload.instances[0]
+    assert upload.aborted and not upload.completed
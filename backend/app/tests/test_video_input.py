@@ -0,0 +1,76 @@
+import os
+import sys
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+from app.workers import tasks
+
+URL = "https://bucket.test/uploads/a.mp4?X-Amz-Signature=x"
+
+
+def _storage(monkeypatch, streamable=True, probe_ok=True):
+    downloads = []
+
+    def download(key, destination):
+        downloads.append(key)
+        with open(destination, "wb") as handle:
+            handle.write(b"video")
+
+    monkeypatch.setattr(tasks, "STREAM_FROM_OBJECT_STORE", True)
+    monkeypatch.setattr(tasks, "read_range", lambda key, offset, length: b"")
+    monkeypatch.setattr(tasks, "is_streamable_container", lambda read_at: streamable)
+    monkeypatch.setattr(tasks, "presigned_get_url", lambda key: URL)
+    monkeypatch.setattr(
+        tasks, "probe_video_size", lambda path: (1280, 720) if probe_ok else None
+    )
+    monkeypatch.setattr(tasks, "download_to_path", download)
+    return downloads
+
+
+def test_object_store_videos_are_streamed_from_a_url(monkeypatch):
+    downloads = _storage(monkeypatch)
+
+    video_input, temp_dir = tasks._open_video_input("r2", "uploads/a.mp4")
+
+    assert video_input == URL
+    assert temp_dir is None
+    assert downloads == []
+
+
+def test_trailing_index_mp4s_are_staged(monkeypatch):
+    downloads = _storage(monkeypatch, streamable=False)
+
+    video_input, temp_dir = tasks._open_video_input("r2", "uploads/a.mp4")
+
+    assert downloads == ["uploads/a.mp4"]
+    assert video_input == os.path.join(temp_dir.name, "a.mp4")
+    assert os.path.exists(video_input)
+    temp_dir.cleanup()
+
+
+def test_unprobeable_urls_and_errors_fall_back_to_staging(monkeypatch):
+    downloads = _storage(monkeypatch, probe_ok=False)
+    _, temp_dir = tasks._open_video_input("r2", "uploads/a.mp4")
+    temp_dir.cleanup()
+
+    def offline(key, offset, length):
+        raise ConnectionError("offline")
+
+    monkeypatch.setattr(tasks, "is_streamable_container", lambda read_at: read_at(0, 8))
+    monkeypatch.setattr(tasks, "read_range", offline)
+    _, temp_dir = tasks._open_video_input("r2", "uploads/a.mp4")
+    temp_dir.cleanup()
+
+    assert downloads == ["uploads/a.mp4", "uploads/a.mp4"]
+
+
+def test_local_videos_are_used_in_place(monkeypatch):
+    _storage(monkeypatch)
+    assert tasks._open_video_input("local", "./data/uploads/a.mp4") == (
+        "./data/uploads/a.mp4",
+        None,
+    )
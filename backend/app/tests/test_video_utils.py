@@ -0,0 +1,122 @@
+import os
+import sys
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+import struct
+import subprocess
+
+import pytest
+
+from app.services import video_utils
+from app.services.video_utils import (
+    TruncatedStreamError,
+    analysis_size,
+    ffmpeg_input_args,
+    is_streamable_container,
+)
+
+
+def test_analysis_size_downscales_short_side():
+    assert analysis_size(1920, 1080, short_side=360) == (640, 360)
+    assert analysis_size(1080, 1920, short_side=360) == (360, 640)
+
+
+def test_analysis_size_keeps_even_dimensions():
+    width, height = analysis_size(2560, 1080, short_side=180)
+    assert height == 180
+    assert width % 2 == 0
+
+
+def test_analysis_size_never_upscales_or_when_disabled():
+    assert analysis_size(320, 240, short_side=360) == (320, 240)
+    assert analysis_size(1920, 1080, short_side=0) == (1920, 1080)
+
+
+def _box(kind, payload_size=0, large=False):
+    if large:
+        return struct.pack(">I4sQ", 1, kind, 16 + payload_size) + b"\0" * payload_size
+    return struct.pack(">I4s", 8 + payload_size, kind) + b"\0" * payload_size
+
+
+def _reader(data, reads=None):
+    def read_at(offset, length):
+        if reads is not None:
+            reads.append((offset, length))
+        return data[offset:offset + length]
+    return read_at
+
+
+def test_mp4_with_leading_moov_is_streamable():
+    data = _box(b"ftyp", 16) + _box(b"free", 8) + _box(b"moov", 100) + _box(b"mdat", 1000)
+    assert is_streamable_container(_reader(data))
+
+
+def test_mp4_with_trailing_moov_needs_staging():
+    data = _box(b"ftyp", 16) + _box(b"mdat", 1000) + _box(b"moov", 100)
+    assert not is_streamable_container(_reader(data))
+
+
+def test_boxes_past_the_scanned_head_are_fetched_by_range():
+    data = _box(b"ftyp", 16) + _box(b"free", 200_000, large=True) + _box(b"moov", 10)
+    reads = []
+    assert is_streamable_container(_reader(data, reads))
+    assert reads[1] == (24 + 16 + 200_000, 16)
+
+
+def test_other_containers_are_streamed():
+    webm = b"\x1a\x45\xdf\xa3" + b"\0" * 100
+    assert is_streamable_container(_reader(webm))
+    assert is_streamable_container(_reader(b""))
+
+
+
+def _fake_ffmpeg(monkeypatch, frames, returncode, forever=False):
+    """Stand in for ffmpeg with a process writing `frames` 4x2 frames."""
+    script = (
+        "import sys, time\n"
+        f"sys.stdout.buffer.write(bytes(8) * {frames}); sys.stdout.flush()\n"
+        f"time.sleep(60 if {forever} else 0)\n"
+        f"sys.exit({returncode})\n"
+    )
+    popen = subprocess.Popen
+    monkeypatch.setattr(
+        video_utils.subprocess, "Popen",
+        lambda cmd, **kwargs: popen([sys.executable, "-c", script], **kwargs),
+    )
+    monkeypatch.setattr(video_utils, "probe_video_size", lambda path: (4, 2))
+
+
+def test_streams_cut_short_by_ffmpeg_errors_raise(monkeypatch):
+    _fake_ffmpeg(monkeypatch, frames=3, returncode=1)
+    frames = []
+    with pytest.raises(TruncatedStreamError):
+        for frame in video_utils.iter_gray_frames("https://bucket/clip.mp4", fps=5):
+            frames.append(frame)
+    assert len(frames) == 3
+
+    _fake_ffmpeg(monkeypatch, frames=0, returncode=1)
+    with pytest.raises(subprocess.CalledProcessError):
+        list(video_utils.iter_gray_frames("clip.mp4", fps=5))
+
+
+def test_complete_and_abandoned_streams_do_not_raise(monkeypatch):
+    _fake_ffmpeg(monkeypatch, frames=3, returncode=0)
+    assert len(list(video_utils.iter_gray_frames("clip.mp4", fps=5))) == 3
+
+    # Stopping early kills ffmpeg; that exit status is ours, not an error.
+    _fake_ffmpeg(monkeypatch, frames=3, returncode=0, forever=True)
+    frames = video_utils.iter_gray_frames("clip.mp4", fps=5)
+    next(frames)
+    frames.close()
+
+
+def test_url_inputs_reconnect():
+    assert ffmpeg_input_args("/data/clip.mp4") == ["-i", "/data/clip.mp4"]
+    args = ffmpeg_input_args("https://bucket.test/clip.mp4?X-Amz-Signature=s")
+    assert args[-2:] == ["-i", "https://bucket.test/clip.mp4?X-Amz-Signature=s"]
+    assert "-reconnect" in args and "-reconnect_streamed" in args
@@ -0,0 +1,89 @@
+import os
+import sys
+
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..")
+    )
+)
+
+import numpy as np
+
+from app.ml.sequence.viterbi import (
+    build_transition_penalties,
+    viterbi_decode,
+    viterbi_decode_batch,
+)
+
+
+PHASES = ["Explore", "Pursue", "Execute", "Outcome"]
+
+
+def _reference_viterbi(log_probs, phases, penalty_scale=1.0):
+    """The original triple-loop decoder."""
+    penalties = build_transition_penalties(phases, scale=penalty_scale)
+    num_steps, num_states = log_probs.shape
+    dp = np.full((num_steps, num_states), -np.inf, dtype=np.float64)
+    back = np.zeros((num_steps, num_states), dtype=np.int32)
+    dp[0, :] = log_probs[0, :]
+    for t in range(1, num_steps):
+        for curr in range(num_states):
+            best_score = -np.inf
+            best_prev = 0
+            for prev in range(num_states):
+                score = dp[t - 1, prev] - penalties[(phases[prev], phases[curr])]
+                if score > best_score:
+                    best_score = score
+                    best_prev = prev
+            dp[t, curr] = log_probs[t, curr] + best_score
+            back[t, curr] = best_prev
+    state = int(np.argmax(dp[-1]))
+    seq = [state]
+    for t in range(num_steps - 1, 0, -1):
+        state = int(back[t, state])
+        seq.append(state)
+    seq.reverse()
+    return [phases[idx] for idx in seq]
+
+
+def _log_probs(rng, steps, coarse=False):
+    probs = rng.dirichlet(np.ones(len(PHASES)) * 0.5, size=steps)
+    if coarse:
+        # Quantized probabilities produce many exact ties.
+        probs = np.round(probs * 4) / 4
+    return np.log(np.clip(probs, 1e-9, 1.0))
+
+
+def test_matches_reference_decoder():
+    rng = np.random.default_rng(7)
+    for steps, coarse, scale in [
+        (1, False, 1.0),
+        (2, True, 1.0),
+        (300, False, 1.0),
+        (300, True, 0.5),
+        (500, False, 3.0),
+    ]:
+        log_probs = _log_probs(rng, steps, coarse)
+        expected = _reference_viterbi(log_probs, PHASES, scale)
+        assert viterbi_decode(log_probs, PHASES, scale) == expected
+        assert viterbi_decode(
+            log_probs.astype(np.float32), PHASES, scale
+        ) == _reference_viterbi(log_probs.astype(np.float32), PHASES, scale)
+
+
+def test_empty_input():
+    assert viterbi_decode(np.empty((0, 4)), PHASES) == []
+
+
+def test_batch_matches_single_sequences():
+    rng = np.random.default_rng(11)
+    lengths = [0, 1, 40, 250, 17, 250]
+    padded = np.zeros((len(lengths), max(lengths), len(PHASES)))
+    singles = []
+    for row, length in enumerate(lengths):
+        log_probs = _log_probs(rng, length, coarse=row % 2 == 1)
+        padded[row, :length] = log_probs
+        padded[row, length:] = rng.normal(size=(max(lengths) - length, 4))
+        singles.append(viterbi_decode(log_probs, PHASES))
+
+    assert viterbi_decode_batch(padded, lengths, PHASES) == singles
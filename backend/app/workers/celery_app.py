@@ -10,6 +10,8 @@ celery_app = Celery(
     "app",
     broker=REDIS_URL,
     backend=REDIS_URL,
+    # Imported by the worker only; the API enqueues by name (see signatures.py).
+    include=["app.workers.tasks"],
 )
 
 celery_app.conf.update(
@@ -19,5 +21,3 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
 )
-
-import app.workers.tasks  # noqa
@@ -0,0 +1,38 @@
+"""
+Task names and enqueue helpers for the API process.
+
+The API only needs to put messages on the broker, so it enqueues by task
+name instead of importing `app.workers.tasks` (and with it OpenCV, numpy
+and LightGBM). The worker registers the tasks via `celery_app.include`.
+"""
+
+import os
+from typing import Any, Dict
+
+from app.workers.celery_app import celery_app
+
+RUN_ANALYSIS_JOB = "app.workers.tasks.run_analysis_job"
+RESEGMENT_JOB = "app.workers.tasks.resegment_job"
+
+# Re-segmentation is interactive and the API waits for it, so it has its
+# own queue. The documented worker command serves it alongside the default
+# queue; a small dedicated worker keeps it from waiting behind analyses
+# (see the README). Set RESEGMENT_QUEUE empty to use the default queue.
+RESEGMENT_QUEUE = os.getenv("RESEGMENT_QUEUE", "resegment") or None
+
+
+def enqueue_analysis_job(job_id: str, storage_backend: str, storage_key: str):
+    """Queue `run_analysis_job` for an uploaded video."""
+    return celery_app.send_task(
+        RUN_ANALYSIS_JOB,
+        args=(job_id, storage_backend, storage_key),
+    )
+
+
+def enqueue_resegment(artefact: Dict[str, str], params: Dict[str, Any]):
+    """Queue `resegment_job` for a job's stored signals."""
+    return celery_app.send_task(
+        RESEGMENT_JOB,
+        args=(artefact, params),
+        queue=RESEGMENT_QUEUE,
+    )
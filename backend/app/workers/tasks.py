@@ -1,26 +1,55 @@
 import logging
 import os
 import tempfile
-import time
-from typing import Any, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from celery.signals import worker_process_init
 
 from app.workers.celery_app import celery_app
-from app.services.job_store import write_job
-from app.services.object_store import download_to_path, get_public_url
+from app.workers.signatures import RESEGMENT_JOB, RUN_ANALYSIS_JOB
+from app.core.analysis_settings import (
+    ANALYSIS_FPS,
+    ANALYSIS_SHORT_SIDE,
+    AUDIO_SAMPLE_RATE,
+    intent_granularity,
+)
+from app.services.job_store import read_job_fields, update_job
+from app.services.object_store import (
+    download_to_path,
+    get_public_url,
+    presigned_get_url,
+    read_range,
+)
 
-from app.services.video_utils import extract_frames, get_video_duration
-from app.services.motion_utils import compute_motion_signal
+from app.services.video_utils import (
+    TruncatedStreamError,
+    get_video_duration,
+    is_streamable_container,
+    probe_video_size,
+)
+from app.services.motion_utils import accumulate_video_motion
 from app.services.signal_utils import smooth_signal
 from app.services.intent_segmentation import segment_intent_phases
 from app.services.intent_insights import compute_intent_insights
 from app.ml.features.audio_features import compute_audio_features
 from app.services.learned_intent_segmentation import (
-    align_signal,
-    load_default_model_bundle,
-    load_model_bundle,
+    ModelBundle,
+    get_model_bundle,
     segment_intent_phases_model,
 )
-from app.services.model_store import download_model_if_needed
+from app.services.model_store import active_model_paths, model_digest
+from app.services.progress import ProgressReporter
+from app.services.result_cache import (
+    key_fingerprint,
+    publish_fingerprint,
+    settings_fingerprint,
+    store_result,
+)
+from app.services.signal_artefacts import load_signal_artefact, save_signal_artefact
+from app.services.signals import Signals, align_to
 
 
 # ----------------------------
@@ -66,10 +95,14 @@ def _ensure_segment_ids_and_fields(segments: List[Dict[str, Any]]) -> List[Dict[
 
 
 def _segments_to_transitions(segments: List[Dict[str, Any]],
-    signals: Dict[str, List[float]]) -> List[Dict[str, Any]]:
+    signals: Signals) -> List[Dict[str, Any]]:
     transitions = []
-    t = signals["t"]
-    motion = signals.get("motion_smooth") or signals.get("motion_raw")
+    t = signals.t
+    motion = (
+        signals.motion_smooth
+        if signals.motion_smooth is not None
+        else signals.channel("motion")
+    )
     max_segment_duration = 0.0
     for seg in segments:
         max_segment_duration = max(
@@ -77,14 +110,15 @@ def _segments_to_transitions(segments: List[Dict[str, Any]],
             float(seg.get("end", 0.0)) - float(seg.get("start", 0.0))
         )
 
+    motion_deltas = _windowed_signal_deltas(
+        t, motion, [float(seg["end"]) for seg in segments[:-1]]
+    )
+
     for i in range(len(segments) - 1):
         a = segments[i]
         b = segments[i + 1]
         boundary_time = float(a["end"])
-
-        motion_delta = _windowed_signal_delta(
-            t, motion, boundary_time
-        )
+        motion_delta = motion_deltas[i]
 
         # Confidence heuristic derived from signal + segment stability.
         duration_a = float(a.get("end", 0.0)) - float(a.get("start", 0.0))
@@ -184,57 +218,264 @@ def _phase_distribution_from_segments(segments: List[Dict[str, Any]]) -> Dict[st
 
     return {k: round(v / total_time, 4) for k, v in totals.items()}
 
-def _windowed_signal_delta(
-    t: List[float],
-    signal: List[float],
-    boundary_time: float,
+def _windowed_signal_deltas(
+    t: np.ndarray,
+    signal: np.ndarray,
+    boundary_times: List[float],
     window_s: float = 0.8
-) -> float | None:
+) -> List[float | None]:
     """
-    Compute average(signal after boundary) - average(signal before boundary)
-    over a small time window.
+    For each boundary, compute average(signal after boundary) -
+    average(signal before boundary) over a small time window.
+
+    `t` is sorted, so every window is found with `searchsorted` and only
+    the few samples inside it are summed.
     """
-    before_vals = []
-    after_vals = []
+    if not boundary_times:
+        return []
+
+    boundaries = np.asarray(boundary_times, dtype=np.float64)
+    # Before: boundary - window_s <= t < boundary.
+    # After: boundary <= t <= boundary + window_s.
+    before_start = np.searchsorted(t, boundaries - window_s, side="left")
+    split = np.searchsorted(t, boundaries, side="left")
+    after_end = np.searchsorted(t, boundaries + window_s, side="right")
+    values = np.asarray(signal, dtype=np.float64)
+
+    deltas: List[float | None] = []
+    for lo, mid, hi in zip(
+        before_start.tolist(), split.tolist(), after_end.tolist()
+    ):
+        if lo >= mid or mid >= hi:
+            deltas.append(None)
+            continue
+        before_vals = values[lo:mid].tolist()
+        after_vals = values[mid:hi].tolist()
+        deltas.append(
+            (sum(after_vals) / len(after_vals))
+            - (sum(before_vals) / len(before_vals))
+        )
+    return deltas
 
-    for ti, si in zip(t, signal):
-        if boundary_time - window_s <= ti < boundary_time:
-            before_vals.append(si)
-        elif boundary_time <= ti <= boundary_time + window_s:
-            after_vals.append(si)
+def _mark_hesitation(transitions: List[Dict[str, Any]], window_s: float = 2.0):
+    """
+    Marks transitions as hesitation if multiple transitions occur
+    within a short time window.
 
-    if not before_vals or not after_vals:
+    In time order the closest other transition is always a neighbour, so
+    one pass over adjacent pairs is enough.
+    """
+    ordered = sorted(transitions, key=lambda tr: tr["time"])
+    for prev, curr in zip(ordered, ordered[1:]):
+        if abs(curr["time"] - prev["time"]) <= window_s:
+            prev["hesitation"] = True
+            curr["hesitation"] = True
+
+
+# ----------------------------
+# Model bundle
+# ----------------------------
+
+def _resolve_model_bundle(
+    model_paths: Optional[Tuple[Path, Path]] = None,
+) -> ModelBundle | None:
+    """
+    The configured (remote) model if there is one, else the bundled
+    default. Both are cached per process and reloaded only when a new
+    version lands on disk. `model_paths` pins the files to load.
+    """
+    if model_paths is None:
+        model_paths = active_model_paths()
+    if model_paths is None:
         return None
+    return get_model_bundle(*model_paths)
 
-    return (sum(after_vals) / len(after_vals)) - (sum(before_vals) / len(before_vals))
 
-def _mark_hesitation(transitions: List[Dict[str, Any]], window_s: float = 2.0):
+@worker_process_init.connect
+def _warm_model_cache(**_kwargs) -> None:
+    # Load the model before the first job instead of during it, and tell
+    # the API which settings results are produced with.
+    try:
+        model_paths = active_model_paths()
+        _resolve_model_bundle(model_paths)
+        publish_fingerprint(_analysis_fingerprint(model_paths))
+    except Exception:
+        logging.exception("Could not preload the intent model")
+
+
+# ----------------------------
+# Segmentation
+# ----------------------------
+
+SEGMENTATION_MODES = ("auto", "model", "heuristic")
+
+
+def _segment_signals(
+    signals: Signals,
+    mode: str = "auto",
+    granularity: Optional[str] = None,
+    penalty_scale: Optional[float] = None,
+    model_paths: Optional[Tuple[Path, Path]] = None,
+) -> List[Dict[str, Any]]:
     """
-    Marks transitions as hesitation if multiple transitions occur
-    within a short time window.
+    Segment phases with the intent model ("model"), the heuristic
+    segmenter ("heuristic"), or the model when one is available ("auto").
+    `granularity` only applies to the heuristic; `penalty_scale` to both.
+    `model_paths` pins the model files (by default the active ones).
     """
-    for i, tr in enumerate(transitions):
-        t0 = tr["time"]
-        nearby = [
-            t for j, t in enumerate(transitions)
-            if i != j and abs(t["time"] - t0) <= window_s
-        ]
-        if len(nearby) >= 1:
-            tr["hesitation"] = True
+    if mode not in SEGMENTATION_MODES:
+        raise ValueError(f"Unknown segmentation mode: {mode}")
+    model_bundle = _resolve_model_bundle(model_paths) if mode != "heuristic" else None
+    if mode == "model" and model_bundle is None:
+        raise ValueError("No intent model is available")
+
+    if model_bundle is not None:
+        segments = segment_intent_phases_model(
+            signals.t,
+            signals.motion,
+            signals.interaction,
+            signals.entropy,
+            signals.audio_energy,
+            signals.audio_flux,
+            model_bundle,
+            penalty_scale=1.0 if penalty_scale is None else penalty_scale,
+        )
+    else:
+        segments = segment_intent_phases(
+            signals.t,
+            signals.motion_smooth,
+            interaction=signals.interaction,
+            entropy=signals.entropy,
+            granularity=granularity,
+            penalty_scale=penalty_scale,
+        )
+
+    # Ensure UI-friendly shape (without changing real segmentation)
+    return _ensure_segment_ids_and_fields(segments)
+
+
+def _summarise_segments(
+    segments: List[Dict[str, Any]],
+    signals: Signals,
+) -> Dict[str, Any]:
+    """The summary, metrics, segments and transitions blocks of a result."""
+    insights = compute_intent_insights(segments)
+    transitions = _segments_to_transitions(segments, signals)
+    _mark_hesitation(transitions)
+    return {
+        # insights stays, but we enhance it with distribution so UI doesn't recompute
+        "summary": {
+            **(insights or {}),
+            "phase_distribution": _phase_distribution_from_segments(segments),
+        },
+        # stable metrics block for UI panels
+        "metrics": _compute_metrics(segments, transitions),
+        # segments + transitions are now first-class
+        "segments": segments,
+        "transitions": transitions,
+    }
+
+
+# ----------------------------
+# Video input
+# ----------------------------
+
+# Object-store videos are decoded straight from a presigned URL (set to 0
+# to always download them first).
+STREAM_FROM_OBJECT_STORE = os.getenv("STREAM_FROM_OBJECT_STORE", "1") != "0"
+
+
+def _open_video_input(
+    storage_backend: str,
+    storage_key: str,
+) -> Tuple[str, Optional[tempfile.TemporaryDirectory]]:
+    """
+    The path or URL the decoders should read, plus the temp dir to clean
+    up when the video had to be staged locally.
+
+    Object-store videos are streamed: ffmpeg reads a presigned URL, so
+    decoding overlaps the transfer and the worker needs no scratch disk.
+    MP4s with a trailing index, and anything ffprobe cannot open over the
+    URL, are downloaded first as before.
+    """
+    if storage_backend != "r2":
+        return storage_key, None
+
+    if STREAM_FROM_OBJECT_STORE:
+        try:
+            streamable = is_streamable_container(
+                lambda offset, length: read_range(storage_key, offset, length)
+            )
+            if streamable:
+                url = presigned_get_url(storage_key)
+                if probe_video_size(url) is not None:
+                    return url, None
+            logging.info("Staging %s locally: not streamable", storage_key)
+        except Exception:
+            logging.warning(
+                "Could not stream %s; staging it locally", storage_key,
+                exc_info=True,
+            )
+
+    temp_dir = tempfile.TemporaryDirectory()
+    video_path = os.path.join(temp_dir.name, os.path.basename(storage_key))
+    try:
+        download_to_path(storage_key, video_path)
+    except BaseException:
+        temp_dir.cleanup()
+        raise
+    return video_path, temp_dir
+
+
+# ----------------------------
+# Result cache
+# ----------------------------
+
+def _analysis_fingerprint(model_paths: Optional[Tuple[Path, Path]]) -> str:
+    """Fingerprint of everything besides the video that determines a result."""
+    return settings_fingerprint({
+        "model": model_digest(model_paths) if model_paths else "heuristic",
+        "granularity": intent_granularity(),
+        "fps": ANALYSIS_FPS,
+        "short_side": ANALYSIS_SHORT_SIDE,
+        "audio_sample_rate": AUDIO_SAMPLE_RATE,
+    })
+
+
+def _cache_result(job_id: str, fingerprint: str) -> None:
+    """
+    Offer a finished job's result to later uploads of the same video,
+    under the cache key the API gave the job at upload. If this worker's
+    settings no longer match that key (a model swap, or different
+    settings than the worker the API last heard from), it is not cached.
+    """
+    try:
+        key = (read_job_fields(job_id, ("cache_key",)) or {}).get("cache_key")
+        if not key:
+            return
+        if key_fingerprint(key) != fingerprint:
+            logging.info(
+                "Not caching job %s: analysed with other settings than its key",
+                job_id,
+            )
+            return
+        store_result(key, job_id)
+    except Exception:
+        logging.warning("Could not cache the result of job %s", job_id, exc_info=True)
 
 
 # ----------------------------
 # Celery task
 # ----------------------------
 
-@celery_app.task
+@celery_app.task(name=RUN_ANALYSIS_JOB)
 def run_analysis_job(job_id: str, storage_backend: str, storage_key: str):
     """
     Background job that processes an uploaded video.
 
     Real pipeline:
-      1) Extract frames via ffmpeg
-      2) Compute motion signal
+      1) Stream grayscale frames from ffmpeg (nothing written to disk)
+      2) Compute motion signal incrementally
       3) Smooth motion
       4) Segment into phases
       5) Compute insights
@@ -246,33 +487,46 @@ def run_analysis_job(job_id: str, storage_backend: str, storage_key: str):
     """
 
     temp_dir = None
+    audio_executor = None
+    progress = ProgressReporter(job_id, write=update_job)
     try:
-        # 1) Mark processing
-        write_job(job_id, {
-            "job_id": job_id,
-            "status": "processing",
-            "progress": 0.1,
-            "message": "Starting analysis",
-            "result": None,
-        })
+        # 1) Mark processing and resolve the video input (a local path,
+        # or a URL that ffmpeg streams from)
+        progress.stage("download", "Starting analysis")
+        video_path, temp_dir = _open_video_input(storage_backend, storage_key)
+
+        # 2) Decode frames + 3) motion signal, streamed frame by frame
+        # (long videos are decoded as parallel time ranges). Audio features
+        # only need the input path, so they are computed alongside.
+        fps_used = ANALYSIS_FPS
+        probed_duration_s = get_video_duration(video_path)
+        progress.stage("decode", "Decoding frames")
+        expected_frames = (
+            probed_duration_s * fps_used if probed_duration_s else None
+        )
 
-        # Resolve local video path
-        video_path = storage_key
-        if storage_backend == "r2":
-            temp_dir = tempfile.TemporaryDirectory()
-            video_path = os.path.join(
-                temp_dir.name, os.path.basename(storage_key)
-            )
-            download_to_path(storage_key, video_path)
-
-        # 2) Extract frames
-        frames_dir = os.path.join("data", "frames", job_id)
-        frames_extracted, fps_used = extract_frames(
-            video_path=video_path,
-            output_dir=frames_dir,
-            fps=15,
+        def on_frames(frames_done: int) -> None:
+            if expected_frames:
+                progress.update(
+                    frames_done / expected_frames,
+                    f"Decoded {frames_done} frames at {fps_used} FPS",
+                )
+
+        audio_executor = ThreadPoolExecutor(max_workers=1)
+        audio_future = audio_executor.submit(
+            compute_audio_features,
+            audio_path=video_path,
+            fps=float(fps_used),
         )
-        probed_duration_s = get_video_duration(video_path)
+        accumulator = accumulate_video_motion(
+            video_path,
+            fps_used=fps_used,
+            duration_s=probed_duration_s,
+            on_progress=on_frames,
+        )
+        frames_extracted = accumulator.frame_count
+        signals = accumulator.to_signals()
+
         fallback_duration_s = (
             frames_extracted / fps_used if fps_used > 0 else 0.0
         )
@@ -282,113 +536,57 @@ def run_analysis_job(job_id: str, storage_backend: str, storage_key: str):
             else fallback_duration_s
         )
 
-        write_job(job_id, {
-            "job_id": job_id,
-            "status": "processing",
-            "progress": 0.25,
-            "message": f"Extracted {frames_extracted} frames at {fps_used} FPS",
-            "result": None,
-        })
-
-        # 3) Motion signal
-        motion_t, motion_signal, interaction_signal, entropy_signal = compute_motion_signal(
-            frames_dir,
-            fps_used=fps_used
+        progress.stage(
+            "audio", f"Decoded {frames_extracted} frames at {fps_used} FPS"
         )
-
         try:
-            audio_t, audio_energy, audio_flux = compute_audio_features(
-                audio_path=video_path,
-                fps=float(fps_used),
-            )
+            audio_t, audio_energy, audio_flux = audio_future.result()
+        except TruncatedStreamError:
+            # Partial audio would be cached as if it were the whole clip.
+            raise
         except Exception:
+            # No (readable) audio track: continue without audio features.
             audio_t, audio_energy, audio_flux = [], [], []
 
-        audio_energy = align_signal(motion_t, audio_t, audio_energy)
-        audio_flux = align_signal(motion_t, audio_t, audio_flux)
-
-        write_job(job_id, {
-            "job_id": job_id,
-            "status": "processing",
-            "progress": 0.45,
-            "message": "Computed motion signal",
-            "result": None,
-        })
+        signals = signals.with_channels(
+            audio_energy=align_to(signals.t, audio_t, audio_energy),
+            audio_flux=align_to(signals.t, audio_t, audio_flux),
+        )
 
         # 4) Smooth motion
-        smoothed_motion = smooth_signal(motion_signal, window_size=5)
+        progress.stage("inference", "Computed motion signal")
+        signals = signals.with_channels(
+            motion_smooth=smooth_signal(signals.motion, window_size=5),
+        )
+        progress.update(0.1, "Smoothed motion signal")
 
-        write_job(job_id, {
-            "job_id": job_id,
-            "status": "processing",
-            "progress": 0.60,
-            "message": "Smoothed motion signal",
-            "result": None,
-        })
+        # 5) Segment phases (the fingerprint describes exactly the model
+        # and settings used, and is re-published in case they changed)
+        model_paths = active_model_paths()
+        fingerprint = _analysis_fingerprint(model_paths)
+        try:
+            publish_fingerprint(fingerprint)
+        except Exception:
+            logging.warning("Could not publish the settings fingerprint", exc_info=True)
+        segments = _segment_signals(signals, model_paths=model_paths)
 
-        # 5) Segment phases
-        model_paths = download_model_if_needed()
-        if model_paths is not None:
-            model_bundle = load_model_bundle(*model_paths)
-        else:
-            model_bundle = load_default_model_bundle()
-        if model_bundle is not None:
-            segments = segment_intent_phases_model(
-                motion_t,
-                motion_signal,
-                interaction_signal,
-                entropy_signal,
-                audio_energy,
-                audio_flux,
-                model_bundle,
+        # 6) Insights + metrics
+        progress.stage("finalise", f"Segmented into {len(segments)} phases")
+        analysis = _summarise_segments(segments, signals)
+        progress.update(0.5, "Finalizing results...")
+
+        # Keep the signals so the job can be re-segmented without decoding
+        try:
+            artefact = save_signal_artefact(
+                job_id, signals, storage_backend, fps=fps_used
             )
-        else:
-            segments = segment_intent_phases(
-                motion_t,
-                smoothed_motion,
-                interaction=interaction_signal,
-                entropy=entropy_signal
+            update_job(job_id, {"signals_artefact": artefact})
+        except Exception:
+            logging.warning(
+                "Could not save signals for job %s", job_id, exc_info=True
             )
 
-        # Ensure UI-friendly shape (without changing real segmentation)
-        segments = _ensure_segment_ids_and_fields(segments)
-
-
-        write_job(job_id, {
-            "job_id": job_id,
-            "status": "processing",
-            "progress": 0.75,
-            "message": f"Segmented into {len(segments)} phases",
-            "result": None,
-        })
-
-        # 6) Insights + metrics
-        # Your existing compute_intent_insights likely returns headline + avg segment duration etc.
-        insights = compute_intent_insights(segments)
-
-        # Add phase distribution + top-level metrics in stable places
-        phase_distribution = _phase_distribution_from_segments(segments)
-        transitions = _segments_to_transitions(
-            segments,
-            signals={
-                "t": motion_t,
-                "motion_smooth": smoothed_motion,
-            }
-        )
-        _mark_hesitation(transitions)
-        metrics = _compute_metrics(segments, transitions)
-
-        # Optional: simulate extra work (keeps UI animation / progress feeling alive)
-        for i in range(8, 10):
-            time.sleep(0.2)
-            write_job(job_id, {
-                "job_id": job_id,
-                "status": "processing",
-                "progress": i / 10.0,
-                "message": "Finalizing results...",
-                "result": None,
-            })
-        filename = os.path.basename(video_path)
+        filename = os.path.basename(storage_key)
         if storage_backend == "r2":
             public_url = get_public_url(storage_key)
             if public_url:
@@ -408,43 +606,26 @@ def run_analysis_job(job_id: str, storage_backend: str, storage_key: str):
                 "duration_s": round(duration_s, 3),
             },
 
-            # insights stays, but we enhance it with distribution so UI doesn't recompute
-            "summary": {
-                **(insights or {}),
-                "phase_distribution": phase_distribution,
-            },
-
-            # stable metrics block for UI panels
-            "metrics": metrics,
-
-            # segments + transitions are now first-class
-            "segments": segments,
-            "transitions": transitions,
+            # summary (insights + phase distribution), metrics, segments
+            # and transitions
+            **analysis,
 
             # signals are still included (great for charts/debug)
-            "signals": {
-                "t": motion_t,
-                "motion_raw": motion_signal,
-                "motion_smooth": smoothed_motion,
-                "interaction": interaction_signal,
-                "entropy": entropy_signal,
-                "audio_energy": audio_energy,
-                "audio_flux": audio_flux,
-            },
+            "signals": signals.to_payload(),
         }
 
-        write_job(job_id, {
-            "job_id": job_id,
+        progress.finish()
+        update_job(job_id, {
             "status": "done",
             "progress": 1.0,
             "message": "Analysis complete",
             "result": result,
         })
+        _cache_result(job_id, fingerprint)
         return True
     except Exception as exc:
         logging.exception("Job %s failed during analysis", job_id)
-        write_job(job_id, {
-            "job_id": job_id,
+        update_job(job_id, {
             "status": "error",
             "progress": 0.0,
             "message": f"Analysis failed: {type(exc).__name__}: {exc}",
@@ -452,5 +633,25 @@ def run_analysis_job(job_id: str, storage_backend: str, storage_key: str):
         })
         return False
     finally:
+        if audio_executor is not None:
+            # Let an in-flight audio decode finish before its input goes away.
+            audio_executor.shutdown(wait=True, cancel_futures=True)
         if temp_dir is not None:
             temp_dir.cleanup()
+
+
+@celery_app.task(name=RESEGMENT_JOB)
+def resegment_job(artefact: Dict[str, str], params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Re-run segmentation on a finished job's stored signals with other
+    parameters (`mode`, `granularity`, `penalty_scale`). Nothing is
+    decoded and the job's own result is left as it is.
+    """
+    signals = load_signal_artefact(artefact)
+    segments = _segment_signals(
+        signals,
+        mode=params.get("mode") or "auto",
+        granularity=params.get("granularity"),
+        penalty_scale=params.get("penalty_scale"),
+    )
+    return _summarise_segments(segments, signals)
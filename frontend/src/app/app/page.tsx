@@ -121,26 +121,85 @@ export default function AppPage() {
   // -----------------------------
   // Upload + run analysis
   // -----------------------------
-  async function runAnalysis() {
-    if (!file) return;
 
-    setLoading(true);
+  // Sends the file straight to the bucket through presigned URLs. Returns
+  // null when the backend has no object storage (use /api/upload instead).
+  async function uploadDirect(file: File): Promise<string | null> {
+    const initRes = await fetch(`${apiBase}/api/upload/init`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        filename: file.name,
+        content_type: file.type || "video/mp4",
+        size: file.size,
+      }),
+    });
+    if (initRes.status === 409) return null;
+    if (!initRes.ok) {
+      throw new Error(`Upload failed: ${initRes.status}`);
+    }
+    const init = await initRes.json();
+
+    const parts: { part_number: number; etag: string }[] = [];
+    if (init.upload_url) {
+      const putRes = await fetch(init.upload_url, {
+        method: "PUT",
+        headers: init.headers,
+        body: file,
+      });
+      if (!putRes.ok) {
+        throw new Error(`Upload failed: ${putRes.status}`);
+      }
+    } else {
+      for (let i = 0; i < init.part_urls.length; i++) {
+        const start = i * init.part_size;
+        const partRes = await fetch(init.part_urls[i], {
+          method: "PUT",
+          body: file.slice(start, start + init.part_size),
+        });
+        if (!partRes.ok) {
+          throw new Error(`Upload failed: ${partRes.status}`);
+        }
+        parts.push({ part_number: i + 1, etag: partRes.headers.get("ETag") ?? "" });
+      }
+    }
 
+    const completeRes = await fetch(`${apiBase}/api/upload/complete`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ job_id: init.job_id, parts }),
+    });
+    if (!completeRes.ok) {
+      throw new Error(`Upload failed: ${completeRes.status}`);
+    }
+    return init.job_id;
+  }
+
+  async function uploadThroughApi(file: File): Promise<string> {
     const formData = new FormData();
     formData.append("file", file);
 
-    try {
-      const res = await fetch(`${apiBase}/api/upload`, {
-        method: "POST",
-        body: formData,
-      });
+    const res = await fetch(`${apiBase}/api/upload`, {
+      method: "POST",
+      body: formData,
+    });
 
-      if (!res.ok) {
-        throw new Error(`Upload failed: ${res.status}`);
-      }
+    if (!res.ok) {
+      throw new Error(`Upload failed: ${res.status}`);
+    }
+
+    const data = await res.json();
+    return data.job_id;
+  }
 
-      const data = await res.json();
-      pollJob(data.job_id);
+  async function runAnalysis() {
+    if (!file) return;
+
+    setLoading(true);
+
+    try {
+      const jobId = (await uploadDirect(file)) ?? (await uploadThroughApi(file));
+      watchJob(jobId);
     } catch (error) {
       setLoading(false);
       setJob({
@@ -157,21 +216,69 @@ export default function AppPage() {
   }
 
   // -----------------------------
-  // Poll job status
+  // Follow job progress (SSE, polling as fallback)
   // -----------------------------
+  async function fetchResult(jobId: string, status: any) {
+    const resultRes = await fetch(`${apiBase}/api/job/${jobId}/result`);
+    if (!resultRes.ok) {
+      throw new Error(`Result fetch failed: ${resultRes.status}`);
+    }
+    const result = await resultRes.json();
+    setJob({ ...status, result });
+    setLoading(false);
+  }
+
+  function watchJob(jobId: string) {
+    if (typeof EventSource === "undefined") {
+      pollJob(jobId);
+      return;
+    }
+    const source = new EventSource(`${apiBase}/api/job/${jobId}/events`);
+    let finished = false;
+    source.onmessage = async (event) => {
+      const data = JSON.parse(event.data);
+      if (data.status === "done") {
+        finished = true;
+        source.close();
+        try {
+          await fetchResult(jobId, data);
+        } catch {
+          pollJob(jobId);
+        }
+      } else {
+        setJob({ ...data, result: null });
+        if (data.status === "error") {
+          finished = true;
+          source.close();
+          setLoading(false);
+        }
+      }
+    };
+    source.onerror = () => {
+      // The server closes the stream once the job ends; anything else
+      // (proxy without SSE, dropped connection) falls back to polling.
+      source.close();
+      if (!finished) {
+        pollJob(jobId);
+      }
+    };
+  }
+
   async function pollJob(jobId: string) {
     const interval = setInterval(async () => {
       try {
-        const res = await fetch(`${apiBase}/api/job/${jobId}`);
+        // The status endpoint never carries the result, so polls stay tiny.
+        const res = await fetch(`${apiBase}/api/job/${jobId}/status`);
         if (!res.ok) {
           throw new Error(`Job fetch failed: ${res.status}`);
         }
         const data = await res.json();
-        setJob(data);
 
         if (data.status === "done") {
           clearInterval(interval);
-          setLoading(false);
+          await fetchResult(jobId, data);
+        } else {
+          setJob({ ...data, result: null });
         }
       } catch (error) {
         clearInterval(interval);